@@ -0,0 +1,115 @@
+# 🗄️ Blob-Speicher
+# Binärdaten (z. B. Einsatzfotos) außerhalb der Dokumente: GridFS in derselben
+# MongoDB (Standard) oder ein S3-Bucket (BLOB_STORE=s3). Schlüssel ist der SHA-256 des
+# Inhalts, gleiche Bilder werden also nur einmal gespeichert.
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from gridfs.errors import FileExists
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo.errors import DuplicateKeyError
+
+DATA_URI_PATTERN = re.compile(r"^data:(?P<type>[\w/+.-]+);base64,(?P<data>.*)$", re.DOTALL)
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+
+def content_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def decode_base64_image(value: str) -> Tuple[bytes, str]:
+    """Bytes and content type of a base64 image (plain or data URI)"""
+    content_type = "image/jpeg"
+    match = DATA_URI_PATTERN.match(value)
+    if match:
+        content_type, value = match.group("type"), match.group("data")
+    try:
+        return base64.b64decode(value, validate=False), content_type
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image: {e}")
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for binary data"""
+
+    @abstractmethod
+    async def put(self, data: bytes, content_type: str = DEFAULT_CONTENT_TYPE) -> str:
+        """Store data and return its key"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """(data, content type), None for unknown keys"""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove a blob; unknown keys are ignored"""
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, db, bucket_name: str = "blobs"):
+        self.db = db
+        self.bucket_name = bucket_name
+        self.files = db[f"{bucket_name}.files"]
+        self._bucket: Optional[AsyncIOMotorGridFSBucket] = None
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        # Created on first use, not when the app is configured
+        if self._bucket is None:
+            self._bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def put(self, data: bytes, content_type: str = DEFAULT_CONTENT_TYPE) -> str:
+        key = content_key(data)
+        if await self.files.find_one({"_id": key}, {"_id": 1}) is None:
+            try:
+                await self.bucket.upload_from_stream_with_id(key, key, data, metadata={"content_type": content_type})
+            except (FileExists, DuplicateKeyError):
+                pass  # stored concurrently by another request
+        return key
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        info = await self.files.find_one({"_id": key}, {"metadata": 1})
+        if info is None:
+            return None
+        stream = await self.bucket.open_download_stream(key)
+        return await stream.read(), (info.get("metadata") or {}).get("content_type", DEFAULT_CONTENT_TYPE)
+
+    async def delete(self, key: str):
+        if await self.files.find_one({"_id": key}, {"_id": 1}) is not None:
+            await self.bucket.delete(key)
+
+
+class S3BlobStore(BlobStore):
+    """S3 (or compatible) bucket; boto3 calls run in worker threads"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        import boto3  # only needed with BLOB_STORE=s3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix
+
+    async def put(self, data: bytes, content_type: str = DEFAULT_CONTENT_TYPE) -> str:
+        key = content_key(data)
+        await asyncio.to_thread(
+            self.client.put_object, Bucket=self.bucket, Key=self.prefix + key, Body=data, ContentType=content_type
+        )
+        return key
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket, Key=self.prefix + key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+        body = await asyncio.to_thread(response["Body"].read)
+        return body, response.get("ContentType", DEFAULT_CONTENT_TYPE)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self.prefix + key)
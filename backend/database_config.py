@@ -1,14 +1,20 @@
 # 🗄️ Database Configuration für SQL-Datenbanken
 # Beispiel-Konfigurationen für MySQL, PostgreSQL, SQLite
 
+import logging
 import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+# SQLAlchemy wird erst beim Anlegen einer Engine importiert, damit der Import
+# dieses Moduls bei reinem MongoDB-Betrieb nichts kostet
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# SQL-Queries nur bei Bedarf loggen (sehr gesprächig)
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
 # ================================================
 # DATENBANK-KONFIGURATIONEN
 # ================================================
@@ -65,39 +71,40 @@ def get_sqlite_url():
 
 def create_database_engine(db_type="mysql"):
     """Database Engine basierend auf Typ erstellen"""
+    from sqlalchemy.ext.asyncio import create_async_engine
     
     if db_type.lower() == "mysql":
         database_url = get_mysql_url()
         engine = create_async_engine(
             database_url,
-            echo=True,  # SQL-Queries loggen
+            echo=SQL_ECHO,
             pool_size=20,
             max_overflow=30,
             pool_pre_ping=True,
             pool_recycle=3600
         )
-        print(f"🔗 MySQL Engine erstellt: {database_url.split('@')[1]}")
+        logger.info(f"🔗 MySQL Engine erstellt: {database_url.split('@')[1]}")
         
     elif db_type.lower() == "postgresql" or db_type.lower() == "postgres":
         database_url = get_postgres_url()
         engine = create_async_engine(
             database_url,
-            echo=True,
+            echo=SQL_ECHO,
             pool_size=20,
             max_overflow=30,
             pool_pre_ping=True,
             pool_recycle=3600
         )
-        print(f"🔗 PostgreSQL Engine erstellt: {database_url.split('@')[1]}")
+        logger.info(f"🔗 PostgreSQL Engine erstellt: {database_url.split('@')[1]}")
         
     elif db_type.lower() == "sqlite":
         database_url = get_sqlite_url()
         engine = create_async_engine(
             database_url,
-            echo=True,
+            echo=SQL_ECHO,
             connect_args={"check_same_thread": False}
         )
-        print(f"🔗 SQLite Engine erstellt: {database_url}")
+        logger.info(f"🔗 SQLite Engine erstellt: {database_url}")
         
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
@@ -110,6 +117,9 @@ def create_database_engine(db_type="mysql"):
 
 def create_session_factory(engine):
     """Session Factory für Datenbank-Operationen"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    
     return sessionmaker(
         engine, 
         class_=AsyncSession, 
@@ -122,19 +132,21 @@ def create_session_factory(engine):
 
 async def test_database_connection(db_type="mysql"):
     """Test-Verbindung zur Datenbank"""
+    from sqlalchemy import text
+    
     try:
         engine = create_database_engine(db_type)
         
         async with engine.begin() as conn:
             result = await conn.execute(text("SELECT 1 as test"))
             row = result.fetchone()
-            print(f"✅ {db_type.upper()} Verbindung erfolgreich: {row}")
+            logger.info(f"✅ {db_type.upper()} Verbindung erfolgreich: {row}")
             
         await engine.dispose()
         return True
         
     except Exception as e:
-        print(f"❌ {db_type.upper()} Verbindung fehlgeschlagen: {e}")
+        logger.error(f"❌ {db_type.upper()} Verbindung fehlgeschlagen: {e}")
         return False
 
 # ================================================
@@ -171,6 +183,8 @@ DATABASE_TYPE=mysql  # oder postgresql, sqlite
 
 async def run_database_migrations(db_type="mysql"):
     """Datenbank-Schema aus SQL-Datei ausführen"""
+    from sqlalchemy import text
+    
     try:
         engine = create_database_engine(db_type)
         
@@ -186,16 +200,16 @@ async def run_database_migrations(db_type="mysql"):
                 if statement and not statement.startswith('--'):
                     try:
                         await conn.execute(text(statement))
-                        print(f"✅ SQL Statement ausgeführt: {statement[:50]}...")
+                        logger.debug(f"✅ SQL Statement ausgeführt: {statement[:50]}...")
                     except Exception as e:
-                        print(f"⚠️ SQL Statement übersprungen: {e}")
+                        logger.warning(f"⚠️ SQL Statement übersprungen: {e}")
         
         await engine.dispose()
-        print("🎉 Datenbank-Migration abgeschlossen!")
+        logger.info("🎉 Datenbank-Migration abgeschlossen!")
         return True
         
     except Exception as e:
-        print(f"❌ Migration fehlgeschlagen: {e}")
+        logger.error(f"❌ Migration fehlgeschlagen: {e}")
         return False
 
 # ================================================
@@ -205,6 +219,8 @@ async def run_database_migrations(db_type="mysql"):
 if __name__ == "__main__":
     import asyncio
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     async def main():
         # Test verschiedene Datenbank-Typen
         db_types = ["mysql", "postgresql", "sqlite"]
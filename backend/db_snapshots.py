@@ -0,0 +1,155 @@
+# 💾 Datenbank-Snapshots
+# Sichert alle Collections im Verzeichnisformat von `mongodump --gzip`
+# (<collection>.bson.gz + <collection>.metadata.json) und spielt sie wieder ein.
+# Snapshots lassen sich daher auch mit `mongorestore --gzip --dir=<snapshot>` laden.
+# Dokumente werden als rohes BSON gelesen und geschrieben, ohne Dekodierung in Python.
+
+import asyncio
+import gzip
+import re
+import shutil
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List
+
+from bson import decode_file_iter
+from bson.codec_options import CodecOptions
+from bson.json_util import dumps as bson_dumps, loads as bson_loads
+from bson.raw_bson import RawBSONDocument
+from pymongo import IndexModel
+
+SNAPSHOT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+SNAPSHOT_BATCH_SIZE = 1000
+SNAPSHOT_CHUNK_BYTES = 1024 * 1024
+
+RAW_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+def valid_snapshot_name(name: str) -> bool:
+    return bool(SNAPSHOT_NAME_PATTERN.match(name))
+
+
+def list_snapshots(snapshot_dir: Path) -> List[Dict]:
+    if not snapshot_dir.exists():
+        return []
+    snapshots = []
+    for path in sorted(snapshot_dir.iterdir()):
+        if path.is_dir() and valid_snapshot_name(path.name):
+            files = list(path.glob("*.bson.gz"))
+            snapshots.append({
+                "name": path.name,
+                "collections": sorted(f.name[:-len(".bson.gz")] for f in files),
+                "size_bytes": sum(f.stat().st_size for f in files),
+                "created_at": datetime.utcfromtimestamp(path.stat().st_mtime),
+            })
+    return snapshots
+
+
+async def _dump_collection(collection, target: Path) -> int:
+    count = 0
+    raw = collection.with_options(codec_options=RAW_OPTIONS)
+    handle = await asyncio.to_thread(gzip.open, target / f"{collection.name}.bson.gz", "wb")
+    try:
+        chunk: List[bytes] = []
+        size = 0
+        async for doc in raw.find({}, batch_size=SNAPSHOT_BATCH_SIZE):
+            chunk.append(doc.raw)
+            size += len(doc.raw)
+            count += 1
+            if size >= SNAPSHOT_CHUNK_BYTES:
+                await asyncio.to_thread(handle.write, b"".join(chunk))
+                chunk, size = [], 0
+        if chunk:
+            await asyncio.to_thread(handle.write, b"".join(chunk))
+    finally:
+        await asyncio.to_thread(handle.close)
+
+    indexes = [index async for index in collection.list_indexes()]
+    metadata = {"options": {}, "indexes": [dict(index) for index in indexes], "collectionName": collection.name}
+    (target / f"{collection.name}.metadata.json").write_text(bson_dumps(metadata))
+    return count
+
+
+async def create_snapshot(db, snapshot_dir: Path, name: str) -> Dict[str, int]:
+    """Dump every collection; an existing snapshot of the same name is replaced"""
+    target = snapshot_dir / name
+    staging = snapshot_dir / f".{name}.tmp"
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+
+    counts = {}
+    for collection_name in sorted(await db.list_collection_names()):
+        if collection_name.startswith("system."):
+            continue
+        counts[collection_name] = await _dump_collection(db[collection_name], staging)
+
+    # Swap in only complete snapshots
+    if target.exists():
+        shutil.rmtree(target)
+    staging.rename(target)
+    return counts
+
+
+def _read_batches(path: Path):
+    with gzip.open(path, "rb") as handle:
+        docs = decode_file_iter(handle, codec_options=RAW_OPTIONS)
+        while True:
+            batch = list(islice(docs, SNAPSHOT_BATCH_SIZE))
+            if not batch:
+                return
+            yield batch
+
+
+async def _restore_collection(db, path: Path) -> int:
+    name = path.name[:-len(".bson.gz")]
+    metadata_path = path.with_name(f"{name}.metadata.json")
+    collection = db[name]
+
+    # Indexes first; building them on an empty collection is cheapest
+    if metadata_path.exists():
+        metadata = bson_loads(metadata_path.read_text())
+        models = []
+        for index in metadata.get("indexes", []):
+            if index.get("name") == "_id_":
+                continue
+            options = {k: v for k, v in index.items() if k not in ("v", "key", "ns")}
+            models.append(IndexModel(list(index["key"].items()), **options))
+        if models:
+            await collection.create_indexes(models)
+
+    count = 0
+    batches = _read_batches(path)
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        await collection.insert_many(batch, ordered=False)
+        count += len(batch)
+    return count
+
+
+async def drop_collections(db) -> List[str]:
+    """Drop all collections (documents, indexes and storage at once)"""
+    names = [name for name in await db.list_collection_names() if not name.startswith("system.")]
+    for name in names:
+        await db.drop_collection(name)
+    return names
+
+
+async def restore_snapshot(db, snapshot_dir: Path, name: str) -> Dict[str, int]:
+    """Replace the database content with the snapshot"""
+    await drop_collections(db)
+    counts = {}
+    for path in sorted((snapshot_dir / name).glob("*.bson.gz")):
+        counts[path.name[:-len(".bson.gz")]] = await _restore_collection(db, path)
+    return counts
+
+
+def delete_snapshot(snapshot_dir: Path, name: str) -> bool:
+    target = snapshot_dir / name
+    if not target.is_dir():
+        return False
+    shutil.rmtree(target)
+    return True
@@ -0,0 +1,179 @@
+# 🚓 Einsatz-Disposition
+# Rangliste verfügbarer Beamter für einen Vorfall, basierend auf letzter Position,
+# Dienststatus, offenen Einsätzen und Priorität. Die Positionen liegen in einem
+# Gitter-Index im Speicher, der bei jedem Standort-Ping inkrementell aktualisiert wird.
+
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+
+# Gitterzelle ca. 1,1 km (Breite) x 0,7 km (Länge in Mitteleuropa)
+CELL_SIZE_DEG = 0.01
+
+# Standorte älter als diese Grenze gelten als unbekannt
+POSITION_MAX_AGE_SECONDS = 30 * 60
+
+# Wie stark ein Status die effektive Entfernung verlängert (None = nicht einsetzbar)
+STATUS_FACTORS = {
+    "Streife": 1.0,
+    "Im Dienst": 1.2,
+    "Einsatz": 3.0,
+    "Pause": 4.0,
+    "Nicht verfügbar": None,
+}
+
+# Pro Priorität: erlaubte Status und Aufschlag je offenem Einsatz (km)
+PRIORITY_RULES = {
+    "high": {"statuses": {"Streife", "Im Dienst", "Einsatz", "Pause"}, "assignment_penalty_km": 0.5},
+    "medium": {"statuses": {"Streife", "Im Dienst", "Einsatz"}, "assignment_penalty_km": 1.5},
+    "low": {"statuses": {"Streife", "Im Dienst"}, "assignment_penalty_km": 3.0},
+}
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return (math.floor(lat / CELL_SIZE_DEG), math.floor(lng / CELL_SIZE_DEG))
+
+
+class SpatialIndex:
+    """Uniform grid of latest positions, O(1) update per ping"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, int], set] = {}
+        self.positions: Dict[str, Tuple[float, float, float]] = {}  # user_id -> (lat, lng, monotonic ts)
+
+    def update(self, user_id: str, lat: float, lng: float, ts: Optional[float] = None):
+        previous = self.positions.get(user_id)
+        cell = _cell(lat, lng)
+        if previous is not None:
+            old_cell = _cell(previous[0], previous[1])
+            if old_cell != cell:
+                self._discard(old_cell, user_id)
+        self.cells.setdefault(cell, set()).add(user_id)
+        self.positions[user_id] = (lat, lng, time.monotonic() if ts is None else ts)
+
+    def remove(self, user_id: str):
+        previous = self.positions.pop(user_id, None)
+        if previous is not None:
+            self._discard(_cell(previous[0], previous[1]), user_id)
+
+    def _discard(self, cell: Tuple[int, int], user_id: str):
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del self.cells[cell]
+
+    def nearby(self, lat: float, lng: float, min_results: int, max_rings: int = 50) -> List[str]:
+        """User ids in growing rings of cells around a point until enough are found"""
+        center_row, center_col = _cell(lat, lng)
+        found: List[str] = []
+        last_ring: Optional[int] = None
+        for ring in range(max_rings + 1):
+            if ring == 0:
+                ring_cells = [(center_row, center_col)]
+            else:
+                ring_cells = [
+                    (center_row + dr, center_col + dc)
+                    for dr in range(-ring, ring + 1)
+                    for dc in range(-ring, ring + 1)
+                    if max(abs(dr), abs(dc)) == ring
+                ]
+            for cell in ring_cells:
+                found.extend(self.cells.get(cell, ()))
+            if len(found) == len(self.positions):
+                break
+            # One extra ring after the ring that reached min_results: a unit just across
+            # its border can be closer than one in a corner cell of that ring
+            if last_ring is None and len(found) >= min_results:
+                last_ring = ring + 1
+            elif last_ring is not None and ring >= last_ring:
+                break
+        return found
+
+
+class OfficerState:
+    __slots__ = ("user_id", "username", "status", "open_assignments")
+
+    def __init__(self, user_id: str, username: str, status: str, open_assignments: int = 0):
+        self.user_id = user_id
+        self.username = username
+        self.status = status
+        self.open_assignments = open_assignments
+
+
+class DispatchEngine:
+    """Ranks officers for an incident from in-memory state"""
+
+    def __init__(self):
+        self.index = SpatialIndex()
+        self.officers: Dict[str, OfficerState] = {}
+
+    # State updates
+    def set_officer(self, user_id: str, username: str, status: str, open_assignments: Optional[int] = None):
+        officer = self.officers.get(user_id)
+        if officer is None:
+            self.officers[user_id] = OfficerState(user_id, username, status, open_assignments or 0)
+        else:
+            officer.username = username
+            officer.status = status
+            if open_assignments is not None:
+                officer.open_assignments = open_assignments
+
+    def set_status(self, user_id: str, status: str):
+        officer = self.officers.get(user_id)
+        if officer is not None:
+            officer.status = status
+
+    def remove_officer(self, user_id: str):
+        self.officers.pop(user_id, None)
+        self.index.remove(user_id)
+
+    def update_position(self, user_id: str, lat: float, lng: float, ts: Optional[float] = None):
+        if user_id in self.officers:
+            self.index.update(user_id, lat, lng, ts)
+
+    def change_assignments(self, user_id: Optional[str], delta: int):
+        officer = self.officers.get(user_id) if user_id else None
+        if officer is not None:
+            officer.open_assignments = max(0, officer.open_assignments + delta)
+
+    # Ranking
+    def candidates(self, lat: float, lng: float, priority: str, limit: int = 10) -> List[dict]:
+        rules = PRIORITY_RULES.get(priority, PRIORITY_RULES["medium"])
+        now = time.monotonic()
+        ranked = []
+        for user_id in self.index.nearby(lat, lng, min_results=limit * 3):
+            officer = self.officers.get(user_id)
+            if officer is None or officer.status not in rules["statuses"]:
+                continue
+            factor = STATUS_FACTORS.get(officer.status)
+            if factor is None:
+                continue
+            o_lat, o_lng, ts = self.index.positions[user_id]
+            age = now - ts
+            if age > POSITION_MAX_AGE_SECONDS:
+                continue
+            distance = haversine_km(lat, lng, o_lat, o_lng)
+            score = distance * factor + officer.open_assignments * rules["assignment_penalty_km"]
+            ranked.append({
+                "user_id": user_id,
+                "username": officer.username,
+                "status": officer.status,
+                "open_assignments": officer.open_assignments,
+                "distance_km": round(distance, 3),
+                "position_age_seconds": int(age),
+                "location": {"lat": o_lat, "lng": o_lng},
+                "score": round(score, 3),
+            })
+        ranked.sort(key=lambda c: c["score"])
+        return ranked[:limit]
@@ -0,0 +1,106 @@
+# 📤 Streaming-Export
+# Wandelt asynchrone MongoDB-Cursor zeilenweise in CSV oder NDJSON um (optional gzip).
+# Es wird nie mehr als ein Puffer von EXPORT_CHUNK_BYTES im Speicher gehalten,
+# unabhängig von der Größe des Exports.
+
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Sequence, Tuple
+
+from serialization import dumps
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# (column header, dotted path in the document)
+Columns = Sequence[Tuple[str, str]]
+
+
+def _lookup(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return dumps(value).decode()
+    return value
+
+
+def flatten(doc: Dict[str, Any], columns: Columns) -> Dict[str, Any]:
+    return {header: _lookup(doc, path) for header, path in columns}
+
+
+async def _csv_chunks(rows: AsyncIterable[Dict[str, Any]], columns: Columns) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so that Excel detects UTF-8 (umlauts in names and addresses)
+    buffer.write("\ufeff")
+    writer.writerow([header for header, _ in columns])
+    async for doc in rows:
+        writer.writerow([_cell(_lookup(doc, path)) for _, path in columns])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _ndjson_chunks(rows: AsyncIterable[Dict[str, Any]], columns: Columns) -> AsyncIterator[bytes]:
+    chunk: List[bytes] = []
+    size = 0
+    async for doc in rows:
+        line = dumps(flatten(doc, columns)) + b"\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def _gzip(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode_rows(rows: AsyncIterable[Dict[str, Any]], columns: Columns,
+                fmt: str = "csv", gzip: bool = False) -> AsyncIterator[bytes]:
+    """Byte chunks of the encoded export"""
+    chunks = _csv_chunks(rows, columns) if fmt == "csv" else _ndjson_chunks(rows, columns)
+    return _gzip(chunks) if gzip else chunks
+
+
+def export_filename(dataset: str, start: datetime, end: datetime, fmt: str, gzip: bool) -> str:
+    name = f"stadtwache-{dataset}-{start:%Y%m%d}-{end:%Y%m%d}.{EXPORT_FORMATS[fmt][1]}"
+    return name + ".gz" if gzip else name
+
+
+async def chain_cursors(cursors: Sequence[Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Iterate several cursors one after another (e.g. live collection plus monthly archives)"""
+    for cursor in cursors:
+        async for doc in cursor:
+            yield doc
+
+
+def media_type(fmt: str, gzip: bool) -> str:
+    return "application/gzip" if gzip else EXPORT_FORMATS[fmt][0]
@@ -0,0 +1,103 @@
+# 🧪 Fixture-Sets für Staging und lokale Entwicklung
+# Deutsche Demo-Daten (wie in backend_test.py). Benutzer werden über die E-Mail
+# referenziert; server.py baut daraus vollständige Dokumente und lädt sie per Bulk-Insert.
+
+DEMO_FIXTURES = {
+    "users": [
+        {
+            "email": "demo@stadtwache.de",
+            "username": "Demo Admin",
+            "password": "demo123",
+            "role": "admin",
+            "badge_number": "SW000",
+            "department": "Leitstelle",
+            "rank": "Wachleiter"
+        },
+        {
+            "email": "mueller@stadtwache.de",
+            "username": "Hans Müller",
+            "password": "sicher123",
+            "role": "police",
+            "badge_number": "SW001",
+            "department": "Streifendienst",
+            "phone": "+49 30 12345678",
+            "service_number": "12345",
+            "rank": "Hauptwachtmeister"
+        },
+        {
+            "email": "schmidt@stadtwache.de",
+            "username": "Anna Schmidt",
+            "password": "geheim456",
+            "role": "police",
+            "badge_number": "SW002",
+            "department": "Ermittlung",
+            "phone": "+49 30 87654321",
+            "service_number": "67890",
+            "rank": "Kommissarin"
+        }
+    ],
+    "incidents": [
+        {
+            "title": "Ruhestörung in der Hauptstraße",
+            "description": "Laute Musik aus Wohnung im 3. Stock. Nachbarn beschweren sich über nächtliche Lärmbelästigung.",
+            "priority": "medium",
+            "location": {"lat": 52.5200, "lng": 13.4050},
+            "address": "Hauptstraße 15, 10115 Berlin",
+            "reported_by": "demo@stadtwache.de"
+        },
+        {
+            "title": "Verdächtiges Fahrzeug am Bahnhof",
+            "description": "Schwarzer BMW ohne Kennzeichen parkt seit 2 Stunden vor dem Hauptbahnhof. Fahrer verhält sich auffällig.",
+            "priority": "high",
+            "location": {"lat": 52.5251, "lng": 13.3694},
+            "address": "Hauptbahnhof Berlin, Europaplatz 1, 10557 Berlin",
+            "reported_by": "mueller@stadtwache.de"
+        },
+        {
+            "title": "Fahrraddiebstahl gemeldet",
+            "description": "Hochwertiges Mountainbike wurde aus verschlossenem Fahrradkeller entwendet. Schloss wurde aufgebrochen.",
+            "priority": "low",
+            "location": {"lat": 52.5170, "lng": 13.3888},
+            "address": "Friedrichstraße 95, 10117 Berlin",
+            "reported_by": "schmidt@stadtwache.de"
+        }
+    ],
+    "messages": [
+        {
+            "content": "Guten Morgen Team! Schichtbeginn um 06:00 Uhr.",
+            "channel": "general",
+            "sender": "demo@stadtwache.de"
+        },
+        {
+            "content": "Achtung: Verdächtiges Fahrzeug am Bahnhof gemeldet. Alle verfügbaren Einheiten bitte melden.",
+            "channel": "emergency",
+            "sender": "mueller@stadtwache.de"
+        },
+        {
+            "content": "Vorfall Hauptstraße abgeschlossen. Verwarnung erteilt.",
+            "channel": "incidents",
+            "sender": "schmidt@stadtwache.de"
+        }
+    ],
+    "reports": [
+        {
+            "title": "Schichtbericht Nachtdienst 15.01.2025",
+            "content": "Ruhige Nacht mit 3 Einsätzen:\n1. Ruhestörung Hauptstraße - Verwarnung erteilt\n2. Fahrzeugkontrolle Bahnhof - Verdacht nicht bestätigt\n3. Fahrraddiebstahl - Anzeige aufgenommen\n\nBesondere Vorkommnisse: Keine\nWetter: Klar, -2°C",
+            "shift_date": "2025-01-15",
+            "status": "submitted",
+            "author": "mueller@stadtwache.de"
+        },
+        {
+            "title": "Wochenbericht KW 3/2025",
+            "content": "Zusammenfassung der Woche:\n- 15 Einsätze bearbeitet\n- 3 Anzeigen aufgenommen\n- 2 Verwarnungen erteilt\n- 1 Festnahme\n\nSchwerpunkte: Fahrraddiebstähle in der Innenstadt nehmen zu.",
+            "shift_date": "2025-01-20",
+            "status": "submitted",
+            "author": "schmidt@stadtwache.de"
+        }
+    ]
+}
+
+FIXTURE_SETS = {
+    "empty": {"users": [], "incidents": [], "messages": [], "reports": []},
+    "demo": DEMO_FIXTURES,
+}
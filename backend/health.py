@@ -0,0 +1,95 @@
+# 🩺 Health- und Readiness-Prüfungen
+# Abhängigkeiten (MongoDB, optional SQL) werden periodisch im Hintergrund geprüft;
+# /health/ready liest nur das zwischengespeicherte Ergebnis und kostet daher fast nichts.
+# Ein Worker meldet sich "not ready", wenn eine Abhängigkeit ausfällt oder langsam ist,
+# der Pool ausgelastet ist oder die Event-Loop hängt – Load Balancer leiten dann um.
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class DependencyCheck:
+    __slots__ = ("name", "probe", "ok", "latency_ms", "error", "checked_at")
+
+    def __init__(self, name: str, probe: Callable[[], Awaitable[Any]]):
+        self.name = name
+        self.probe = probe
+        self.ok = False
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None  # monotonic
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "age_s": round(now - self.checked_at, 1) if self.checked_at is not None else None,
+        }
+
+
+class HealthMonitor:
+    def __init__(self, interval: float = 2.0, timeout: float = 1.0, max_latency_ms: float = 250.0,
+                 max_loop_lag: float = 0.5, max_pool_saturation: float = 0.9):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_latency_ms = max_latency_ms
+        self.max_loop_lag = max_loop_lag
+        self.max_pool_saturation = max_pool_saturation
+        self.checks: Dict[str, DependencyCheck] = {}
+        self.started_at = time.monotonic()
+        self.accepting = False  # set once startup finished, cleared when draining
+
+    def add_check(self, name: str, probe: Callable[[], Awaitable[Any]]):
+        self.checks[name] = DependencyCheck(name, probe)
+
+    async def _run(self, check: DependencyCheck):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check.probe(), self.timeout)
+            check.ok, check.error = True, None
+        except asyncio.TimeoutError:
+            check.ok, check.error = False, f"timeout after {self.timeout:g}s"
+        except Exception as e:
+            check.ok, check.error = False, repr(e)
+        check.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        check.checked_at = time.monotonic()
+
+    async def run_checks(self):
+        await asyncio.gather(*(self._run(check) for check in self.checks.values()))
+
+    async def loop(self):
+        while True:
+            await self.run_checks()
+            await asyncio.sleep(self.interval)
+
+    def readiness(self, loop_lag: float, pool_saturation: float, extra: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """(ready, details) from the cached check results"""
+        now = time.monotonic()
+        problems: List[str] = []
+        if not self.accepting:
+            problems.append("not accepting traffic (starting or draining)")
+        for check in self.checks.values():
+            if check.checked_at is None:
+                problems.append(f"{check.name}: not checked yet")
+            elif now - check.checked_at > 3 * self.interval + self.timeout:
+                problems.append(f"{check.name}: check result is stale")
+            elif not check.ok:
+                problems.append(f"{check.name}: {check.error}")
+            elif check.latency_ms > self.max_latency_ms:
+                problems.append(f"{check.name}: slow ({check.latency_ms} ms)")
+        if loop_lag > self.max_loop_lag:
+            problems.append(f"event loop lag {loop_lag:.3f}s")
+        if pool_saturation >= self.max_pool_saturation:
+            problems.append(f"mongo pool {pool_saturation:.0%} in use")
+
+        return not problems, {
+            "status": "ready" if not problems else "not_ready",
+            "problems": problems,
+            "uptime_s": round(now - self.started_at),
+            "dependencies": {name: check.as_dict(now) for name, check in self.checks.items()},
+            "event_loop_lag_s": round(loop_lag, 4),
+            "mongo_pool_saturation": round(pool_saturation, 3),
+            **extra,
+        }
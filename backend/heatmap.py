@@ -0,0 +1,138 @@
+# 🔥 Einsatz-Heatmap
+# Einsätze werden je Geohash-Zelle (mehrere Auflösungen) und Tag gezählt. Die Kacheln
+# werden beim Anlegen/Abschließen inkrementell per $inc gepflegt; der Neuaufbau aus
+# Einsätzen und Archivberichten läuft vektorisiert mit NumPy.
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_ALPHABET_ARRAY = np.array(list(GEOHASH_ALPHABET))
+_ALPHABET_INDEX = {char: i for i, char in enumerate(GEOHASH_ALPHABET)}
+
+PRIORITIES = ("high", "medium", "low")
+TILE_COUNTERS = ("reported", "completed") + PRIORITIES
+
+
+def _bit_split(precision: int) -> Tuple[int, int]:
+    """(latitude bits, longitude bits); geohash starts with a longitude bit"""
+    bits = 5 * precision
+    return bits // 2, bits - bits // 2
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) of a cell in degrees"""
+    lat_bits, lng_bits = _bit_split(precision)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_cells(lat: np.ndarray, lng: np.ndarray, precision: int) -> np.ndarray:
+    """Geohash strings for arrays of coordinates"""
+    lat_bits, lng_bits = _bit_split(precision)
+    lat_i = np.clip(((np.asarray(lat) + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    lng_i = np.clip(((np.asarray(lng) + 180.0) / 360.0 * (1 << lng_bits)).astype(np.int64), 0, (1 << lng_bits) - 1)
+
+    code = np.zeros(len(lat_i), dtype=np.int64)
+    for bit in range(5 * precision):
+        # Even positions (from the most significant end) take longitude bits
+        if bit % 2 == 0:
+            source, remaining = lng_i, lng_bits - 1 - bit // 2
+        else:
+            source, remaining = lat_i, lat_bits - 1 - bit // 2
+        code = (code << 1) | ((source >> remaining) & 1)
+
+    shifts = np.arange(precision - 1, -1, -1, dtype=np.int64) * 5
+    chars = _ALPHABET_ARRAY[(code[:, None] >> shifts) & 0x1F]
+    return np.ascontiguousarray(chars).view(f"<U{precision}").ravel()
+
+
+def geohash(lat: float, lng: float, precision: int) -> str:
+    return str(geohash_cells(np.array([lat]), np.array([lng]), precision)[0])
+
+
+def cell_bounds(cell: str) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of a geohash cell"""
+    south, north, west, east = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for char in cell:
+        value = _ALPHABET_INDEX[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                middle = (west + east) / 2
+                west, east = (middle, east) if bit else (west, middle)
+            else:
+                middle = (south + north) / 2
+                south, north = (middle, north) if bit else (south, middle)
+            even = not even
+    return south, west, north, east
+
+
+def viewport_cell_count(south: float, west: float, north: float, east: float, precision: int) -> int:
+    height, width = cell_size(precision)
+    return (int((north - south) / height) + 2) * (int((east - west) / width) + 2)
+
+
+def viewport_cells(south: float, west: float, north: float, east: float, precision: int) -> List[str]:
+    """All cells intersecting the viewport"""
+    height, width = cell_size(precision)
+    # Samples no further apart than one cell hit every intersecting cell
+    lats = np.append(np.arange(south, north, height), north)
+    lngs = np.append(np.arange(west, east, width), east)
+    grid_lat, grid_lng = np.meshgrid(lats, lngs, indexing="ij")
+    return np.unique(geohash_cells(grid_lat.ravel(), grid_lng.ravel(), precision)).tolist()
+
+
+def pick_precision(south: float, west: float, north: float, east: float,
+                   precisions: Sequence[int], max_cells: int) -> Optional[int]:
+    """Finest maintained precision that keeps the viewport under max_cells"""
+    for precision in sorted(precisions, reverse=True):
+        if viewport_cell_count(south, west, north, east, precision) <= max_cells:
+            return precision
+    return None
+
+
+def day_bucket(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+
+def event_increments(location: Dict[str, Any], ts: datetime, kind: str, priority: Optional[str],
+                     precisions: Iterable[int], count: int = 1) -> List[Tuple[Dict[str, Any], Dict[str, int]]]:
+    """(tile key, $inc) pairs for one reported/completed incident (count=-1 takes it back)"""
+    lat, lng = float(location["lat"]), float(location["lng"])
+    inc = {kind: count}
+    if kind == "reported" and priority in PRIORITIES:
+        inc[priority] = count
+    day = day_bucket(ts)
+    return [({"precision": p, "cell": geohash(lat, lng, p), "day": day}, inc) for p in precisions]
+
+
+def aggregate_tiles(lat: Sequence[float], lng: Sequence[float], ts: Sequence[datetime],
+                    kinds: Sequence[str], priorities: Sequence[Optional[str]],
+                    precisions: Iterable[int]) -> List[Dict[str, Any]]:
+    """Complete tile documents from event columns (used for rebuilds)"""
+    if not len(lat):
+        return []
+    lat_a, lng_a = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+    days = np.array(ts, dtype="datetime64[D]").astype(str)
+    kinds_a, priorities_a = np.asarray(kinds), np.asarray(priorities, dtype=object)
+    weights = {
+        "reported": kinds_a == "reported",
+        "completed": kinds_a == "completed",
+        **{p: (kinds_a == "reported") & (priorities_a == p) for p in PRIORITIES},
+    }
+
+    tiles = []
+    for precision in precisions:
+        keys = np.char.add(np.char.add(geohash_cells(lat_a, lng_a, precision), "|"), days)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = {name: np.bincount(inverse, weights=mask, minlength=len(unique)).astype(int)
+                  for name, mask in weights.items()}
+        for i, key in enumerate(unique.tolist()):
+            cell, day = key.split("|")
+            tile = {"precision": precision, "cell": cell, "day": day}
+            tile.update({name: int(counts[name][i]) for name in TILE_COUNTERS})
+            tiles.append(tile)
+    return tiles
@@ -0,0 +1,112 @@
+# 🖼️ Bildverarbeitung für Einsatzfotos
+# Hochgeladene Fotos werden in einem Prozesspool (außerhalb der Event-Loop) dekodiert,
+# nach EXIF-Ausrichtung gedreht, ohne Metadaten (GPS, Kamera) neu kodiert und in zwei
+# Varianten erzeugt: "full" (lange Kante begrenzt) und "thumb" für Listen. Gleiche
+# Originale werden über ihren SHA-256 erkannt und nur einmal verarbeitet.
+
+import asyncio
+import io
+import math
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+IMAGE_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+IMAGE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_image_key(value: str) -> bool:
+    """Blob keys are SHA-256 hex digests; anything else is an uploaded image"""
+    return bool(IMAGE_KEY_PATTERN.match(value))
+
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    pil_format, _ = IMAGE_FORMATS[image_format]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    # No exif/icc arguments: metadata of the original is not written
+    if pil_format == "WEBP":
+        image.save(out, pil_format, quality=quality, method=4)
+    else:
+        image.save(out, pil_format, quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _fit(image: Image.Image, max_px: int) -> Image.Image:
+    if max(image.size) <= max_px:
+        return image
+    resized = image.copy()
+    resized.thumbnail((max_px, max_px), Image.Resampling.LANCZOS)
+    return resized
+
+
+def process_image(data: bytes, image_format: str, full_max_px: int, thumb_max_px: int,
+                  quality: int, thumb_quality: int, max_pixels: int) -> Dict[str, Any]:
+    """Full and thumbnail variants of one photo (runs in a worker process)"""
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            # JPEG: let the decoder downscale (by 1/2, 1/4, 1/8) while the long side stays >= full_max_px
+            scale = full_max_px / max(source.size)
+            if scale < 1:
+                source.draft("RGB", (math.ceil(source.width * scale), math.ceil(source.height * scale)))
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except UnidentifiedImageError:
+        raise ValueError("not a supported image format")
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ValueError(f"unreadable image ({e})")
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    full = _fit(image, full_max_px)
+    thumb = _fit(full, thumb_max_px)
+    return {
+        "full": _encode(full, image_format, quality),
+        "thumb": _encode(thumb, image_format, thumb_quality),
+        "content_type": IMAGE_FORMATS[image_format][1],
+        "width": full.width,
+        "height": full.height,
+    }
+
+
+def _ready() -> bool:
+    return True
+
+
+class ImagePipeline:
+    """Transcodes images in a process pool, created on first use"""
+
+    def __init__(self, workers: int = 2, image_format: str = "webp", full_max_px: int = 1600,
+                 thumb_max_px: int = 320, quality: int = 80, thumb_quality: int = 70,
+                 max_pixels: int = 40_000_000):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format {image_format!r}, use one of: {', '.join(IMAGE_FORMATS)}")
+        self.workers = workers
+        self.options = (image_format, full_max_px, thumb_max_px, quality, thumb_quality, max_pixels)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers do not inherit the event loop, sockets or logging threads
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def process(self, data: bytes) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, process_image, data, *self.options)
+
+    async def warm_up(self):
+        """Start the workers (and import Pillow there) before the first upload"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ready) for _ in range(self.workers)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,133 @@
+# 🗃️ Einsatzarchiv
+# Abgeschlossene Einsätze bleiben strukturiert erhalten (incidents_archive), in kompakter
+# Kodierung: kurze Feldnamen, Priorität als Zahl, Koordinaten als [lng, lat], Bilder nur
+# als Blob-Schlüssel. Das Feld `m` (JJJJMM des Abschlusses) führt alle Indexe an, sodass
+# Zeitraumabfragen nur die betroffenen Monatsbereiche der Indexe lesen.
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+PRIORITY_CODES = {"high": 0, "medium": 1, "low": 2}
+PRIORITY_NAMES = {code: name for name, code in PRIORITY_CODES.items()}
+
+# Document field -> archive field
+ARCHIVE_FIELDS = {
+    "id": "_id",
+    "title": "t",
+    "description": "d",
+    "address": "a",
+    "priority": "p",
+    "reported_by": "rb",
+    "assigned_to": "at",
+    "assigned_to_name": "an",
+    "created_at": "ca",
+    "assigned_at": "sa",
+    "version": "v",
+}
+
+ARCHIVE_INDEXES = [
+    [("m", 1), ("xa", 1)],
+    [("m", 1), ("p", 1), ("xa", 1)],
+    [("m", 1), ("at", 1), ("xa", 1)],
+    [("cb", 1), ("xa", 1)],
+]
+
+ANALYTICS_GROUPS = {
+    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$xa"}},
+    "month": "$m",
+    "priority": "$p",
+    "assignee": "$at",
+    "completed_by": "$cb",
+}
+
+
+def month_bucket(ts: datetime) -> int:
+    return ts.year * 100 + ts.month
+
+
+def _seconds_between(start: Any, end: Any) -> Optional[int]:
+    if isinstance(start, datetime) and isinstance(end, datetime):
+        return int((end - start).total_seconds())
+    return None
+
+
+def encode_archived_incident(incident: Dict[str, Any], completed_by: Dict[str, Any], completed_at: datetime,
+                             image_keys: List[str], report_id: Optional[str] = None) -> Dict[str, Any]:
+    """Compact archive document (None values are left out)"""
+    doc = {short: incident.get(field) for field, short in ARCHIVE_FIELDS.items()}
+    doc["p"] = PRIORITY_CODES.get(incident.get("priority"), PRIORITY_CODES["medium"])
+    location = incident.get("location") or {}
+    if "lat" in location and "lng" in location:
+        doc["loc"] = [float(location["lng"]), float(location["lat"])]
+    doc.update({
+        "cb": completed_by["id"],
+        "cn": completed_by["username"],
+        "xa": completed_at,
+        "m": month_bucket(completed_at),
+        # Resolution and response times are stored precomputed for the analytics
+        "dur": _seconds_between(incident.get("created_at"), completed_at),
+        "rsp": _seconds_between(incident.get("created_at"), incident.get("assigned_at")),
+        "img": image_keys,
+        "rid": report_id,
+    })
+    return {key: value for key, value in doc.items() if value is not None and value != []}
+
+
+def decode_archived_incident(doc: Dict[str, Any]) -> Dict[str, Any]:
+    incident = {field: doc.get(short) for field, short in ARCHIVE_FIELDS.items()}
+    incident["priority"] = PRIORITY_NAMES.get(doc.get("p"), "medium")
+    if "loc" in doc:
+        incident["location"] = {"lat": doc["loc"][1], "lng": doc["loc"][0]}
+    incident.update({
+        "status": "closed",
+        "completed_by": doc.get("cb"),
+        "completed_by_name": doc.get("cn"),
+        "completed_at": doc.get("xa"),
+        "resolution_seconds": doc.get("dur"),
+        "response_seconds": doc.get("rsp"),
+        "image_count": len(doc.get("img", [])),
+        "archive_report_id": doc.get("rid"),
+    })
+    return incident
+
+
+def archive_query(start: datetime, end: datetime, priority: Optional[str] = None,
+                  assigned_to: Optional[str] = None) -> Dict[str, Any]:
+    """Filter on completion time [start, end); the month range selects the index partitions"""
+    query: Dict[str, Any] = {
+        "m": {"$gte": month_bucket(start), "$lte": month_bucket(end)},
+        "xa": {"$gte": start, "$lt": end},
+    }
+    if priority is not None:
+        query["p"] = PRIORITY_CODES[priority]
+    if assigned_to is not None:
+        query["at"] = assigned_to
+    return query
+
+
+def analytics_pipeline(query: Dict[str, Any], group_by: str) -> List[Dict[str, Any]]:
+    return [
+        {"$match": query},
+        {"$group": {
+            "_id": ANALYTICS_GROUPS[group_by],
+            "count": {"$sum": 1},
+            "avg_resolution_seconds": {"$avg": "$dur"},
+            "max_resolution_seconds": {"$max": "$dur"},
+            "avg_response_seconds": {"$avg": "$rsp"},
+            "high": {"$sum": {"$cond": [{"$eq": ["$p", PRIORITY_CODES["high"]]}, 1, 0]}},
+            "with_images": {"$sum": {"$cond": [{"$gt": [{"$size": {"$ifNull": ["$img", []]}}, 0]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def analytics_row(row: Dict[str, Any], group_by: str) -> Dict[str, Any]:
+    key = row.pop("_id")
+    if group_by == "priority":
+        key = PRIORITY_NAMES.get(key, key)
+    elif group_by == "month" and isinstance(key, int):
+        key = f"{key // 100:04d}-{key % 100:02d}"
+    for field in ("avg_resolution_seconds", "avg_response_seconds"):
+        if row.get(field) is not None:
+            row[field] = round(row[field])
+    return {group_by: key, **row}
@@ -0,0 +1,152 @@
+# ⏱️ Vorfall-Warteschlange und SLA-Timer
+# Offene (nicht zugewiesene) Vorfälle sortiert nach Priorität und Alter, plus ein
+# Timer-Rad, das beim Überschreiten der SLA-Schwellen Eskalationen auslöst.
+# Beide Strukturen werden inkrementell gepflegt; die Top-N sind ein Listen-Slice.
+
+import bisect
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# Maximale Wartezeit bis zur Zuweisung (Sekunden)
+SLA_SECONDS = {
+    "high": 10 * 60,
+    "medium": 30 * 60,
+    "low": 2 * 60 * 60,
+}
+
+# Vorwarnung bei diesem Anteil der SLA-Zeit
+SLA_WARNING_RATIO = 0.75
+
+
+def _rank(priority: str) -> int:
+    return PRIORITY_RANK.get(priority, PRIORITY_RANK["medium"])
+
+
+def sla_seconds(priority: str) -> int:
+    return SLA_SECONDS.get(priority, SLA_SECONDS["medium"])
+
+
+class QueueEntry:
+    __slots__ = ("id", "priority", "created_at", "created_ts", "title", "reported_by", "version", "generation")
+
+    def __init__(self, incident: Dict[str, Any], generation: int):
+        self.id = incident["id"]
+        self.priority = incident.get("priority", "medium")
+        self.created_at = incident["created_at"]
+        self.created_ts = self.created_at.timestamp()
+        self.title = incident.get("title", "")
+        self.reported_by = incident.get("reported_by")
+        self.version = incident.get("version", 1)
+        self.generation = generation
+
+    @property
+    def key(self) -> Tuple[int, float, str]:
+        return (_rank(self.priority), self.created_ts, self.id)
+
+    def as_incident(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "priority": self.priority,
+            "status": "open",
+            "version": self.version,
+            "reported_by": self.reported_by,
+        }
+
+
+class TimerWheel:
+    """Hashed timing wheel; scheduling and cancelling are O(1), a tick touches one slot"""
+
+    def __init__(self, slots: int = 3600, tick_seconds: float = 1.0):
+        self.slots: List[List[list]] = [[] for _ in range(slots)]
+        self.tick_seconds = tick_seconds
+        self.position = 0
+        self.current_tick = 0
+
+    def schedule(self, delay_seconds: float, payload: Any):
+        ticks = max(1, int(delay_seconds / self.tick_seconds + 0.999))
+        slot = (self.position + ticks) % len(self.slots)
+        rounds = (ticks - 1) // len(self.slots)
+        self.slots[slot].append([rounds, payload])
+
+    def advance(self) -> List[Any]:
+        """Move one tick forward and return the payloads that are due"""
+        self.position = (self.position + 1) % len(self.slots)
+        self.current_tick += 1
+        slot = self.slots[self.position]
+        if not slot:
+            return []
+        due, pending = [], []
+        for timer in slot:
+            if timer[0] == 0:
+                due.append(timer[1])
+            else:
+                timer[0] -= 1
+                pending.append(timer)
+        self.slots[self.position] = pending
+        return due
+
+
+class IncidentQueue:
+    """Open incidents ordered by (priority, age) with SLA escalation timers"""
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.entries: Dict[str, QueueEntry] = {}
+        self.order: List[Tuple[int, float, str]] = []
+        self.wheel = TimerWheel(tick_seconds=tick_seconds)
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def upsert(self, incident: Dict[str, Any], now: Optional[datetime] = None):
+        self.remove(incident["id"])
+        self.generation += 1
+        entry = QueueEntry(incident, self.generation)
+        self.entries[entry.id] = entry
+        bisect.insort(self.order, entry.key)
+
+        # Timers for warning and breach; stale timers are ignored via the generation
+        age = ((now or datetime.utcnow()) - entry.created_at).total_seconds()
+        limit = sla_seconds(entry.priority)
+        for level, threshold in (("warning", limit * SLA_WARNING_RATIO), ("breach", limit)):
+            if age < threshold:
+                self.wheel.schedule(threshold - age, (entry.id, entry.generation, level))
+
+    def remove(self, incident_id: str):
+        entry = self.entries.pop(incident_id, None)
+        if entry is None:
+            return
+        key = entry.key
+        index = bisect.bisect_left(self.order, key)
+        if index < len(self.order) and self.order[index] == key:
+            del self.order[index]
+
+    def top(self, limit: int, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        now = now or datetime.utcnow()
+        result = []
+        for key in self.order[:limit]:
+            entry = self.entries[key[2]]
+            age = (now - entry.created_at).total_seconds()
+            limit_seconds = sla_seconds(entry.priority)
+            result.append({
+                "id": entry.id,
+                "title": entry.title,
+                "priority": entry.priority,
+                "created_at": entry.created_at,
+                "age_seconds": int(age),
+                "sla_seconds": limit_seconds,
+                "sla_remaining_seconds": int(limit_seconds - age),
+                "overdue": age >= limit_seconds,
+            })
+        return result
+
+    def tick(self) -> List[Tuple[QueueEntry, str]]:
+        """Advance the timer wheel by one tick and return (entry, level) escalations"""
+        escalations = []
+        for incident_id, generation, level in self.wheel.advance():
+            entry = self.entries.get(incident_id)
+            if entry is not None and entry.generation == generation:
+                escalations.append((entry, level))
+        return escalations
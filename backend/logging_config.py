@@ -0,0 +1,185 @@
+# 📝 Strukturiertes, asynchrones Logging
+# Log-Records werden im aufrufenden Kontext mit Request-/Trace-ID angereichert und
+# über eine begrenzte Queue an einen Hintergrund-Thread übergeben, der sie als
+# JSON schreibt. Der Event-Loop blockiert damit nie auf stdout.
+#
+# Umgebungsvariablen:
+#   LOG_LEVEL=INFO                                    Root-Level
+#   LOG_LEVELS=server=INFO,engineio=WARNING           Level pro Modul
+#   LOG_SAMPLING=server.socket=0.1                    Anteil geloggter Records < WARNING
+#   LOG_FORMAT=json|text
+#   LOG_QUEUE_SIZE=10000                              volle Queue -> Records werden verworfen
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from typing import Dict, Optional
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+trace_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+
+# Attribute eines LogRecord, die nicht als zusätzliche Felder ausgegeben werden
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    mapping = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, setting = item.partition("=")
+        mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class ContextFilter(logging.Filter):
+    """Attach request and trace ids; runs in the caller's context before queueing"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records below WARNING for configured logger prefixes"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and key not in ("request_id", "trace_id") and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks: when the queue is full the record is dropped and counted"""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (cheap) but leave formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """Install the queue-based logging pipeline (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_format = os.getenv("LOG_FORMAT", "json").lower()
+    if log_format == "json":
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter({
+        name: float(rate) for name, rate in _parse_mapping(os.getenv("LOG_SAMPLING", "")).items()
+    }))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_mapping(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestContextMiddleware:
+    """ASGI middleware: X-Request-ID / W3C traceparent in, X-Request-ID out"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        trace_id = None
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1").split("-")
+        if len(traceparent) == 4 and len(traceparent[1]) == 32:
+            trace_id = traceparent[1]
+
+        request_token = request_id_var.set(request_id)
+        trace_token = trace_id_var.set(trace_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(request_token)
+            trace_id_var.reset(trace_token)
@@ -0,0 +1,318 @@
+# 📈 Metriken und Profiling
+# Latenz-Histogramme pro Route, MongoDB-Kommandos pro Request, Socket.IO-Emits und
+# Event-Loop-Verzögerung im Prometheus-Textformat. Optionales cProfile pro Request.
+
+import asyncio
+import cProfile
+import contextvars
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# cProfile sees the whole thread, not one request: everything the event loop runs
+# while a profiled request is in flight (other requests, sockets, background loops)
+# shows up in its profile. Meant for a single worker in a quiet environment; only one
+# request is profiled at a time, further X-Profile requests run unprofiled.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_HEADER = b"x-profile"
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "/tmp/stadtwache-profiles"))
+
+_LabelKey = Tuple[str, ...]
+INF_LABEL = 'le="+Inf"'
+
+
+def _format_labels(names: Tuple[str, ...], values: _LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[_LabelKey, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return "\n".join(lines)
+
+
+class Gauge(Counter):
+    def set(self, value: float, *label_values: str):
+        with self.lock:
+            self.values[label_values] = value
+
+    def render(self) -> str:
+        return super().render().replace(f"# TYPE {self.name} counter", f"# TYPE {self.name} gauge")
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.series: Dict[_LabelKey, list] = {}  # key -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for index, bound in enumerate(self.buckets):
+                cumulative += series[index]
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, INF_LABEL)} {series[-1]}")
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return "\n".join(lines)
+
+
+# Registry
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+HTTP_REQUEST_DB_COMMANDS = Histogram(
+    "http_request_db_commands", "MongoDB commands issued per request", ("route",), COUNT_BUCKETS)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in MongoDB commands per request", ("route",))
+DB_COMMAND_SECONDS = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command",))
+DB_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ("command",))
+SOCKETIO_EMITS = Counter(
+    "socketio_emits_total", "Socket.IO packets encoded by event", ("event",))
+SOCKETIO_EMIT_BYTES = Histogram(
+    "socketio_emit_payload_bytes", "Encoded Socket.IO payload size by event", ("event",), SIZE_BUCKETS)
+RATE_LIMITED = Counter(
+    "rate_limited_total", "Requests and socket events rejected by a rate limit", ("limit",))
+LOCATION_FLUSH_SKIPS = Counter(
+    "location_flush_skipped_clients_total", "Location flushes skipped because a client's send queue was full")
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Delay of a periodic event loop callback")
+EVENT_LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds", "Most recently measured event loop lag")
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongo_pool_checked_out_connections", "Connections currently checked out of the Mongo pool")
+MONGO_POOL_WAITING = Gauge(
+    "mongo_pool_waiting_requests", "Operations waiting for a Mongo pool connection")
+
+REGISTRY = [
+    HTTP_REQUEST_SECONDS, HTTP_REQUEST_DB_COMMANDS, HTTP_REQUEST_DB_SECONDS,
+    DB_COMMAND_SECONDS, DB_COMMAND_FAILURES, SOCKETIO_EMITS, SOCKETIO_EMIT_BYTES,
+    RATE_LIMITED, LOCATION_FLUSH_SKIPS, EVENT_LOOP_LAG, EVENT_LOOP_LAG_LAST,
+    MONGO_POOL_CHECKED_OUT, MONGO_POOL_WAITING,
+]
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Per-request DB statistics. Motor copies the context into its executor threads,
+# so the command listener sees the stats object of the request that issued the command.
+class RequestStats:
+    __slots__ = ("db_commands", "db_seconds")
+
+    def __init__(self):
+        self.db_commands = 0
+        self.db_seconds = 0.0
+
+
+current_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "current_request_stats", default=None)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self.started_at: Dict[int, float] = {}
+
+    def started(self, event):
+        self.started_at[event.request_id] = time.perf_counter()
+
+    def _finish(self, event) -> float:
+        started = self.started_at.pop(event.request_id, None)
+        duration = time.perf_counter() - started if started is not None else event.duration_micros / 1e6
+        DB_COMMAND_SECONDS.observe(duration, event.command_name)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.db_commands += 1
+            stats.db_seconds += duration
+        return duration
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+        DB_COMMAND_FAILURES.inc(event.command_name)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Checked-out and waiting connections over all pools (one pool per server)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.max_size = 100
+        self.checked_out = 0
+        self.waiting = 0
+
+    def saturation(self) -> float:
+        return self.checked_out / self.max_size if self.max_size else 0.0
+
+    def _update(self, checked_out: int = 0, waiting: int = 0):
+        with self.lock:
+            self.checked_out = max(0, self.checked_out + checked_out)
+            self.waiting = max(0, self.waiting + waiting)
+        MONGO_POOL_CHECKED_OUT.set(self.checked_out)
+        MONGO_POOL_WAITING.set(self.waiting)
+
+    def pool_created(self, event):
+        self.max_size = event.options.get("maxPoolSize", self.max_size) or self.max_size
+
+    def connection_check_out_started(self, event):
+        self._update(waiting=1)
+
+    def connection_checked_out(self, event):
+        self._update(checked_out=1, waiting=-1)
+
+    def connection_check_out_failed(self, event):
+        self._update(waiting=-1)
+
+    def connection_checked_in(self, event):
+        self._update(checked_out=-1)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+
+def event_loop_lag() -> float:
+    return EVENT_LOOP_LAG_LAST.values.get((), 0.0)
+
+
+def observe_socketio_packet(data, size: int):
+    """Called with every encoded Socket.IO packet payload"""
+    if isinstance(data, list) and data and isinstance(data[0], str):
+        event = data[0]
+    else:
+        event = "_control"
+    SOCKETIO_EMITS.inc(event)
+    SOCKETIO_EMIT_BYTES.observe(size, event)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB usage per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self.profiling = False  # a profiled request is in flight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_holder = {"status": 500}
+        start = time.perf_counter()
+
+        profiler = None
+        if PROFILING_ENABLED and not self.profiling and \
+                any(name == PROFILE_HEADER and value == b"1" for name, value in scope["headers"]):
+            profiler = cProfile.Profile()
+            self.profiling = True
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing",
+                                f"db;desc=\"{stats.db_commands} cmds\";dur={stats.db_seconds * 1000:.1f}, "
+                                f"app;dur={elapsed_ms:.1f}".encode()))
+                if profiler is not None:
+                    headers.append((b"x-profile-file", profile_path(scope).name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.profiling = False
+                PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(profile_path(scope)))
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route_path,
+                                         str(status_holder["status"]))
+            HTTP_REQUEST_DB_COMMANDS.observe(stats.db_commands, route_path)
+            HTTP_REQUEST_DB_SECONDS.observe(stats.db_seconds, route_path)
+
+
+def profile_path(scope) -> Path:
+    if "profile_path" not in scope:
+        slug = scope["path"].strip("/").replace("/", "_") or "root"
+        scope["profile_path"] = PROFILE_DIR / f"{int(time.time() * 1000)}-{scope['method']}-{slug}.prof"
+    return scope["profile_path"]
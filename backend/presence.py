@@ -0,0 +1,144 @@
+# 🟢 Anwesenheit (Online-Status)
+# Kompakte Präsenztabelle im Speicher: ein __slots__-Eintrag pro Benutzer mit
+# monotonem Zeitstempel und interniertem Namen, dazu die Zuordnung Socket -> Benutzer.
+# Die serialisierten Sichten (Roster-Felder, Online-Liste) werden pro Tick einmal
+# gebaut und von allen Lesern geteilt.
+
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PRESENCE_TICK_SECONDS = 1.0
+
+OFFLINE_FIELDS = {"is_online": False, "last_seen": None, "online_status": "Offline"}
+
+
+class PresenceEntry:
+    __slots__ = ("username", "last_seen", "sockets")
+
+    def __init__(self, username: str, last_seen: float):
+        self.username = username
+        self.last_seen = last_seen  # time.monotonic()
+        self.sockets = 0
+
+
+class PresenceTable:
+    """Online users (by heartbeat or socket) and connected sockets"""
+
+    def __init__(self, offline_after: float, tick: float = PRESENCE_TICK_SECONDS):
+        self.offline_after = offline_after
+        self.tick = tick
+        self.entries: Dict[str, PresenceEntry] = {}
+        self.socket_users: Dict[str, str] = {}
+        self.version = 0  # bumped when users appear or disappear
+        self._cache_key: Optional[Tuple[int, int]] = None
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._online: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.entries
+
+    def touch(self, user_id: str, username: str) -> bool:
+        """Mark the user as seen now; True if they were not online before"""
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            entry.last_seen = time.monotonic()
+            return False
+        self.entries[user_id] = PresenceEntry(sys.intern(username), time.monotonic())
+        self.version += 1
+        return True
+
+    def connect(self, sid: str, user_id: str, username: str) -> bool:
+        """Register a socket; True if it is the user's first (the user came online)"""
+        self.socket_users[sid] = user_id
+        first = user_id not in self.entries
+        self.touch(user_id, username)
+        self.entries[user_id].sockets += 1
+        return first
+
+    def disconnect(self, sid: str) -> Tuple[Optional[str], bool]:
+        """(user_id, went_offline); users stay online while another socket is connected"""
+        user_id = self.socket_users.pop(sid, None)
+        if user_id is None:
+            return None, False
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            entry.sockets -= 1
+            if entry.sockets > 0:
+                return user_id, False
+        self._drop(user_id)
+        return user_id, True
+
+    def remove(self, user_id: str) -> bool:
+        """Take a heartbeat-only user offline; users with connected sockets stay until disconnect"""
+        entry = self.entries.get(user_id)
+        if entry is None or entry.sockets > 0:
+            return False
+        self._drop(user_id)
+        return True
+
+    def _drop(self, user_id: str):
+        if self.entries.pop(user_id, None) is not None:
+            self.version += 1
+
+    def user_for_socket(self, sid: str) -> Optional[str]:
+        return self.socket_users.get(sid)
+
+    def sockets(self) -> Iterator[str]:
+        return iter(list(self.socket_users))
+
+    def expire(self) -> List[str]:
+        """Drop users without sockets not seen within offline_after and return their ids"""
+        cutoff = time.monotonic() - self.offline_after
+        expired = [user_id for user_id, entry in self.entries.items()
+                   if entry.last_seen < cutoff and not entry.sockets]
+        for user_id in expired:
+            self._drop(user_id)
+        return expired
+
+    def clear(self):
+        self.entries.clear()
+        self.socket_users.clear()
+        self.version += 1
+
+    def _refresh(self):
+        now = time.monotonic()
+        key = (int(now / self.tick), self.version)
+        if key == self._cache_key:
+            return
+        # Wall clock of a monotonic timestamp = wall now - elapsed
+        wall_offset = time.time() - now
+        fields, online = {}, []
+        for user_id, entry in self.entries.items():
+            age = now - entry.last_seen
+            last_seen = _iso_utc(entry.last_seen + wall_offset)
+            is_online = entry.sockets > 0 or age <= self.offline_after
+            minutes = int(age / 60)
+            fields[user_id] = {
+                "is_online": is_online,
+                "last_seen": last_seen,
+                "online_status": "Online" if is_online else f"Vor {minutes} Min."
+            }
+            if is_online:
+                online.append({"user_id": user_id, "username": entry.username,
+                               "last_seen": last_seen, "minutes_ago": minutes})
+        self._fields, self._online, self._cache_key = fields, online, key
+
+    def fields(self) -> Dict[str, Dict[str, Any]]:
+        """Roster presence fields per online user (shared, do not modify)"""
+        self._refresh()
+        return self._fields
+
+    def online(self) -> List[Dict[str, Any]]:
+        """Users seen within offline_after (shared, do not modify)"""
+        self._refresh()
+        return self._online
+
+
+def _iso_utc(epoch: float) -> str:
+    # Naive UTC ISO format like datetime.utcnow().isoformat()
+    seconds = int(epoch)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{int((epoch - seconds) * 1e6):06d}"
@@ -0,0 +1,176 @@
+# 🚦 Rate-Limits und Backpressure
+# Token-Bucket pro Benutzer und Route mit austauschbarem Speicher (im Prozess oder
+# geteilt über MongoDB) sowie ein Verteiler für Standort-Updates, der pro Client nur
+# die jeweils neueste Position sendet und überlastete Clients überspringt.
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+
+class RateLimit:
+    """rate tokens per second, at most burst tokens saved up"""
+    __slots__ = ("rate", "burst")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """'2/10' -> 2 per second, burst 10"""
+        rate, _, burst = value.partition("/")
+        return cls(float(rate), float(burst or rate))
+
+
+class BucketStore(ABC):
+    """Storage backend for token buckets"""
+
+    @abstractmethod
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        """Consume cost tokens; returns 0 if allowed, otherwise seconds until enough tokens exist"""
+
+
+class InMemoryBucketStore(BucketStore):
+    """Buckets in process memory (single worker)"""
+
+    PRUNE_EVERY = 4096
+
+    def __init__(self):
+        self.buckets: Dict[str, list] = {}  # key -> [tokens, monotonic ts, seconds until full]
+        self.calls = 0
+
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [limit.burst, now, 0.0]
+        else:
+            bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            bucket[2] = (limit.burst - bucket[0]) / limit.rate
+            retry_after = 0.0
+        else:
+            retry_after = (cost - bucket[0]) / limit.rate
+
+        # After the bucket is charged, so the current one is never pruned mid-take
+        self.calls += 1
+        if self.calls % self.PRUNE_EVERY == 0:
+            self.prune(now)
+        return retry_after
+
+    def prune(self, now: Optional[float] = None):
+        """Drop buckets that have refilled completely; they behave like new ones"""
+        now = time.monotonic() if now is None else now
+        for key in [key for key, bucket in self.buckets.items() if now - bucket[1] >= bucket[2]]:
+            del self.buckets[key]
+
+
+class MongoBucketStore(BucketStore):
+    """Buckets shared by several app instances; one atomic findAndModify per check"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [limit.burst, {"$add": [
+                        {"$ifNull": ["$tokens", limit.burst]}, {"$multiply": [elapsed, limit.rate]}
+                    ]}]},
+                    "updated_at": now,
+                }},
+                # Both fields see the refilled value from the previous stage
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", cost]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", cost]}, {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=limit.burst / limit.rate),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if bucket["allowed"]:
+            return 0.0
+        return (cost - bucket["tokens"]) / limit.rate
+
+
+class RateLimiter:
+    """Named limits applied per user"""
+
+    def __init__(self, limits: Dict[str, RateLimit], store: BucketStore):
+        self.limits = limits
+        self.store = store
+
+    async def hit(self, name: str, user_id: str, cost: float = 1.0) -> float:
+        """0 if allowed, otherwise the suggested retry delay in seconds"""
+        limit = self.limits.get(name)
+        if limit is None:
+            return 0.0
+        return await self.store.take(f"{name}:{user_id}", limit, cost)
+
+
+class LocationFanout:
+    """Coalescing broadcast of location updates
+
+    Every ping replaces the user's previous pending position. A flush sends each
+    client the positions that changed since its last flush; clients with a full
+    send queue are skipped and catch up later with only the latest positions.
+    """
+
+    def __init__(self):
+        self.positions: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()  # user_id -> (version, payload)
+        self.version = 0
+        self.delivered: Dict[str, int] = {}  # sid -> version already sent
+
+    def publish(self, user_id: str, payload: Any):
+        """Store the newest position of a user, replacing one that was not flushed yet"""
+        self.version += 1
+        self.positions[user_id] = (self.version, payload)
+        self.positions.move_to_end(user_id)
+
+    def add_client(self, sid: str):
+        # New clients start with live updates; current positions come from REST
+        self.delivered[sid] = self.version
+
+    def remove_client(self, sid: str):
+        self.delivered.pop(sid, None)
+
+    def remove_user(self, user_id: str):
+        self.positions.pop(user_id, None)
+
+    def since(self, version: int) -> List[Any]:
+        pending = []
+        for user_id in reversed(self.positions):
+            entry_version, payload = self.positions[user_id]
+            if entry_version <= version:
+                break
+            pending.append(payload)
+        pending.reverse()
+        return pending
+
+    def batches(self, ready_sids: Iterable[str]) -> List[Tuple[List[Any], List[str]]]:
+        """(payloads, sids) to emit now; clients at the same version share one batch"""
+        groups: Dict[int, List[str]] = {}
+        for sid in ready_sids:
+            version = self.delivered.setdefault(sid, self.version)
+            if version < self.version:
+                groups.setdefault(version, []).append(sid)
+
+        result = []
+        for version, sids in groups.items():
+            result.append((self.since(version), sids))
+            for sid in sids:
+                self.delivered[sid] = self.version
+        return result
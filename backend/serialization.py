@@ -0,0 +1,78 @@
+# ⚡ Schnelle JSON-Serialisierung
+# Vertrauenswürdige Datenbank-Dokumente direkt als orjson-Response ausliefern,
+# ohne sie pro Element erneut durch Pydantic zu validieren.
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Type
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel
+from starlette.responses import Response
+
+# datetime, date, UUID und dict/list kodiert orjson nativ in C.
+# Nur die restlichen Typen aus MongoDB laufen über diesen Fallback.
+_FALLBACK_ENCODERS = {
+    ObjectId: str,
+    Decimal: float,
+    set: list,
+    frozenset: list,
+    bytes: lambda value: value.decode("utf-8", errors="replace"),
+}
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _encode_fallback(obj: Any) -> Any:
+    encoder = _FALLBACK_ENCODERS.get(type(obj))
+    if encoder is None:
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+    return encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes using orjson"""
+    return orjson.dumps(content, default=_encode_fallback, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by orjson without response_model validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """MongoDB projection containing only the fields declared on the model"""
+    projection = {"_id": 0}
+    projection.update({name: 1 for name in model.model_fields})
+    return projection
+
+
+def model_defaults(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Static default values of a model (fields with default_factory are skipped)"""
+    return {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
+
+
+def trusted_docs(docs: Iterable[Dict[str, Any]], defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fill missing defaults into projected database documents"""
+    if not defaults:
+        return list(docs)
+    return [{**defaults, **doc} for doc in docs]
+
+
+class SocketJSON:
+    """json-module replacement for python-socketio packets (datetime/UUID aware)"""
+
+    @staticmethod
+    def dumps(obj: Any, *args, **kwargs) -> str:
+        return dumps(obj).decode("utf-8")
+
+    @staticmethod
+    def loads(data: Any, *args, **kwargs) -> Any:
+        return orjson.loads(data)
@@ -2,68 +2,153 @@ from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, OperationFailure
 import socketio
 import os
+import time
+import asyncio
+import functools
 import logging
 from pathlib import Path
+from urllib.parse import parse_qs
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 import uuid
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import hashlib
+import math
 import secrets
+from blob_store import GridFSBlobStore, S3BlobStore, content_key, decode_base64_image
+from db_snapshots import create_snapshot, delete_snapshot, drop_collections, list_snapshots, restore_snapshot, valid_snapshot_name
+from dispatch import DispatchEngine
+from export import EXPORT_FORMATS, chain_cursors, encode_rows, export_filename, media_type
+from fixtures import FIXTURE_SETS
+from health import HealthMonitor
+from heatmap import TILE_COUNTERS, aggregate_tiles, cell_bounds, day_bucket, event_increments, pick_precision, viewport_cells
+from images import ImagePipeline, is_image_key
+from incident_archive import (ANALYTICS_GROUPS, ARCHIVE_INDEXES, PRIORITY_CODES, PRIORITY_NAMES, analytics_pipeline,
+                              analytics_row, archive_query, decode_archived_incident, encode_archived_incident)
+from incident_queue import IncidentQueue, sla_seconds
+from logging_config import RequestContextMiddleware, setup_logging, shutdown_logging
+from metrics import (LOCATION_FLUSH_SKIPS, RATE_LIMITED, MetricsMiddleware, MongoCommandMetrics, MongoPoolMetrics,
+                     event_loop_lag, monitor_event_loop_lag, observe_socketio_packet, render_metrics)
+from presence import OFFLINE_FIELDS, PresenceTable
+from rate_limit import InMemoryBucketStore, LocationFanout, MongoBucketStore, RateLimit, RateLimiter
+from serialization import FastJSONResponse, SocketJSON, model_projection, model_defaults, trusted_docs
+from shift_reports import (SHIFTS, PatrolDistance, build_timeline, last_finished_shift, render_report, shift_at,
+                           shift_key, shift_window)
+from tenants import (Tenant, TenantLocal, TenantMiddleware, TenantProxy, TenantQuota, TenantRegistry, current_tenant,
+                     requested_tenant, use_tenant)
+from tracks import TRACK_ENCODINGS, build_track
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Logging is configured when the app starts (queue-based, structured; see logging_config.py)
+logger = logging.getLogger(__name__)
+socket_logger = logging.getLogger(f"{__name__}.socket")
+
 # Database connection - Use environment variable or fallback
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/stadtwache_db")
 DB_NAME = os.getenv("DB_NAME", "stadtwache_db")
 
-# Handle both local and cloud MongoDB URLs
-if MONGO_URL.startswith("mongodb://localhost") or MONGO_URL.startswith("mongodb://127.0.0.1"):
-    # Local development
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[DB_NAME]
-    print(f"🔗 Connected to local MongoDB: {MONGO_URL}")
-else:
-    # Production/Cloud MongoDB
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[DB_NAME]  
-    print(f"🔗 Connected to cloud MongoDB: {MONGO_URL[:20]}...")
+# A worker that cannot reach Mongo within this time fails startup instead of serving errors
+MONGO_STARTUP_TIMEOUT = float(os.getenv("MONGO_STARTUP_TIMEOUT", "10"))
+
+# Tenants (several units on one deployment), each with its own database on the shared client.
+# DB_NAME belongs to the default tenant; further tenants e.g. TENANTS="koeln,bonn=stadtwache_bonn"
+# (database defaults to <DB_NAME>_<tenant>)
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+tenants = TenantRegistry(Tenant(DEFAULT_TENANT, DB_NAME))
+for _entry in filter(None, os.getenv("TENANTS", "").split(",")):
+    _tenant, _, _db_name = _entry.partition("=")
+    tenants.add(Tenant(_tenant.strip(), _db_name.strip() or f"{DB_NAME}_{_tenant.strip()}"))
+# Quotas per tenant, e.g. TENANT_QUOTAS="koeln=users:500|sockets:400|requests:50/200;bonn=users:100"
+for _entry in filter(None, os.getenv("TENANT_QUOTAS", "").split(";")):
+    _tenant, _, _quota = _entry.partition("=")
+    if _tenant.strip() not in tenants:
+        raise ValueError(f"TENANT_QUOTAS: unknown tenant {_tenant.strip()!r}")
+    tenants.get(_tenant.strip()).quota = TenantQuota.parse(_quota)
+
+# Created in the app lifespan (connect_database) or injected with set_database (tests, benchmark).
+# `db` is the database of the current tenant (see tenants.py).
+client: Optional[AsyncIOMotorClient] = None
+tenant_databases = TenantLocal(tenants, lambda: client[tenants.current().db_name])
+db = TenantProxy(tenant_databases.current)
+mongo_pool_metrics = MongoPoolMetrics()
+
+def connect_database():
+    """Create the Motor client; no I/O happens until the first command"""
+    mongo = AsyncIOMotorClient(
+        MONGO_URL,
+        event_listeners=[MongoCommandMetrics(), mongo_pool_metrics],
+        serverSelectionTimeoutMS=int(MONGO_STARTUP_TIMEOUT * 1000)
+    )
+    # Handle both local and cloud MongoDB URLs
+    if MONGO_URL.startswith("mongodb://localhost") or MONGO_URL.startswith("mongodb://127.0.0.1"):
+        logger.info(f"🔗 Using local MongoDB: {MONGO_URL}")
+    else:
+        logger.info(f"🔗 Using cloud MongoDB: {MONGO_URL[:20]}...")
+    set_database(mongo, mongo[DB_NAME])
+
+def set_database(mongo_client, database):
+    """Bind the app and everything that holds a collection to a client (database of the default tenant)"""
+    global client
+    client = mongo_client
+    tenant_databases.clear()
+    tenant_databases.set(database, tenants.default)
+    blob_stores.clear()
+    rate_limiter.store = create_rate_limit_store()
 
 # Test connection
-async def test_db_connection():
+async def test_db_connection() -> bool:
     try:
-        await client.admin.command('ping')
-        print("✅ MongoDB connection successful!")
+        await asyncio.wait_for(client.admin.command('ping'), MONGO_STARTUP_TIMEOUT)
+        logger.info("✅ MongoDB connection successful!")
+        return True
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
+        logger.error(f"❌ MongoDB connection failed: {e!r}")
+        return False
 
 # Security
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+@lru_cache(maxsize=None)
+def password_context() -> CryptContext:
+    # Built on first use, not at import
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 # Socket.IO server
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+class InstrumentedSocketJSON(SocketJSON):
+    """Counts emitted events and payload sizes (packets are encoded once per emit)"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        encoded = SocketJSON.dumps(obj)
+        observe_socketio_packet(obj, len(encoded))
+        return encoded
 
-# Online users tracking
-online_users = {}  # {user_id: {"last_seen": datetime, "socket_id": str, "username": str}}
-user_sockets = {}  # {socket_id: user_id}
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*', json=InstrumentedSocketJSON)
 
-# Create FastAPI app
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+# Online users tracking per tenant: users seen within PRESENCE_OFFLINE_AFTER (heartbeat or socket)
+PRESENCE_OFFLINE_AFTER = timedelta(minutes=2)
+presence_tables = TenantLocal(tenants, lambda: PresenceTable(PRESENCE_OFFLINE_AFTER.total_seconds()))
+presence = TenantProxy(presence_tables.current)
+socket_tenants: Dict[str, str] = {}  # sid -> tenant
 
-# Wrap FastAPI app with Socket.IO
-socket_app = socketio.ASGIApp(sio, app)
+# API routes (the app itself is built by create_app)
+api_router = APIRouter(prefix="/api")
 
 # User roles
 class UserRole:
@@ -127,7 +212,11 @@ class Incident(BaseModel):
     reported_by: str  # user_id
     assigned_to: Optional[str] = None
     assigned_to_name: Optional[str] = None
-    images: List[str] = []  # base64 encoded images
+    assigned_at: Optional[datetime] = None
+    images: List[str] = []  # image keys (GET /api/images/{key}), see store_images
+    thumbnails: List[str] = []  # thumbnail keys, same order as images
+    images_pending: int = 0  # uploads still being transcoded, see schedule_incident_images
+    version: int = 1  # incremented on every change, sent with incident events
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -137,7 +226,16 @@ class IncidentCreate(BaseModel):
     priority: str
     location: Dict[str, float]
     address: str
-    images: List[str] = []
+    images: List[str] = []  # base64 encoded photos
+
+class IncidentUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    priority: Optional[str] = None
+    status: Optional[str] = None  # only "open" (reopen); /assign and /complete change it otherwise
+    location: Optional[Dict[str, float]] = None
+    address: Optional[str] = None
+    images: Optional[List[str]] = None  # image keys or base64 photos
 
 class Message(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -145,7 +243,9 @@ class Message(BaseModel):
     sender_id: str
     sender_name: str  # Add sender name field
     recipient_id: Optional[str] = None  # None for group messages
-    channel: str = "general"  # general, emergency, incidents
+    channel: str = "general"  # general, emergency, incidents, direct
+    conversation_id: Optional[str] = None  # set for direct messages
+    seq: Optional[int] = None  # per-channel sequence number (channel messages)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     message_type: str = "text"  # text, location, image
 
@@ -155,27 +255,63 @@ class MessageCreate(BaseModel):
     channel: str = "general"
     message_type: str = "text"
 
+class Conversation(BaseModel):
+    id: str  # dm:<user_id>:<user_id> (sorted)
+    participants: List[str]
+    participant_names: Dict[str, str] = {}
+    last_message: Optional[Dict[str, Any]] = None
+    unread_count: int = 0  # unread messages for the requesting user
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 class LocationUpdate(BaseModel):
     user_id: str
     location: Dict[str, float]
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+# Projections and static defaults for the fast read paths (no per-item model validation)
+USER_PROJECTION = model_projection(User)
+USER_DEFAULTS = model_defaults(User)
+INCIDENT_PROJECTION = model_projection(Incident)
+INCIDENT_DEFAULTS = model_defaults(Incident)
+MESSAGE_PROJECTION = model_projection(Message)
+MESSAGE_DEFAULTS = model_defaults(Message)
+
 # Security functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_context().verify(plain_password, hashed_password)
     except Exception as e:
-        print(f"Password verification error: {e}")
+        logger.warning(f"Password verification error: {e}")
         return False
 
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
-    return pwd_context.hash(password)
+    return password_context().hash(password)
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Query parameters may carry an offset; stored timestamps are naive UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.replace(tzinfo=None) - value.utcoffset()
+
+def decode_token_claims(token: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(user id, tenant) of a valid access token, None otherwise"""
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if not payload.get("sub"):
+        return None
+    # Tokens issued before tenants existed belong to the default tenant
+    return payload["sub"], payload.get("tenant") or tenants.default
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -193,67 +329,367 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    claims = decode_token_claims(credentials.credentials)
+    if claims is None or claims[1] not in tenants:
         raise credentials_exception
+    user_id, tenant_id = claims
+    
+    # The token decides the tenant; an X-Tenant header must not point elsewhere
+    if requested_tenant.get() not in (None, tenant_id):
+        raise HTTPException(status_code=403, detail="Token belongs to another tenant")
+    current_tenant.set(tenant_id)
+    await check_tenant_request_quota()
     
     user = await db.users.find_one({"id": user_id})
     if user is None:
         raise credentials_exception
     return User(**user)
 
+def tenant_from_token_only(path: str) -> bool:
+    """Admin routes (reset, snapshots, exports, ...) ignore X-Tenant and run in the token's tenant"""
+    return path.startswith("/api/admin/") and path != "/api/admin/create-first-user"
+
+# Tenant jobs and quotas
+async def for_each_tenant(job: Callable[[], Awaitable[Any]], label: str) -> Dict[str, Any]:
+    """Run job once per tenant in its context; a failing tenant does not stop the others"""
+    results = {}
+    for tenant_id in tenants:
+        with use_tenant(tenant_id):
+            try:
+                results[tenant_id] = await job()
+            except Exception as e:
+                logger.error(f"{label} failed ({tenant_id}): {e}")
+    return results
+
+async def check_tenant_request_quota():
+    limit = tenants.current().quota.requests
+    if limit is None:
+        return
+    retry_after = await rate_limiter.store.take(f"tenant:{tenants.current_id()}", limit)
+    if retry_after:
+        RATE_LIMITED.inc("tenant")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests for this tenant",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+async def check_tenant_user_quota():
+    limit = tenants.current().quota.users
+    if limit is not None and await db.users.count_documents({}) >= limit:
+        raise HTTPException(status_code=403, detail="User limit of this tenant reached")
+
+# Direct messages and private rooms
+DIRECT_CHANNEL = "direct"
+PRIVATE_ROOM_PREFIXES = ("user:", "conv:", "role:", "dept:")
+
+def user_room(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def role_room(role: str) -> str:
+    return f"role:{role}"
+
+def department_room(department: str) -> str:
+    return f"dept:{department}"
+
+def conversation_room(conversation_id: str) -> str:
+    return f"conv:{conversation_id}"
+
+def tenant_room(room: str) -> str:
+    """Socket.IO room of the current tenant; room names elsewhere are per tenant"""
+    return f"{tenants.current_id()}/{room}"
+
+TENANT_BROADCAST_ROOM = "all"  # every socket of the tenant
+
+async def tenant_emit(event: str, data: Any, to=None):
+    """Emit to rooms of the current tenant, without rooms to all of its sockets"""
+    rooms = [TENANT_BROADCAST_ROOM] if to is None else [to] if isinstance(to, str) else to
+    await sio.emit(event, data, to=[tenant_room(room) for room in rooms])
+
+def conversation_id_for(user_a: str, user_b: str) -> str:
+    first, second = sorted((user_a, user_b))
+    return f"dm:{first}:{second}"
+
+async def can_join_private_room(user_id: str, room: str) -> bool:
+    if room.startswith("user:"):
+        return room == user_room(user_id)
+    if room.startswith(("role:", "dept:")):
+        return False  # joined automatically at connect time
+    conversation_id = room[len("conv:"):]
+    conversation = await db.conversations.find_one(
+        {"id": conversation_id, "participants": user_id}, {"_id": 0, "id": 1}
+    )
+    return conversation is not None
+
+# Incident event routing
+# Incident events are compact envelopes (id, version, changed fields) sent only to the
+# rooms chosen by priority plus the reporter and assignee. Clients fetch the full
+# incident (including images) via GET /api/incidents/{id} when they need it.
+INCIDENT_EVENT_ROOMS = {
+    "high": [role_room(UserRole.ADMIN), role_room(UserRole.POLICE), role_room(UserRole.TRAINEE)],
+    "medium": [role_room(UserRole.ADMIN), role_room(UserRole.POLICE)],
+    "low": [role_room(UserRole.ADMIN), role_room(UserRole.POLICE)],
+}
+# Override per priority, e.g. INCIDENT_EVENT_ROOMS="high=role:admin|role:police|dept:Streifendienst"
+for _route in filter(None, os.getenv("INCIDENT_EVENT_ROOMS", "").split(";")):
+    _priority, _, _rooms = _route.partition("=")
+    INCIDENT_EVENT_ROOMS[_priority.strip()] = [r.strip() for r in _rooms.split("|") if r.strip()]
+
+INCIDENT_EVENT_EXCLUDED_FIELDS = ("_id", "images", "thumbnails")
+
+def incident_rooms(incident: Dict[str, Any]) -> List[str]:
+    rooms = list(INCIDENT_EVENT_ROOMS.get(incident.get("priority"), INCIDENT_EVENT_ROOMS["medium"]))
+    for user_id in (incident.get("reported_by"), incident.get("assigned_to")):
+        if user_id:
+            rooms.append(user_room(user_id))
+    return rooms
+
+def incident_envelope(incident: Dict[str, Any], changed: Dict[str, Any]) -> Dict[str, Any]:
+    compact = {k: v for k, v in changed.items() if k not in INCIDENT_EVENT_EXCLUDED_FIELDS}
+    if "images" in changed:
+        compact["image_count"] = len(changed["images"] or [])
+    return {
+        "id": incident["id"],
+        "version": incident.get("version", 1),
+        "priority": incident.get("priority"),
+        "status": incident.get("status"),
+        "changed": compact,
+    }
+
+async def emit_incident_event(event: str, incident: Dict[str, Any], changed: Dict[str, Any]):
+    await tenant_emit(event, incident_envelope(incident, changed), to=incident_rooms(incident))
+
+# Rate limiting and backpressure
+# Token bucket per user and limit: rate per second / burst
+RATE_LIMITS = {
+    "heartbeat": RateLimit(0.2, 3),
+    "location": RateLimit(1, 5),
+    "message": RateLimit(1, 10),
+}
+# Override per limit, e.g. RATE_LIMITS="location=2/10,message=0.5/5"
+for _limit in filter(None, os.getenv("RATE_LIMITS", "").split(",")):
+    _name, _, _value = _limit.partition("=")
+    RATE_LIMITS[_name.strip()] = RateLimit.parse(_value.strip())
+
+# memory: per process (default, single worker); mongo: shared by all instances
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+
+# Location broadcasts are coalesced and flushed at this interval; clients with more
+# queued Engine.IO packets than LOCATION_MAX_SEND_QUEUE are skipped until they drain
+LOCATION_FLUSH_SECONDS = float(os.getenv("LOCATION_FLUSH_SECONDS", "1.0"))
+LOCATION_MAX_SEND_QUEUE = int(os.getenv("LOCATION_MAX_SEND_QUEUE", "64"))
+
+def create_rate_limit_store():
+    return MongoBucketStore(db.rate_limits) if RATE_LIMIT_STORE == "mongo" else InMemoryBucketStore()
+
+rate_limiter = RateLimiter(RATE_LIMITS, InMemoryBucketStore())  # store is rebound by set_database
+location_fanouts = TenantLocal(tenants, LocationFanout)
+location_fanout = TenantProxy(location_fanouts.current)
+
+async def check_rate_limit(name: str, user_id: str) -> float:
+    retry_after = await rate_limiter.hit(name, user_id)
+    if retry_after:
+        RATE_LIMITED.inc(name)
+    return retry_after
+
+def rate_limited(name: str):
+    """Dependency: authenticated user, 429 with Retry-After when the limit is exceeded"""
+    async def dependency(current_user: User = Depends(get_current_user)) -> User:
+        retry_after = await check_rate_limit(name, current_user.id)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+        return current_user
+    return dependency
+
+def socket_send_queue_size(sid: str) -> int:
+    """Packets waiting in the Engine.IO queue of a client (0 if unknown)"""
+    # Engine.IO has no API for the queue size; use the public sockets/queue attributes
+    # and treat the client as idle if they are missing (no backpressure then)
+    eio_sid = sio.manager.eio_sid_from_sid(sid, "/")
+    socket = getattr(sio.eio, "sockets", {}).get(eio_sid)
+    queue = getattr(socket, "queue", None)
+    return queue.qsize() if queue is not None else 0
+
+def publish_location(location_data: Dict[str, Any]):
+    record_position(location_data["user_id"], location_data["location"])
+    location_fanout.publish(location_data["user_id"], location_data)
+
+async def flush_locations():
+    ready = []
+    for sid in presence.sockets():
+        if socket_send_queue_size(sid) > LOCATION_MAX_SEND_QUEUE:
+            LOCATION_FLUSH_SKIPS.inc()
+        else:
+            ready.append(sid)
+    for payloads, sids in location_fanout.batches(ready):
+        for payload in payloads:
+            await sio.emit('location_updated', payload, to=sids)
+
+async def location_flush_loop():
+    while True:
+        await asyncio.sleep(LOCATION_FLUSH_SECONDS)
+        await for_each_tenant(flush_locations, "Location flush")
+
 # Socket.IO events
+def socket_token(environ, auth) -> Optional[str]:
+    """Access token from the handshake auth payload, query string or Authorization header"""
+    if isinstance(auth, dict) and auth.get("token"):
+        return auth["token"]
+    query = parse_qs(environ.get("QUERY_STRING", ""))
+    if query.get("token"):
+        return query["token"][0]
+    header = environ.get("HTTP_AUTHORIZATION", "")
+    if header.lower().startswith("bearer "):
+        return header[7:]
+    return None
+
+def tenant_socket_event(handler):
+    """Run a Socket.IO event handler in the tenant of the socket"""
+    @functools.wraps(handler)
+    async def wrapper(sid, *args):
+        tenant_id = socket_tenants.get(sid)
+        if tenant_id is None:
+            return
+        with use_tenant(tenant_id):
+            return await handler(sid, *args)
+    return wrapper
+
 @sio.event
-async def connect(sid, environ):
-    print(f"Client {sid} connected")
+async def connect(sid, environ, auth=None):
+    claims = decode_token_claims(socket_token(environ, auth))
+    if not claims or claims[1] not in tenants:
+        socket_logger.debug("Socket connect refused", extra={"sid": sid})
+        raise socketio.exceptions.ConnectionRefusedError("authentication failed")
+    
+    user_id, tenant_id = claims
+    with use_tenant(tenant_id):
+        await connect_user(sid, user_id)
+        socket_tenants[sid] = tenant_id
+
+async def connect_user(sid: str, user_id: str):
+    user = await db.users.find_one(
+        {"id": user_id},
+        {"_id": 0, "id": 1, "username": 1, "role": 1, "department": 1, "is_active": 1}
+    )
+    if not user or not user.get("is_active", True):
+        raise socketio.exceptions.ConnectionRefusedError("authentication failed")
+    
+    max_sockets = tenants.current().quota.sockets
+    if max_sockets is not None and len(presence.socket_users) >= max_sockets:
+        raise socketio.exceptions.ConnectionRefusedError("connection limit of tenant reached")
+    
+    await sio.save_session(sid, user)
+    first_socket = presence.connect(sid, user_id, user["username"])
+    location_fanout.add_client(sid)
+    socket_logger.debug("Socket connected", extra={"sid": sid, "user_id": user_id, "tenant": tenants.current_id()})
+    
+    await sio.enter_room(sid, tenant_room(TENANT_BROADCAST_ROOM))
+    await sio.enter_room(sid, tenant_room(user_room(user_id)))
+    await sio.enter_room(sid, tenant_room(role_room(user["role"])))
+    if user.get("department"):
+        await sio.enter_room(sid, tenant_room(department_room(user["department"])))
+    
+    # Presence: first socket of a user marks them online
+    if first_socket:
+        await tenant_emit('user_online', {
+            'user_id': user_id,
+            'username': user["username"],
+            'timestamp': datetime.utcnow().isoformat()
+        })
 
 @sio.event
 async def disconnect(sid):
-    print(f"Client {sid} disconnected")
+    tenant_id = socket_tenants.pop(sid, None)
+    if tenant_id is None:
+        return
+    with use_tenant(tenant_id):
+        # Stays online while another device of the same user is connected
+        user_id, went_offline = presence.disconnect(sid)
+        location_fanout.remove_client(sid)
+        if not user_id:
+            return
+        socket_logger.debug("Socket disconnected", extra={"sid": sid, "user_id": user_id})
+        
+        if went_offline:
+            await tenant_emit('user_offline', {'user_id': user_id})
 
 @sio.event
+@tenant_socket_event
 async def join_room(sid, data):
     room = data.get('room', 'general')
-    await sio.enter_room(sid, room)
+    
+    # User and conversation rooms require a member; role/department rooms are automatic
+    if room.startswith(PRIVATE_ROOM_PREFIXES):
+        user_id = presence.user_for_socket(sid)
+        if not user_id or not await can_join_private_room(user_id, room):
+            await sio.emit('join_denied', {'room': room}, room=sid)
+            return
+    
+    await sio.enter_room(sid, tenant_room(room))
     await sio.emit('joined_room', {'room': room}, room=sid)
 
 @sio.event
+@tenant_socket_event
 async def send_message(sid, data):
     room = data.get('room', 'general')
     message = data.get('message')
-    sender = data.get('sender')
+    if room == DIRECT_CHANNEL or room.startswith(PRIVATE_ROOM_PREFIXES):
+        return  # direct messages go through POST /api/messages
+    
+    # Sender comes from the authenticated session, not from the payload
+    sender = await sio.get_session(sid)
+    
+    retry_after = await check_rate_limit("message", sender["id"])
+    if retry_after:
+        await sio.emit('rate_limited', {'event': 'send_message', 'retry_after': retry_after}, to=sid)
+        return
     
     # Save message to database
     message_data = {
         "id": str(uuid.uuid4()),
         "content": message,
-        "sender_id": sender,
+        "sender_id": sender["id"],
+        "sender_name": sender["username"],
         "channel": room,
+        "seq": await next_channel_seq(room),
         "timestamp": datetime.utcnow(),
         "message_type": "text"
     }
     await db.messages.insert_one(message_data)
+    message_data.pop("_id", None)
     
     # Broadcast to room
-    await sio.emit('new_message', message_data, room=room)
+    await publish_channel_message(message_data)
 
 @sio.event
+@tenant_socket_event
+async def ack_messages(sid, data):
+    """Batched read acknowledgements: {'acks': [{'channel': str, 'seq': int}]}"""
+    user_id = presence.user_for_socket(sid)
+    if user_id:
+        await acknowledge_reads(user_id, data.get('acks') or [])
+
+@sio.event
+@tenant_socket_event
 async def location_update(sid, data):
-    # Save location update
+    # Save location update for the authenticated user
+    user_id = presence.user_for_socket(sid)
+    if not user_id:
+        return
     location_data = {
-        "user_id": data.get('user_id'),
+        "user_id": user_id,
         "location": data.get('location'),
         "timestamp": datetime.utcnow()
     }
-    await db.locations.insert_one(location_data)
-    
-    # Broadcast to all connected clients
-    await sio.emit('location_updated', location_data)
+    # Over the limit: keep only the latest position (no insert), it goes out with the next flush
+    if not await check_rate_limit("location", location_data["user_id"]):
+        await db.locations.insert_one(location_data)
+        location_data.pop("_id", None)
+    publish_location(location_data)
 
 # API Routes
 @api_router.post("/auth/register", response_model=User)
@@ -262,6 +698,7 @@ async def register_user(user_data: UserCreate):
     existing_user = await db.users.find_one({"email": user_data.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
+    await check_tenant_user_quota()
     
     # Hash password
     hashed_password = get_password_hash(user_data.password)
@@ -286,6 +723,9 @@ async def register_user(user_data: UserCreate):
     
     # Insert user into database
     await db.users.insert_one(user_dict)
+    if user_dict["role"] in DISPATCH_ROLES:
+        dispatch_engine.set_officer(user_dict["id"], user_dict["username"], user_dict["status"])
+    await emit_status_changed(user_dict, user_dict["status"], None)
     
     # Return user without password
     user_dict.pop('hashed_password')
@@ -299,7 +739,7 @@ async def login(user_data: UserLogin):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["id"]}, expires_delta=access_token_expires
+        data={"sub": user["id"], "tenant": tenants.current_id()}, expires_delta=access_token_expires
     )
     
     user_obj = User(**user)
@@ -316,64 +756,183 @@ async def update_profile(user_updates: UserUpdate, current_user: User = Depends(
     update_data['updated_at'] = datetime.utcnow()
     
     # Update user in database
-    result = await db.users.update_one(
-        {"id": current_user.id}, 
-        {"$set": update_data}
+    updated_user = await db.users.find_one_and_update(
+        {"id": current_user.id},
+        {"$set": update_data},
+        projection={"_id": 0, "hashed_password": 0},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if updated_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get updated user
-    updated_user = await db.users.find_one({"id": current_user.id})
+    if updated_user.get("role") in DISPATCH_ROLES:
+        dispatch_engine.set_officer(updated_user["id"], updated_user["username"], updated_user.get("status") or DEFAULT_USER_STATUS)
+    if updated_user.get("status") != current_user.status:
+        await emit_status_changed(updated_user, updated_user.get("status"), current_user.status)
     return User(**updated_user)
 
+# Dispatch recommendations
+# Officer positions, status and open assignments are kept in memory and updated
+# incrementally; a periodic resync from Mongo corrects drift between workers.
+DISPATCH_ROLES = [UserRole.POLICE]
+DISPATCH_POSITION_WINDOW = timedelta(minutes=30)
+DISPATCH_RESYNC_SECONDS = int(os.getenv("DISPATCH_RESYNC_SECONDS", "300"))
+
+dispatch_engines = TenantLocal(tenants, DispatchEngine)
+dispatch_engine = TenantProxy(dispatch_engines.current)
+
+def record_position(user_id: str, location: Any):
+    """Feed a location ping into the dispatch index"""
+    try:
+        lat, lng = float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return
+    dispatch_engine.update_position(user_id, lat, lng)
+
+async def load_dispatch_state():
+    """Rebuild the dispatch engine from users, open incidents and recent locations"""
+    engine = DispatchEngine()
+    
+    officers = await db.users.find(
+        {"role": {"$in": DISPATCH_ROLES}, "is_active": True},
+        {"_id": 0, "id": 1, "username": 1, "status": 1}
+    ).to_list(None)
+    for officer in officers:
+        engine.set_officer(officer["id"], officer["username"], officer.get("status") or "Im Dienst")
+    
+    assignments = await db.incidents.aggregate([
+        {"$match": {"status": "in_progress", "assigned_to": {"$ne": None}}},
+        {"$group": {"_id": "$assigned_to", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    for entry in assignments:
+        engine.change_assignments(entry["_id"], entry["count"])
+    
+    now = datetime.utcnow()
+    positions = await db.locations.aggregate([
+        {"$match": {"timestamp": {"$gte": now - DISPATCH_POSITION_WINDOW}}},
+        {"$sort": {"timestamp": -1}},
+        {"$group": {"_id": "$user_id", "location": {"$first": "$location"}, "timestamp": {"$first": "$timestamp"}}}
+    ]).to_list(None)
+    monotonic_now = time.monotonic()
+    for entry in positions:
+        location = entry.get("location") or {}
+        if "lat" in location and "lng" in location:
+            age = (now - entry["timestamp"]).total_seconds()
+            engine.update_position(entry["_id"], location["lat"], location["lng"], monotonic_now - age)
+    
+    dispatch_engines.set(engine)
+
+async def dispatch_resync_loop():
+    while True:
+        await asyncio.sleep(DISPATCH_RESYNC_SECONDS)
+        await for_each_tenant(load_dispatch_state, "Dispatch resync")
+
+@api_router.get("/incidents/{incident_id}/candidates")
+async def get_dispatch_candidates(incident_id: str, limit: int = 10, current_user: User = Depends(get_current_user)):
+    """Officers ranked for an incident by distance, status, workload and priority"""
+    if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    incident = await db.incidents.find_one({"id": incident_id}, {"_id": 0, "location": 1, "priority": 1})
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    location = incident.get("location") or {}
+    if "lat" not in location or "lng" not in location:
+        raise HTTPException(status_code=400, detail="Incident has no coordinates")
+    
+    limit = max(1, min(limit, 50))
+    candidates = dispatch_engine.candidates(location["lat"], location["lng"], incident["priority"], limit)
+    return {"incident_id": incident_id, "priority": incident["priority"], "candidates": candidates}
+
 @api_router.put("/incidents/{incident_id}/assign", response_model=Incident)
-async def assign_incident(incident_id: str, current_user: User = Depends(get_current_user)):
+async def assign_incident(incident_id: str, officer_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
     # Only police and admin can assign incidents
     if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    # Assign to self by default, or dispatch another officer
+    assignee = {"id": current_user.id, "username": current_user.username}
+    if officer_id and officer_id != current_user.id:
+        # Only active users with a dispatch role (same filter as load_dispatch_state)
+        assignee = await db.users.find_one(
+            {"id": officer_id, "role": {"$in": DISPATCH_ROLES}, "is_active": True}, {"_id": 0, "id": 1, "username": 1}
+        )
+        if not assignee:
+            raise HTTPException(status_code=404, detail="Active officer not found")
+    
     updates = {
-        'assigned_to': current_user.id,
-        'assigned_to_name': current_user.username,
+        'assigned_to': assignee["id"],
+        'assigned_to_name': assignee["username"],
         'status': 'in_progress',
+        'assigned_at': datetime.utcnow(),
         'updated_at': datetime.utcnow()
     }
     
-    result = await db.incidents.update_one({"id": incident_id}, {"$set": updates})
+    previous = await db.incidents.find_one_and_update(
+        {"id": incident_id},
+        {"$set": updates, "$inc": {"version": 1}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Incident not found")
     
-    incident = await db.incidents.find_one({"id": incident_id})
-    incident_obj = Incident(**incident)
+    incident = {**previous, **updates, "version": previous.get("version", 0) + 1}
+    
+    if previous.get("status") == "in_progress":
+        dispatch_engine.change_assignments(previous.get("assigned_to"), -1)
+    dispatch_engine.change_assignments(assignee["id"], 1)
+    incident_queue.remove(incident_id)
     
     # Notify about incident assignment
-    await sio.emit('incident_assigned', {
-        'incident_id': incident_id,
-        'assigned_to': current_user.username,
-        'incident': incident_obj.dict()
-    })
+    await emit_incident_event('incident_assigned', incident, updates)
     
-    return incident_obj
+    return Incident(**incident)
 
-@api_router.get("/users/by-status")
-async def get_users_by_status(current_user: User = Depends(get_current_user)):
-    users = await db.users.find({"is_active": True}).to_list(100)
+# Team roster
+# Active users grouped by status in Mongo, presence joined from the presence table.
+# Changes are pushed as 'status_changed' {user_id, username, status, previous_status};
+# status None means the user left the roster, previous_status None that they joined.
+DEFAULT_USER_STATUS = "Im Dienst"
+
+ROSTER_PIPELINE = [
+    {"$match": {"is_active": True}},
+    {"$sort": {"username": 1}},
+    {"$project": USER_PROJECTION},
+    {"$group": {"_id": {"$ifNull": ["$status", DEFAULT_USER_STATUS]}, "users": {"$push": "$$ROOT"}}},
+    {"$sort": {"_id": 1}},
+]
+
+async def collect_users_by_status() -> Dict[str, List[Dict[str, Any]]]:
+    groups = await db.users.aggregate(ROSTER_PIPELINE).to_list(None)
+    # Built once per presence tick and shared by all readers
+    fields = presence.fields()
     
-    # Group users by status
     users_by_status = {}
-    for user in users:
-        status = user.get('status', 'Im Dienst')
-        if status not in users_by_status:
-            users_by_status[status] = []
-        
-        user_obj = User(**user)
-        users_by_status[status].append(user_obj.dict())
+    for group in groups:
+        members = trusted_docs(group["users"], USER_DEFAULTS)
+        for user in members:
+            user.update(fields.get(user["id"], OFFLINE_FIELDS))
+        users_by_status[group["_id"] or DEFAULT_USER_STATUS] = members
     
     return users_by_status
 
+async def emit_status_changed(user: Dict[str, Any], status: Optional[str], previous_status: Optional[str]):
+    await tenant_emit('status_changed', {
+        'user_id': user["id"],
+        'username': user.get("username"),
+        'status': status,
+        'previous_status': previous_status
+    })
+
+@api_router.get("/users/by-status")
+async def get_users_by_status(current_user: User = Depends(get_current_user)):
+    """Get users grouped by their work status with online information"""
+    return FastJSONResponse(await collect_users_by_status())
+
 @api_router.delete("/messages/{message_id}")
 async def delete_message(message_id: str, current_user: User = Depends(get_current_user)):
     # Find the message first
@@ -392,7 +951,15 @@ async def delete_message(message_id: str, current_user: User = Depends(get_curre
         raise HTTPException(status_code=404, detail="Message not found")
     
     # Notify about message deletion
-    await sio.emit('message_deleted', {'message_id': message_id, 'channel': message['channel']})
+    deleted_event = {'message_id': message_id, 'channel': message['channel']}
+    if message.get("conversation_id"):
+        conversation = await db.conversations.find_one(
+            {"id": message["conversation_id"]}, {"_id": 0, "participants": 1}
+        )
+        participants = conversation["participants"] if conversation else [message["sender_id"]]
+        await tenant_emit('message_deleted', deleted_event, to=[user_room(p) for p in participants])
+    else:
+        await tenant_emit('message_deleted', deleted_event)
     
     return {"status": "success", "message": "Message deleted"}
 
@@ -410,6 +977,9 @@ class Report(BaseModel):
     last_edited_by_name: Optional[str] = None  # Name of last editor
     edit_history: List[Dict[str, Any]] = []  # Track edit history
 
+REPORT_PROJECTION = model_projection(Report)
+REPORT_DEFAULTS = model_defaults(Report)
+
 class ReportCreate(BaseModel):
     title: str
     content: str
@@ -427,16 +997,16 @@ async def create_report(report_data: ReportCreate, current_user: User = Depends(
     
     return report_obj
 
+def visible_reports_filter(user: User) -> Dict[str, Any]:
+    # Admin can see all reports, users only their own
+    return {} if user.role == UserRole.ADMIN else {"author_id": user.id}
+
 @api_router.get("/reports", response_model=List[Report])
 async def get_reports(current_user: User = Depends(get_current_user)):
-    if current_user.role == UserRole.ADMIN:
-        # Admin can see all reports
-        reports = await db.reports.find().sort("created_at", -1).to_list(100)
-    else:
-        # Users can only see their own reports
-        reports = await db.reports.find({"author_id": current_user.id}).sort("created_at", -1).to_list(100)
-    
-    return [Report(**report) for report in reports]
+    reports = await db.reports.find(
+        visible_reports_filter(current_user), REPORT_PROJECTION
+    ).sort("created_at", -1).to_list(100)
+    return FastJSONResponse(trusted_docs(reports, REPORT_DEFAULTS))
 
 @api_router.delete("/users/{user_id}")
 async def delete_user(user_id: str, current_user: User = Depends(get_current_user)):
@@ -447,11 +1017,17 @@ async def delete_user(user_id: str, current_user: User = Depends(get_current_use
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    result = await db.users.delete_one({"id": user_id})
+    deleted = await db.users.find_one_and_delete(
+        {"id": user_id}, projection={"_id": 0, "id": 1, "username": 1, "status": 1, "is_active": 1}
+    )
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="User not found")
     
+    dispatch_engine.remove_officer(user_id)
+    if deleted.get("is_active", True):
+        await emit_status_changed(deleted, None, deleted.get("status"))
+    
     return {"status": "success", "message": "User deleted"}
 
 @api_router.delete("/incidents/{incident_id}")
@@ -460,11 +1036,19 @@ async def delete_incident(incident_id: str, current_user: User = Depends(get_cur
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    result = await db.incidents.delete_one({"id": incident_id})
+    incident = await db.incidents.find_one_and_delete({"id": incident_id}, projection={"_id": 0, "images": 0})
     
-    if result.deleted_count == 0:
+    if incident is None:
         raise HTTPException(status_code=404, detail="Incident not found")
     
+    if incident.get("status") == "in_progress":
+        dispatch_engine.change_assignments(incident.get("assigned_to"), -1)
+    incident_queue.remove(incident_id)
+    if isinstance(incident.get("created_at"), datetime):
+        await record_heatmap_event(incident, "reported", incident["created_at"], -1)
+    
+    await emit_incident_event('incident_deleted', incident, {"deleted_by": current_user.id})
+    
     return {"status": "success", "message": "Incident deleted"}
 
 @api_router.put("/incidents/{incident_id}/complete", response_model=dict)
@@ -473,11 +1057,14 @@ async def complete_incident(incident_id: str, current_user: User = Depends(get_c
     if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get incident details first
+    # Get incident details first, with the images of a running transcode
+    await wait_for_incident_images(incident_id)
     incident = await db.incidents.find_one({"id": incident_id})
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     
+    completed_at = datetime.utcnow()
+    
     # Create archive report
     archive_report = {
         "id": str(uuid.uuid4()),
@@ -488,10 +1075,18 @@ async def complete_incident(incident_id: str, current_user: User = Depends(get_c
         "shift_date": datetime.utcnow().strftime('%Y-%m-%d'),
         "status": "archived",
         "incident_id": incident_id,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        "created_at": completed_at,
+        "updated_at": completed_at
     }
     
+    # Structured copy for analytics; images move to the blob store
+    image_keys = await store_incident_images(incident)
+    archived = encode_archived_incident(
+        incident, {"id": current_user.id, "username": current_user.username},
+        completed_at, image_keys, archive_report["id"]
+    )
+    await db.incidents_archive.replace_one({"_id": incident_id}, archived, upsert=True)
+    
     # Save to archive
     await db.reports.insert_one(archive_report)
     
@@ -501,9 +1096,14 @@ async def complete_incident(incident_id: str, current_user: User = Depends(get_c
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Incident not found")
     
+    if incident.get("status") == "in_progress":
+        dispatch_engine.change_assignments(incident.get("assigned_to"), -1)
+    incident_queue.remove(incident_id)
+    await record_heatmap_event(incident, "completed", completed_at)
+    
     # Notify about incident completion
-    await sio.emit('incident_completed', {
-        'incident_id': incident_id,
+    incident['status'] = 'closed'
+    await emit_incident_event('incident_completed', incident, {
         'completed_by': current_user.username,
         'archived_as': archive_report['id']
     })
@@ -548,6 +1148,195 @@ async def get_report_folders(current_user: User = Depends(get_current_user)):
     
     return folders
 
+# Shift report generation
+# Pre-filled shift reports from the officer's incidents, assignment timeline, patrol
+# distance (streamed from locations) and channel activity. Drafts are cached per shift
+# and author in shift_report_drafts; finished shifts are generated in the background.
+SHIFT_REPORT_FRESH_SECONDS = int(os.getenv("SHIFT_REPORT_FRESH_SECONDS", "300"))
+SHIFT_REPORT_WAIT_SECONDS = float(os.getenv("SHIFT_REPORT_WAIT_SECONDS", "5"))
+SHIFT_REPORT_INTERVAL_SECONDS = int(os.getenv("SHIFT_REPORT_INTERVAL_SECONDS", "600"))
+
+shift_report_tasks: Dict[Tuple[str, str], asyncio.Task] = {}  # (author_id, shift_key) -> running generation
+
+async def shift_incidents(user_id: str, start: datetime, end: datetime) -> Dict[str, Any]:
+    """Incidents the officer reported or handled that were active during the shift"""
+    result = await db.incidents.aggregate([
+        {"$match": {
+            "$or": [{"reported_by": user_id}, {"assigned_to": user_id}],
+            "created_at": {"$lt": end},
+            "updated_at": {"$gte": start}
+        }},
+        {"$facet": {
+            "by_priority": [{"$group": {"_id": "$priority", "count": {"$sum": 1}}}],
+            "items": [
+                {"$sort": {"created_at": 1}},
+                {"$project": {"_id": 0, "id": 1, "title": 1, "priority": 1, "status": 1, "address": 1,
+                              "created_at": 1, "assigned_at": 1}}
+            ]
+        }}
+    ]).to_list(1)
+    facets = result[0] if result else {"by_priority": [], "items": []}
+    return {
+        "items": facets["items"],
+        "by_priority": {entry["_id"]: entry["count"] for entry in facets["by_priority"]}
+    }
+
+async def shift_completed_incidents(user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    archived = await db.incidents_archive.find(
+        {"cb": user_id, "xa": {"$gte": start, "$lt": end}}, {"t": 1, "p": 1, "xa": 1, "rid": 1}
+    ).sort("xa", 1).to_list(None)
+    return [
+        {"id": doc.get("rid"), "incident_id": doc["_id"], "incident_priority": PRIORITY_NAMES.get(doc.get("p")),
+         "title": doc["t"], "created_at": doc["xa"]}
+        for doc in archived
+    ]
+
+async def shift_patrol(user_id: str, start: datetime, end: datetime) -> Dict[str, Any]:
+    patrol = PatrolDistance()
+    cursor = db.locations.find(
+        {"user_id": user_id, "timestamp": {"$gte": start, "$lt": end}},
+        {"_id": 0, "location": 1, "timestamp": 1},
+        batch_size=1000
+    ).sort("timestamp", 1)
+    async for ping in cursor:
+        patrol.add(ping.get("location"), ping["timestamp"])
+    return patrol.summary()
+
+async def shift_channel_activity(user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    return await db.messages.aggregate([
+        {"$match": {"timestamp": {"$gte": start, "$lt": end}, "channel": {"$ne": DIRECT_CHANNEL}}},
+        {"$group": {
+            "_id": "$channel",
+            "total": {"$sum": 1},
+            "own": {"$sum": {"$cond": [{"$eq": ["$sender_id", user_id]}, 1, 0]}}
+        }},
+        {"$sort": {"total": -1}},
+        {"$project": {"_id": 0, "channel": "$_id", "total": 1, "own": 1}}
+    ]).to_list(None)
+
+async def generate_shift_report(user: Dict[str, Any], shift_date: date, shift: str) -> Dict[str, Any]:
+    start, end = shift_window(shift_date, shift)
+    incidents, completed, patrol, channels = await asyncio.gather(
+        shift_incidents(user["id"], start, end),
+        shift_completed_incidents(user["id"], start, end),
+        shift_patrol(user["id"], start, end),
+        shift_channel_activity(user["id"], start, end),
+    )
+    
+    by_priority = dict(incidents["by_priority"])
+    for archived in completed:
+        priority = archived.get("incident_priority") or "medium"
+        by_priority[priority] = by_priority.get(priority, 0) + 1
+    
+    summary = {
+        "incidents": {
+            "total": len(incidents["items"]) + len(completed),
+            "by_priority": by_priority,
+            "items": incidents["items"]
+        },
+        "completed": completed,
+        "timeline": build_timeline(incidents["items"], completed, start, end),
+        "patrol": patrol,
+        "channels": channels,
+    }
+    title, content = render_report(user["username"], shift_date, shift, summary)
+    
+    draft = {
+        "author_id": user["id"],
+        "author_name": user["username"],
+        "shift_key": shift_key(shift_date, shift),
+        "shift_date": shift_date.isoformat(),
+        "shift": shift,
+        "window": {"start": start, "end": end},
+        "title": title,
+        "content": content,
+        "summary": summary,
+        "generated_at": datetime.utcnow(),
+    }
+    await db.shift_report_drafts.replace_one(
+        {"author_id": user["id"], "shift_key": draft["shift_key"]}, draft, upsert=True
+    )
+    return draft
+
+def schedule_shift_report(user: Dict[str, Any], shift_date: date, shift: str) -> asyncio.Task:
+    """One generation per author and shift at a time"""
+    key = (user["id"], shift_key(shift_date, shift))
+    task = shift_report_tasks.get(key)
+    if task is None or task.done():
+        task = asyncio.create_task(generate_shift_report(user, shift_date, shift))
+        shift_report_tasks[key] = task
+        task.add_done_callback(lambda _: shift_report_tasks.pop(key, None))
+    return task
+
+def draft_is_current(draft: Dict[str, Any], now: datetime) -> bool:
+    # Drafts of finished shifts never change; running shifts are refreshed periodically
+    return draft["generated_at"] >= draft["window"]["end"] or \
+        (now - draft["generated_at"]).total_seconds() < SHIFT_REPORT_FRESH_SECONDS
+
+async def shift_participants(start: datetime, end: datetime) -> set:
+    located, assigned, completed = await asyncio.gather(
+        db.locations.distinct("user_id", {"timestamp": {"$gte": start, "$lt": end}}),
+        db.incidents.distinct("assigned_to", {"assigned_at": {"$gte": start, "$lt": end}}),
+        db.incidents_archive.distinct("cb", {"xa": {"$gte": start, "$lt": end}}),
+    )
+    return {user_id for user_id in (*located, *assigned, *completed) if user_id}
+
+async def generate_finished_shift_reports():
+    """Drafts for everyone who was active in the last finished shift"""
+    shift_date, shift, _ = last_finished_shift(datetime.utcnow())
+    start, end = shift_window(shift_date, shift)
+    key = shift_key(shift_date, shift)
+    
+    participants = await shift_participants(start, end)
+    existing = set(await db.shift_report_drafts.distinct("author_id", {"shift_key": key}))
+    missing = list(participants - existing)
+    if not missing:
+        return 0
+    
+    users = await db.users.find({"id": {"$in": missing}}, {"_id": 0, "id": 1, "username": 1}).to_list(None)
+    for user in users:
+        await schedule_shift_report(user, shift_date, shift)
+    return len(users)
+
+async def shift_report_loop():
+    while True:
+        generated = await for_each_tenant(generate_finished_shift_reports, "Shift report generation")
+        for tenant_id, count in generated.items():
+            if count:
+                logger.info(f"Generated {count} shift report drafts ({tenant_id})")
+        await asyncio.sleep(SHIFT_REPORT_INTERVAL_SECONDS)
+
+@api_router.get("/reports/draft")
+async def get_shift_report_draft(
+    shift_date: Optional[date] = None,
+    shift: Optional[str] = None,
+    refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Pre-filled shift report for the current user (defaults to the running shift)"""
+    now = datetime.utcnow()
+    if shift is not None and shift not in SHIFTS:
+        raise HTTPException(status_code=400, detail=f"Unknown shift, use one of: {', '.join(SHIFTS)}")
+    if shift_date is None or shift is None:
+        current_date, current_shift = shift_at(now)
+        shift_date, shift = shift_date or current_date, shift or current_shift
+    
+    draft = await db.shift_report_drafts.find_one(
+        {"author_id": current_user.id, "shift_key": shift_key(shift_date, shift)}, {"_id": 0}
+    )
+    if draft and not refresh and draft_is_current(draft, now):
+        return FastJSONResponse(draft)
+    
+    task = schedule_shift_report({"id": current_user.id, "username": current_user.username}, shift_date, shift)
+    try:
+        draft = await asyncio.wait_for(asyncio.shield(task), SHIFT_REPORT_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        return FastJSONResponse(
+            {"status": "pending", "shift_key": shift_key(shift_date, shift), "retry_after": 2},
+            status_code=202
+        )
+    return FastJSONResponse(draft)
+
 @api_router.put("/reports/{report_id}", response_model=Report)
 async def update_report(report_id: str, updated_data: ReportCreate, current_user: User = Depends(get_current_user)):
     """Update an existing report"""
@@ -601,19 +1390,78 @@ async def update_report(report_id: str, updated_data: ReportCreate, current_user
 async def create_incident(incident_data: IncidentCreate, current_user: User = Depends(get_current_user)):
     incident_dict = incident_data.dict()
     incident_dict['reported_by'] = current_user.id
+    # New photos are transcoded in the background; known ones resolve right away
+    uploads = {}
+    incident_dict['images'], incident_dict['thumbnails'] = await store_images(incident_data.images, deferred=uploads)
+    incident_dict['images_pending'] = len(uploads)
     incident_obj = Incident(**incident_dict)
     
-    await db.incidents.insert_one(incident_obj.dict())
+    incident_doc = incident_obj.dict()
+    await db.incidents.insert_one(incident_doc)
+    if uploads:
+        schedule_incident_images(incident_obj.id, uploads)
+    sync_incident_queue(incident_doc)
+    await record_heatmap_event(incident_doc, "reported", incident_doc["created_at"])
     
-    # Notify all users about new incident
-    await sio.emit('new_incident', incident_obj.dict())
+    # Notify the rooms responsible for this priority
+    await emit_incident_event('new_incident', incident_doc, incident_doc)
     
     return incident_obj
 
 @api_router.get("/incidents", response_model=List[Incident])
 async def get_incidents(current_user: User = Depends(get_current_user)):
-    incidents = await db.incidents.find().sort("created_at", -1).to_list(100)
-    return [Incident(**incident) for incident in incidents]
+    incidents = await db.incidents.find({}, INCIDENT_PROJECTION).sort("created_at", -1).to_list(100)
+    return FastJSONResponse(trusted_docs(incidents, INCIDENT_DEFAULTS))
+
+# Incident priority queue and SLA escalation
+# Open incidents are kept ordered by (priority, age) in memory; a timer wheel emits
+# incident_escalated when the SLA warning/breach threshold of an incident is reached.
+INCIDENT_QUEUE_RESYNC_SECONDS = int(os.getenv("INCIDENT_QUEUE_RESYNC_SECONDS", "300"))
+INCIDENT_QUEUE_FIELDS = {"_id": 0, "id": 1, "priority": 1, "status": 1, "created_at": 1, "title": 1, "reported_by": 1, "version": 1}
+
+incident_queues = TenantLocal(tenants, IncidentQueue)
+incident_queue = TenantProxy(incident_queues.current)
+
+def sync_incident_queue(incident: Dict[str, Any]):
+    if incident.get("status") == "open" and isinstance(incident.get("created_at"), datetime):
+        incident_queue.upsert(incident)
+    else:
+        incident_queue.remove(incident["id"])
+
+async def load_incident_queue():
+    queue = IncidentQueue(tick_seconds=incident_queue.wheel.tick_seconds)
+    open_incidents = await db.incidents.find({"status": "open"}, INCIDENT_QUEUE_FIELDS).to_list(None)
+    for incident in open_incidents:
+        if isinstance(incident.get("created_at"), datetime):
+            queue.upsert(incident)
+    incident_queues.set(queue)
+
+async def escalate_incidents():
+    for entry, level in incident_queue.tick():
+        await emit_incident_event('incident_escalated', entry.as_incident(), {
+            "title": entry.title,
+            "sla_level": level,
+            "sla_seconds": sla_seconds(entry.priority),
+        })
+
+async def sla_timer_loop():
+    next_tick = last_resync = time.monotonic()
+    while True:
+        next_tick += incident_queue.wheel.tick_seconds
+        await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        await for_each_tenant(escalate_incidents, "SLA timer")
+        if time.monotonic() - last_resync >= INCIDENT_QUEUE_RESYNC_SECONDS:
+            last_resync = time.monotonic()
+            await for_each_tenant(load_incident_queue, "Incident queue resync")
+
+@api_router.get("/incidents/queue")
+async def get_incident_queue(limit: int = 20, current_user: User = Depends(get_current_user)):
+    """Top open incidents by priority and age, with SLA state"""
+    limit = max(1, min(limit, 200))
+    return FastJSONResponse({
+        "total_open": len(incident_queue),
+        "incidents": incident_queue.top(limit)
+    })
 
 @api_router.get("/incidents/{incident_id}", response_model=Incident)
 async def get_incident(incident_id: str, current_user: User = Depends(get_current_user)):
@@ -623,52 +1471,947 @@ async def get_incident(incident_id: str, current_user: User = Depends(get_curren
     return Incident(**incident)
 
 @api_router.put("/incidents/{incident_id}", response_model=Incident)
-async def update_incident(incident_id: str, updates: Dict[str, Any], current_user: User = Depends(get_current_user)):
+async def update_incident(incident_id: str, incident_updates: IncidentUpdate, current_user: User = Depends(get_current_user)):
     # Only police and admin can update incidents
     if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    # Assignment, identity and version are maintained by the server (other fields are ignored)
+    updates = {k: v for k, v in incident_updates.dict().items() if v is not None}
+    current = await db.incidents.find_one({"id": incident_id}, {"_id": 0, "status": 1, "images": 1, "images_pending": 1})
+    if current is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    if "priority" in updates and updates["priority"] not in PRIORITY_CODES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority, use one of: {', '.join(PRIORITY_CODES)}")
+    if "location" in updates and not {"lat", "lng"} <= set(updates["location"]):
+        raise HTTPException(status_code=400, detail="location needs lat and lng")
+    if updates.get("status", current.get("status")) != current.get("status"):
+        if updates["status"] != "open":
+            raise HTTPException(status_code=400, detail="Use /assign or /complete to change the status")
+        # Reopening releases the assignment
+        updates.update({"assigned_to": None, "assigned_to_name": None, "assigned_at": None})
+    if "images" in updates:
+        if current.get("images_pending"):
+            await wait_for_incident_images(incident_id)
+            current = await db.incidents.find_one({"id": incident_id}, {"_id": 0, "status": 1, "images": 1}) or current
+        updates["images"], updates["thumbnails"] = await store_images(updates["images"], existing=current.get("images") or [])
     updates['updated_at'] = datetime.utcnow()
-    result = await db.incidents.update_one({"id": incident_id}, {"$set": updates})
+    previous = await db.incidents.find_one_and_update(
+        {"id": incident_id},
+        {"$set": updates, "$inc": {"version": 1}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Incident not found")
     
-    incident = await db.incidents.find_one({"id": incident_id})
-    incident_obj = Incident(**incident)
+    incident = {**previous, **updates, "version": previous.get("version", 0) + 1}
     
-    # Notify about incident update
-    await sio.emit('incident_updated', incident_obj.dict())
+    # Keep queue, dispatch counts and heatmap in step, as create/assign/complete/delete do
+    sync_incident_queue(incident)
+    if previous.get("status") == "in_progress":
+        dispatch_engine.change_assignments(previous.get("assigned_to"), -1)
+    if incident.get("status") == "in_progress":
+        dispatch_engine.change_assignments(incident.get("assigned_to"), 1)
+    moved = any(previous.get(field) != incident.get(field) for field in ("location", "priority"))
+    if moved and isinstance(previous.get("created_at"), datetime):
+        await record_heatmap_event(previous, "reported", previous["created_at"], -1)
+        await record_heatmap_event(incident, "reported", incident["created_at"])
     
-    return incident_obj
+    # Notify about incident update (changed fields only)
+    await emit_incident_event('incident_updated', incident, updates)
+    
+    return Incident(**incident)
 
 @api_router.get("/messages", response_model=List[Message])
 async def get_messages(channel: str = "general", current_user: User = Depends(get_current_user)):
-    messages = await db.messages.find({"channel": channel}).sort("timestamp", -1).limit(50).to_list(50)
-    return [Message(**message) for message in messages]
+    if channel == DIRECT_CHANNEL:
+        raise HTTPException(status_code=400, detail="Use /conversations for direct messages")
+    messages = await db.messages.find({"channel": channel}, MESSAGE_PROJECTION).sort("timestamp", -1).limit(50).to_list(50)
+    return FastJSONResponse(trusted_docs(messages, MESSAGE_DEFAULTS))
 
 @api_router.post("/messages", response_model=Message)
-async def send_message(message_data: MessageCreate, current_user: User = Depends(get_current_user)):
+async def send_message(message_data: MessageCreate, current_user: User = Depends(rate_limited("message"))):
     message_dict = message_data.dict()
     message_dict['sender_id'] = current_user.id
     message_dict['sender_name'] = current_user.username  # Add sender name
     message_dict['created_at'] = datetime.utcnow()  # Add timestamp
+    
+    recipient = None
+    if message_data.recipient_id:
+        if message_data.recipient_id == current_user.id:
+            raise HTTPException(status_code=400, detail="Cannot send a direct message to yourself")
+        recipient = await db.users.find_one(
+            {"id": message_data.recipient_id}, {"_id": 0, "id": 1, "username": 1}
+        )
+        if not recipient:
+            raise HTTPException(status_code=404, detail="Recipient not found")
+        message_dict['channel'] = DIRECT_CHANNEL
+        message_dict['conversation_id'] = conversation_id_for(current_user.id, recipient["id"])
+    else:
+        message_dict['seq'] = await next_channel_seq(message_data.channel)
+    
     message_obj = Message(**message_dict)
     
     await db.messages.insert_one(message_obj.dict())
     
-    # Emit to socket room
-    await sio.emit('new_message', message_obj.dict(), room=message_data.channel)
+    if recipient:
+        await touch_conversation(message_obj, current_user, recipient)
+        # One targeted emit to both participants (all of their devices)
+        await tenant_emit('new_message', message_obj.dict(),
+                          to=[user_room(current_user.id), user_room(recipient["id"])])
+    else:
+        # Emit to socket room
+        await publish_channel_message(message_obj.dict())
     
     return message_obj
 
+async def touch_conversation(message: Message, sender: User, recipient: Dict[str, Any]):
+    """Upsert the conversation summary and bump the recipient's unread counter"""
+    await db.conversations.update_one(
+        {"id": message.conversation_id},
+        {
+            "$set": {
+                "last_message": {
+                    "id": message.id,
+                    "content": message.content[:200],
+                    "sender_id": sender.id,
+                    "sender_name": sender.username,
+                    "timestamp": message.timestamp,
+                },
+                "updated_at": message.timestamp,
+            },
+            "$setOnInsert": {
+                "participants": sorted([sender.id, recipient["id"]]),
+                "participant_names": {sender.id: sender.username, recipient["id"]: recipient["username"]},
+                "created_at": message.timestamp,
+            },
+            "$inc": {f"unread.{recipient['id']}": 1},
+        },
+        upsert=True
+    )
+
+def conversation_view(conversation: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    conversation["unread_count"] = conversation.pop("unread", {}).get(user_id, 0)
+    return conversation
+
+@api_router.get("/conversations", response_model=List[Conversation])
+async def get_conversations(current_user: User = Depends(get_current_user)):
+    """Inbox of the current user, most recent conversation first"""
+    conversations = await db.conversations.find(
+        {"participants": current_user.id}, {"_id": 0}
+    ).sort("updated_at", -1).limit(100).to_list(100)
+    return FastJSONResponse([conversation_view(c, current_user.id) for c in conversations])
+
+@api_router.get("/conversations/{conversation_id}/messages", response_model=List[Message])
+async def get_conversation_messages(
+    conversation_id: str,
+    before: Optional[datetime] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user)
+):
+    conversation = await db.conversations.find_one(
+        {"id": conversation_id, "participants": current_user.id}, {"_id": 0, "id": 1}
+    )
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    query = {"conversation_id": conversation_id}
+    if before:
+        query["timestamp"] = {"$lt": before}
+    limit = max(1, min(limit, 200))
+    messages = await db.messages.find(query, MESSAGE_PROJECTION).sort("timestamp", -1).limit(limit).to_list(limit)
+    return FastJSONResponse(trusted_docs(messages, MESSAGE_DEFAULTS))
+
+@api_router.post("/conversations/{conversation_id}/read")
+async def mark_conversation_read(conversation_id: str, current_user: User = Depends(get_current_user)):
+    result = await db.conversations.update_one(
+        {"id": conversation_id, "participants": current_user.id},
+        {"$set": {f"unread.{current_user.id}": 0}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    # Sync the badge across the user's other devices
+    await tenant_emit('conversation_read', {'conversation_id': conversation_id}, to=user_room(current_user.id))
+    
+    return {"status": "success", "conversation_id": conversation_id}
+
+# Unread counters and read receipts
+# Every channel message gets a per-channel sequence number from `channel_counters`.
+# A user's unread count is the channel seq minus the seq stored in their read cursor,
+# so all badges come from two small indexed reads instead of a count per channel.
+ACK_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACK_FLUSH_INTERVAL_SECONDS", "1.0"))
+ACK_FLUSH_MAX_PENDING = 500
+
+class ReadAck(BaseModel):
+    channel: str
+    seq: int
+
+async def next_channel_seq(channel: str) -> int:
+    counter = await db.channel_counters.find_one_and_update(
+        {"channel": channel},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"]
+
+def channel_audience_rooms(channel: str) -> List[str]:
+    """Rooms of everyone with a badge for the channel (joined at connect, unlike channel rooms)"""
+    if channel.startswith(PRIVATE_ROOM_PREFIXES):
+        return [channel]  # role/department members, or the user/conversation itself
+    return [TENANT_BROADCAST_ROOM]
+
+async def publish_channel_message(message: Dict[str, Any]):
+    """Emit a new channel message to its room and the badge update to the channel's audience"""
+    await tenant_emit('new_message', message, to=message["channel"])
+    await tenant_emit('badge_update', {'channel': message["channel"], 'seq': message["seq"]},
+                      to=channel_audience_rooms(message["channel"]))
+
+class ReadAckBuffer:
+    """Collects read acknowledgements and writes them to Mongo in batches"""
+    
+    def __init__(self):
+        self.pending = {}  # {user_id: {channel: seq}}
+        self.size = 0
+    
+    def add(self, user_id: str, channel: str, seq: int) -> bool:
+        """Buffer an ack, returns True when the buffer should be flushed now"""
+        channels = self.pending.setdefault(user_id, {})
+        if channel not in channels:
+            self.size += 1
+        if seq > channels.get(channel, 0):
+            channels[channel] = seq
+        return self.size >= ACK_FLUSH_MAX_PENDING
+    
+    def pending_for(self, user_id: str) -> Dict[str, int]:
+        return self.pending.get(user_id, {})
+    
+    async def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending, self.size = self.pending, {}, 0
+        now = datetime.utcnow()
+        
+        operations = []
+        receipts = {}  # {channel: [{user_id, seq}]}
+        for user_id, channels in pending.items():
+            for channel, seq in channels.items():
+                operations.append(UpdateOne(
+                    {"user_id": user_id, "channel": channel},
+                    {"$max": {"seq": seq}, "$set": {"read_at": now}},
+                    upsert=True
+                ))
+                receipts.setdefault(channel, []).append({"user_id": user_id, "seq": seq})
+        
+        try:
+            await db.read_cursors.bulk_write(operations, ordered=False)
+        except Exception:
+            # Keep the acks for the next flush; add() keeps the highest seq per channel
+            for user_id, channels in pending.items():
+                for channel, seq in channels.items():
+                    self.add(user_id, channel, seq)
+            raise
+        
+        # One batched read receipt event per channel
+        for channel, entries in receipts.items():
+            await tenant_emit('read_receipts', {'channel': channel, 'receipts': entries}, to=channel)
+
+read_ack_buffers = TenantLocal(tenants, ReadAckBuffer)
+read_acks = TenantProxy(read_ack_buffers.current)
+
+async def flush_read_acks():
+    await read_acks.flush()
+
+async def read_ack_flush_loop():
+    while True:
+        await asyncio.sleep(ACK_FLUSH_INTERVAL_SECONDS)
+        await for_each_tenant(flush_read_acks, "Flushing read acknowledgements")
+
+async def acknowledge_reads(user_id: str, acks: List[Dict[str, Any]]):
+    flush_now = False
+    for ack in acks:
+        channel, seq = ack.get("channel"), ack.get("seq")
+        if isinstance(channel, str) and isinstance(seq, int) and channel != DIRECT_CHANNEL:
+            flush_now = read_acks.add(user_id, channel, seq) or flush_now
+    if flush_now:
+        await read_acks.flush()
+
+@api_router.post("/messages/read")
+async def mark_messages_read(acks: List[ReadAck], current_user: User = Depends(get_current_user)):
+    """Acknowledge reads up to a sequence number per channel (batched write)"""
+    await acknowledge_reads(current_user.id, [ack.dict() for ack in acks])
+    return {"status": "accepted", "count": len(acks)}
+
+async def collect_unread_counts(user_id: str) -> Dict[str, Any]:
+    counters, cursors, conversations = await asyncio.gather(
+        db.channel_counters.find({}, {"_id": 0, "channel": 1, "seq": 1}).to_list(None),
+        db.read_cursors.find({"user_id": user_id}, {"_id": 0, "channel": 1, "seq": 1}).to_list(None),
+        db.conversations.find(
+            {"participants": user_id, f"unread.{user_id}": {"$gt": 0}},
+            {"_id": 0, "id": 1, "unread": 1}
+        ).to_list(None),
+    )
+    
+    read_seq = {cursor["channel"]: cursor["seq"] for cursor in cursors}
+    for channel, seq in read_acks.pending_for(user_id).items():
+        read_seq[channel] = max(seq, read_seq.get(channel, 0))
+    
+    channels = {
+        counter["channel"]: max(0, counter["seq"] - read_seq.get(counter["channel"], 0))
+        for counter in counters
+    }
+    direct = {c["id"]: c["unread"][user_id] for c in conversations}
+    
+    return {
+        "channels": channels,
+        "conversations": direct,
+        "total": sum(channels.values()) + sum(direct.values())
+    }
+
+@api_router.get("/messages/unread")
+async def get_unread_counts(current_user: User = Depends(get_current_user)):
+    """Unread counts for all channels and direct conversations in one call"""
+    return await collect_unread_counts(current_user.id)
+
+# Message retention and archiving
+# Old messages are moved out of the hot `messages` collection into monthly,
+# compressed archive collections so the working set and its indexes stay in RAM.
+DEFAULT_MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DEFAULT_DAYS", "30"))
+MESSAGE_RETENTION_DAYS = {
+    "general": 30,
+    "incidents": 90,
+    "emergency": 365,
+    "direct": 90,
+}
+# Override per channel, e.g. MESSAGE_RETENTION="general=14,emergency=365"
+for _policy in filter(None, os.getenv("MESSAGE_RETENTION", "").split(",")):
+    _channel, _, _days = _policy.partition("=")
+    MESSAGE_RETENTION_DAYS[_channel.strip()] = int(_days)
+
+MESSAGE_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("MESSAGE_ARCHIVE_INTERVAL_SECONDS", "3600"))
+MESSAGE_ARCHIVE_BATCH_SIZE = 1000
+MESSAGE_ARCHIVE_PREFIX = "messages_archive_"
+
+_archive_collection_sets = TenantLocal(tenants, set)
+_archive_collections = TenantProxy(_archive_collection_sets.current)  # archive collections known to exist (with indexes)
+
+def archive_collection_name(timestamp: datetime) -> str:
+    return f"{MESSAGE_ARCHIVE_PREFIX}{timestamp.year:04d}_{timestamp.month:02d}"
+
+def archive_months(start: datetime, end: datetime) -> List[str]:
+    """Archive collection names covering [start, end], newest first"""
+    names = []
+    year, month = end.year, end.month
+    while (year, month) >= (start.year, start.month):
+        names.append(f"{MESSAGE_ARCHIVE_PREFIX}{year:04d}_{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return names
+
+async def create_compressed_collection(name: str):
+    try:
+        # zstd block compression; archived history is rarely read
+        await db.create_collection(
+            name, storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}}
+        )
+    except CollectionInvalid:
+        pass  # already exists
+    except OperationFailure as e:
+        logger.warning(f"Archive collection {name} created without compression: {e}")
+
+async def ensure_archive_collection(name: str):
+    if name in _archive_collections:
+        return
+    await create_compressed_collection(name)
+    await db[name].create_index([("channel", 1), ("timestamp", -1)])
+    await db[name].create_index("id", unique=True)
+    _archive_collections.add(name)
+
+async def archive_expired_messages(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Move messages older than their channel's retention into monthly archives"""
+    now = now or datetime.utcnow()
+    channels = set(await db.messages.distinct("channel")) | set(MESSAGE_RETENTION_DAYS)
+    archived = {}
+    
+    for channel in channels:
+        days = MESSAGE_RETENTION_DAYS.get(channel, DEFAULT_MESSAGE_RETENTION_DAYS)
+        cutoff = now - timedelta(days=days)
+        moved = 0
+        
+        while True:
+            batch = await db.messages.find(
+                {"channel": channel, "timestamp": {"$lt": cutoff}}, {"_id": 0}
+            ).sort("timestamp", 1).limit(MESSAGE_ARCHIVE_BATCH_SIZE).to_list(MESSAGE_ARCHIVE_BATCH_SIZE)
+            if not batch:
+                break
+            
+            by_month = {}
+            for message in batch:
+                by_month.setdefault(archive_collection_name(message["timestamp"]), []).append(message)
+            
+            for name, messages in by_month.items():
+                await ensure_archive_collection(name)
+                try:
+                    await db[name].insert_many(messages, ordered=False)
+                except BulkWriteError as e:
+                    # Duplicates from an interrupted previous run are fine; anything else
+                    # must keep the messages in place
+                    errors = e.details.get("writeErrors", [])
+                    if e.details.get("writeConcernErrors") or any(error.get("code") != 11000 for error in errors):
+                        raise
+            
+            await db.messages.delete_many({"id": {"$in": [m["id"] for m in batch]}})
+            moved += len(batch)
+        
+        if moved:
+            archived[channel] = moved
+    
+    return archived
+
+async def message_archiver_loop():
+    while True:
+        archived = await for_each_tenant(archive_expired_messages, "Message archiving")
+        for tenant_id, counts in archived.items():
+            if counts:
+                logger.info(f"Archived messages ({tenant_id}): {counts}")
+        await asyncio.sleep(MESSAGE_ARCHIVE_INTERVAL_SECONDS)
+
+@api_router.get("/messages/archive")
+async def get_archived_messages(
+    channel: str = "general",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user)
+):
+    """Query archived message history of a channel, newest first"""
+    if channel == DIRECT_CHANNEL:
+        raise HTTPException(status_code=400, detail="Use /conversations for direct messages")
+    end = naive_utc(end) or datetime.utcnow()
+    start = naive_utc(start) or end - timedelta(days=365)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    limit = max(1, min(limit, 500))
+    
+    existing = set(await db.list_collection_names())
+    results = []
+    for name in archive_months(start, end):
+        if name not in existing:
+            continue
+        remaining = limit - len(results)
+        results.extend(await db[name].find(
+            {"channel": channel, "timestamp": {"$gte": start, "$lte": end}}, MESSAGE_PROJECTION
+        ).sort("timestamp", -1).limit(remaining).to_list(remaining))
+        if len(results) >= limit:
+            break
+    
+    return FastJSONResponse(trusted_docs(results, MESSAGE_DEFAULTS))
+
+@api_router.post("/admin/messages/archive")
+async def run_message_archiver(current_user: User = Depends(get_current_user)):
+    """Run the message archiver immediately (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    archived = await archive_expired_messages()
+    return {"status": "success", "archived": archived, "total_archived": sum(archived.values())}
+
+# Incident archive
+# Completed incidents are kept in incidents_archive in compact form (see incident_archive.py),
+# their images in the blob store (GridFS by default, S3 with BLOB_STORE=s3).
+BLOB_STORE = os.getenv("BLOB_STORE", "gridfs")
+
+def create_blob_store():
+    """Blob store of the current tenant (its database, or its own prefix in the S3 bucket)"""
+    if BLOB_STORE == "s3":
+        prefix = os.getenv("BLOB_S3_PREFIX", "incident-images/")
+        if tenants.current_id() != tenants.default:
+            prefix = f"{prefix}{tenants.current_id()}/"
+        return S3BlobStore(os.environ["BLOB_S3_BUCKET"], prefix, os.getenv("BLOB_S3_ENDPOINT"))
+    return GridFSBlobStore(tenant_databases.current(), "incident_images")
+
+blob_stores = TenantLocal(tenants, create_blob_store)  # cleared by set_database
+blob_store = TenantProxy(blob_stores.current)
+
+ARCHIVE_DEFAULT_DAYS = 30
+
+# Incident images
+# Uploaded photos are transcoded in a process pool (see images.py) into a full and a
+# thumbnail variant without metadata and stored in the blob store; incidents keep only
+# the keys. image_sources maps the SHA-256 of an original to its variants, so a photo
+# that is attached again is neither processed nor stored twice.
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(15 * 1024 * 1024)))
+
+image_pipeline = ImagePipeline(
+    workers=int(os.getenv("IMAGE_WORKERS", "2")),
+    image_format=os.getenv("IMAGE_FORMAT", "webp"),
+    full_max_px=int(os.getenv("IMAGE_FULL_MAX_PX", "1600")),
+    thumb_max_px=int(os.getenv("IMAGE_THUMB_MAX_PX", "320")),
+    quality=int(os.getenv("IMAGE_QUALITY", "80")),
+)
+
+def decode_upload(value: str) -> Tuple[bytes, str]:
+    """Bytes and source key of a base64 upload"""
+    data, _ = decode_base64_image(value)
+    if len(data) > IMAGE_MAX_BYTES:
+        raise ValueError(f"larger than {IMAGE_MAX_BYTES} bytes")
+    return data, content_key(data)
+
+async def transcode_uploads(uploads: Dict[str, bytes], invalid: Callable[[Exception], None]) -> Dict[str, Dict[str, Any]]:
+    """image_sources documents for new originals (source key -> bytes); invalid ones go to invalid"""
+    # Transcoded concurrently in the worker processes
+    sources = list(uploads)
+    results = await asyncio.gather(*(image_pipeline.process(uploads[k]) for k in sources), return_exceptions=True)
+    docs = {}
+    for source_key, result in zip(sources, results):
+        if isinstance(result, ValueError):
+            invalid(result)
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        doc = {
+            "_id": source_key,
+            "full": await blob_store.put(result["full"], result["content_type"]),
+            "thumb": await blob_store.put(result["thumb"], result["content_type"]),
+            "width": result["width"],
+            "height": result["height"],
+            "source_bytes": len(uploads[source_key]),
+            "created_at": datetime.utcnow(),
+        }
+        await db.image_sources.replace_one({"_id": source_key}, doc, upsert=True)
+        docs[source_key] = doc
+    return docs
+
+async def store_images(values: List[str], strict: bool = True, existing: Sequence[str] = (),
+                       deferred: Optional[Dict[str, bytes]] = None) -> Tuple[List[str], List[str]]:
+    """(image keys, thumbnail keys) for base64 uploads and already stored image keys
+
+    Keys must come from the image pipeline or be in existing (the incident's current
+    images). Invalid images are rejected with 400, or skipped with strict=False.
+    With deferred, uploads that still need transcoding are left out and collected
+    there instead (source key -> bytes), see schedule_incident_images.
+    """
+    def invalid(e: Exception):
+        if strict:
+            raise HTTPException(status_code=400, detail=f"Invalid image: {e}")
+        logger.warning(f"Skipping invalid image: {e}")
+    
+    entries = []  # ("full", image key) or ("_id", source key)
+    uploads = {}  # source key -> bytes
+    for value in values:
+        if is_image_key(value):
+            entries.append(("full", value))
+            continue
+        try:
+            # Decoding and hashing several MB stays off the event loop as well
+            data, source_key = await asyncio.to_thread(decode_upload, value)
+        except ValueError as e:
+            invalid(e)
+            continue
+        uploads.setdefault(source_key, data)
+        entries.append(("_id", source_key))
+    if not entries:
+        return [], []
+    
+    known = {}
+    async for doc in db.image_sources.find({"$or": [
+        {"_id": {"$in": list(uploads)}},
+        {"full": {"$in": [key for field, key in entries if field == "full"]}},
+    ]}):
+        known[("_id", doc["_id"])] = known[("full", doc["full"])] = doc
+    
+    missing = {source_key: data for source_key, data in uploads.items() if ("_id", source_key) not in known}
+    if deferred is not None:
+        deferred.update(missing)
+    elif missing:
+        for source_key, doc in (await transcode_uploads(missing, invalid)).items():
+            known[("_id", source_key)] = doc
+    
+    images, thumbnails = [], []
+    for field, key in entries:
+        doc = known.get((field, key))
+        if field == "full":
+            if doc is None and key not in existing:
+                invalid(ValueError(f"unknown image key {key}"))
+                continue
+            # Keys without a source entry (e.g. older archive images) have no thumbnail
+            images.append(key)
+            thumbnails.append(doc["thumb"] if doc else key)
+        elif doc is not None:
+            images.append(doc["full"])
+            thumbnails.append(doc["thumb"])
+    return images, thumbnails
+
+# Uploads of new incidents are transcoded after the response: the incident is stored
+# with images_pending set and gets its images (and an incident_updated event) when the
+# worker processes are done. Updates and completion wait for a running transcode first.
+incident_image_tasks: Dict[str, asyncio.Task] = {}
+
+def schedule_incident_images(incident_id: str, uploads: Dict[str, bytes]) -> asyncio.Task:
+    task = asyncio.create_task(finish_incident_images(incident_id, uploads))
+    incident_image_tasks[incident_id] = task
+    task.add_done_callback(lambda _: incident_image_tasks.pop(incident_id, None))
+    return task
+
+async def wait_for_incident_images(incident_id: str):
+    task = incident_image_tasks.get(incident_id)
+    if task is not None:
+        await asyncio.shield(task)
+
+async def finish_incident_images(incident_id: str, uploads: Dict[str, bytes]):
+    """Transcode the uploads of a new incident and append them to its images"""
+    try:
+        docs = await transcode_uploads(uploads, lambda e: logger.warning(f"Skipping invalid image of incident {incident_id}: {e}"))
+    except Exception:
+        logger.exception(f"Transcoding images of incident {incident_id} failed")
+        docs = {}
+    changed = {
+        "images": [docs[k]["full"] for k in uploads if k in docs],
+        "thumbnails": [docs[k]["thumb"] for k in uploads if k in docs],
+    }
+    incident = await db.incidents.find_one_and_update(
+        {"id": incident_id},
+        {
+            "$push": {field: {"$each": keys} for field, keys in changed.items()},
+            "$inc": {"version": 1, "images_pending": -len(uploads)},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if incident is None:
+        return  # deleted in the meantime
+    changed = {field: incident[field] for field in ("images", "thumbnails", "images_pending", "updated_at")}
+    await emit_incident_event('incident_updated', incident, changed)
+
+async def store_incident_images(incident: Dict[str, Any]) -> List[str]:
+    """Image keys of an incident; base64 images stored before the pipeline are transcoded now"""
+    images, _ = await store_images(incident.get("images") or [], strict=False, existing=incident.get("images") or [])
+    return images
+
+@api_router.get("/images/{key}")
+async def get_image(key: str, current_user: User = Depends(get_current_user)):
+    """An incident image or thumbnail by key"""
+    blob = await blob_store.get(key) if is_image_key(key) else None
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    data, content_type = blob
+    # Content-addressed, never changes
+    return Response(content=data, media_type=content_type, headers={"Cache-Control": "private, max-age=31536000, immutable"})
+
+def require_archive_access(current_user: User):
+    if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+def archive_window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = naive_utc(end) or datetime.utcnow()
+    start = naive_utc(start) or end - timedelta(days=ARCHIVE_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+def require_priority(priority: Optional[str]):
+    if priority is not None and priority not in PRIORITY_CODES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority, use one of: {', '.join(PRIORITY_CODES)}")
+
+@api_router.get("/archive/incidents")
+async def get_archived_incidents(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    priority: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user)
+):
+    """Completed incidents by completion time, newest first (default: last 30 days)"""
+    require_archive_access(current_user)
+    require_priority(priority)
+    start, end = archive_window(start, end)
+    limit = max(1, min(limit, 500))
+    
+    docs = await db.incidents_archive.find(
+        archive_query(start, end, priority, assigned_to), {"d": 0}
+    ).sort("xa", -1).limit(limit).to_list(limit)
+    return FastJSONResponse([decode_archived_incident(doc) for doc in docs])
+
+@api_router.get("/archive/incidents/{incident_id}")
+async def get_archived_incident(incident_id: str, current_user: User = Depends(get_current_user)):
+    require_archive_access(current_user)
+    doc = await db.incidents_archive.find_one({"_id": incident_id})
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Archived incident not found")
+    incident = decode_archived_incident(doc)
+    incident["images"] = [f"/api/archive/incidents/{incident_id}/images/{i}" for i in range(len(doc.get("img", [])))]
+    return FastJSONResponse(incident)
+
+@api_router.get("/archive/incidents/{incident_id}/images/{index}")
+async def get_archived_incident_image(incident_id: str, index: int, current_user: User = Depends(get_current_user)):
+    require_archive_access(current_user)
+    doc = await db.incidents_archive.find_one({"_id": incident_id}, {"img": 1})
+    keys = (doc or {}).get("img", [])
+    if not 0 <= index < len(keys):
+        raise HTTPException(status_code=404, detail="Image not found")
+    blob = await blob_store.get(keys[index])
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    data, content_type = blob
+    # Content-addressed, never changes
+    return Response(content=data, media_type=content_type, headers={"Cache-Control": "private, max-age=31536000, immutable"})
+
+@api_router.get("/analytics/incidents")
+async def get_incident_analytics(
+    group_by: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    priority: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Counts, resolution and response times of completed incidents, grouped by day/month/priority/assignee"""
+    require_archive_access(current_user)
+    require_priority(priority)
+    if group_by not in ANALYTICS_GROUPS:
+        raise HTTPException(status_code=400, detail=f"Unknown grouping, use one of: {', '.join(ANALYTICS_GROUPS)}")
+    start, end = archive_window(start, end)
+    
+    rows = await db.incidents_archive.aggregate(
+        analytics_pipeline(archive_query(start, end, priority, assigned_to), group_by)
+    ).to_list(None)
+    return FastJSONResponse({
+        "start": start,
+        "end": end,
+        "group_by": group_by,
+        "total": sum(row["count"] for row in rows),
+        "groups": [analytics_row(row, group_by) for row in rows]
+    })
+
+# Incident heatmap
+# Counts per geohash cell and day in heatmap_tiles, one set of tiles per precision.
+# create/complete increment the tiles, delete takes the report back; a viewport query touches at most
+# HEATMAP_MAX_CELLS cells per day, independent of the number of incidents.
+# Precision 4 ~ 39 km, 5 ~ 4.9 km, 6 ~ 1.2 x 0.6 km, 7 ~ 153 m cells
+HEATMAP_PRECISIONS = tuple(int(p) for p in os.getenv("HEATMAP_PRECISIONS", "4,5,6,7").split(","))
+HEATMAP_MAX_CELLS = int(os.getenv("HEATMAP_MAX_CELLS", "2500"))
+HEATMAP_DEFAULT_DAYS = 30
+HEATMAP_TILE_KEY = [("precision", 1), ("cell", 1), ("day", 1)]
+
+async def record_heatmap_event(incident: Dict[str, Any], kind: str, ts: datetime, count: int = 1):
+    location = incident.get("location") or {}
+    try:
+        increments = event_increments(location, ts, kind, incident.get("priority"), HEATMAP_PRECISIONS, count)
+    except (KeyError, TypeError, ValueError):
+        return
+    try:
+        await db.heatmap_tiles.bulk_write(
+            [UpdateOne(key, {"$inc": inc}, upsert=True) for key, inc in increments], ordered=False
+        )
+    except Exception as e:
+        # Tiles are derived data; a rebuild repairs them
+        logger.warning(f"Heatmap update failed for incident {incident.get('id')}: {e}")
+
+async def rebuild_heatmap() -> int:
+    """Recompute all tiles from open and archived incidents"""
+    lat, lng, ts, kinds, priorities = [], [], [], [], []
+    
+    def add(location, when, kind, priority):
+        try:
+            point = float(location["lat"]), float(location["lng"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if not isinstance(when, datetime):
+            return
+        lat.append(point[0])
+        lng.append(point[1])
+        ts.append(when)
+        kinds.append(kind)
+        priorities.append(priority)
+    
+    async for incident in db.incidents.find({}, {"_id": 0, "location": 1, "priority": 1, "created_at": 1}, batch_size=5000):
+        add(incident.get("location"), incident.get("created_at"), "reported", incident.get("priority"))
+    async for doc in db.incidents_archive.find({"loc": {"$exists": True}}, {"loc": 1, "p": 1, "ca": 1, "xa": 1}, batch_size=5000):
+        location = {"lat": doc["loc"][1], "lng": doc["loc"][0]}
+        add(location, doc.get("ca"), "reported", PRIORITY_NAMES.get(doc.get("p")))
+        add(location, doc.get("xa"), "completed", None)
+    
+    tiles = await asyncio.to_thread(aggregate_tiles, lat, lng, ts, kinds, priorities, HEATMAP_PRECISIONS)
+    if not tiles:
+        await db.heatmap_tiles.delete_many({})
+        return 0
+    
+    # Build the new tiles next to the old ones and swap them in with one rename,
+    # so readers never see a half-filled heatmap
+    staging = db.heatmap_tiles_rebuild
+    await staging.drop()
+    for i in range(0, len(tiles), 5000):
+        await staging.insert_many(tiles[i:i + 5000], ordered=False)
+    await staging.create_index(HEATMAP_TILE_KEY, unique=True)
+    await staging.rename("heatmap_tiles", dropTarget=True)
+    return len(tiles)
+
+@api_router.get("/analytics/heatmap")
+async def get_heatmap(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    precision: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Reported/completed incident counts per cell for a viewport and date range (inclusive)"""
+    if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise HTTPException(status_code=400, detail="Invalid viewport")
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=HEATMAP_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    
+    if precision is None:
+        precision = pick_precision(south, west, north, east, HEATMAP_PRECISIONS, HEATMAP_MAX_CELLS)
+        if precision is None:
+            raise HTTPException(status_code=400, detail="Viewport too large, zoom in")
+    elif precision not in HEATMAP_PRECISIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown precision, use one of: {', '.join(map(str, HEATMAP_PRECISIONS))}")
+    cells = viewport_cells(south, west, north, east, precision)
+    if len(cells) > HEATMAP_MAX_CELLS:
+        raise HTTPException(status_code=400, detail="Viewport too large for this precision")
+    
+    rows = await db.heatmap_tiles.aggregate([
+        {"$match": {
+            "precision": precision,
+            "cell": {"$in": cells},
+            "day": {"$gte": day_bucket(start), "$lte": day_bucket(end)}
+        }},
+        {"$group": {"_id": "$cell", **{name: {"$sum": f"${name}"} for name in TILE_COUNTERS}}},
+        {"$sort": {"reported": -1}}
+    ]).to_list(None)
+    
+    result = []
+    for row in rows:
+        if not row["reported"] and not row["completed"]:
+            continue  # only deleted incidents left in this cell
+        cell_south, cell_west, cell_north, cell_east = cell_bounds(row["_id"])
+        result.append({
+            "cell": row["_id"],
+            "lat": (cell_south + cell_north) / 2,
+            "lng": (cell_west + cell_east) / 2,
+            "bounds": [cell_south, cell_west, cell_north, cell_east],
+            **{name: row[name] for name in TILE_COUNTERS}
+        })
+    return FastJSONResponse({
+        "precision": precision,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "max": max((cell["reported"] for cell in result), default=0),
+        "cells": result
+    })
+
+@api_router.post("/admin/heatmap/rebuild")
+async def rebuild_heatmap_tiles(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    tiles = await rebuild_heatmap()
+    return {"status": "success", "tiles": tiles}
+
+# Streaming export
+# Date-range exports for the monthly statistics. Documents are streamed from the
+# cursor in batches and encoded chunk by chunk, so memory stays constant.
+EXPORT_COLUMNS = {
+    "reports": [
+        ("id", "id"), ("title", "title"), ("content", "content"), ("author_id", "author_id"),
+        ("author_name", "author_name"), ("shift_date", "shift_date"), ("status", "status"),
+        ("created_at", "created_at"), ("updated_at", "updated_at"),
+    ],
+    "incidents": [
+        ("incident_id", "id"), ("title", "title"), ("description", "description"), ("priority", "priority"),
+        ("address", "address"), ("lat", "location.lat"), ("lng", "location.lng"), ("reported_by", "reported_by"),
+        ("assigned_to", "assigned_to"), ("assigned_to_name", "assigned_to_name"), ("completed_by", "completed_by"),
+        ("completed_by_name", "completed_by_name"), ("created_at", "created_at"), ("assigned_at", "assigned_at"),
+        ("completed_at", "completed_at"), ("resolution_seconds", "resolution_seconds"),
+        ("response_seconds", "response_seconds"), ("image_count", "image_count"),
+    ],
+    "messages": [
+        ("id", "id"), ("channel", "channel"), ("seq", "seq"), ("sender_id", "sender_id"),
+        ("sender_name", "sender_name"), ("content", "content"), ("message_type", "message_type"),
+        ("timestamp", "timestamp"),
+    ],
+    "locations": [
+        ("user_id", "user_id"), ("lat", "location.lat"), ("lng", "location.lng"), ("timestamp", "timestamp"),
+    ],
+}
+EXPORT_DEFAULT_BATCH_SIZE = 500
+
+async def decoded_archive(cursor):
+    async for doc in cursor:
+        yield decode_archived_incident(doc)
+
+def export_cursors(dataset: str, start: datetime, end: datetime, batch_size: int,
+                   channel: Optional[str], existing_collections: set) -> List[Any]:
+    def cursor(collection, query, time_field):
+        projection = {"_id": 0, **{path.split(".")[0]: 1 for _, path in EXPORT_COLUMNS[dataset]}}
+        query[time_field] = {"$gte": start, "$lt": end}
+        return collection.find(query, projection, batch_size=batch_size).sort(time_field, 1)
+    
+    if dataset == "reports":
+        return [cursor(db.reports, {"incident_id": {"$exists": False}}, "created_at")]
+    if dataset == "incidents":
+        archived = db.incidents_archive.find(archive_query(start, end), batch_size=batch_size).sort("xa", 1)
+        return [decoded_archive(archived)]
+    if dataset == "locations":
+        return [cursor(db.locations, {}, "timestamp")]
+    
+    # Messages: monthly archives (oldest first), then the live collection.
+    # Direct messages are only exported when asked for explicitly.
+    query = {"channel": channel} if channel else {"channel": {"$ne": DIRECT_CHANNEL}}
+    archives = [name for name in reversed(archive_months(start, end)) if name in existing_collections]
+    return [cursor(db[name], dict(query), "timestamp") for name in archives] + \
+        [cursor(db.messages, dict(query), "timestamp")]
+
+@api_router.get("/admin/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    format: str = "csv",
+    gzip: bool = False,
+    channel: Optional[str] = None,
+    batch_size: int = EXPORT_DEFAULT_BATCH_SIZE,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream reports, archived incidents, messages or location tracks as CSV/NDJSON (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if dataset not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset, use one of: {', '.join(EXPORT_COLUMNS)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format, use one of: {', '.join(EXPORT_FORMATS)}")
+    start, end = naive_utc(start), naive_utc(end) or datetime.utcnow()
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    batch_size = max(1, min(batch_size, 10000))
+    
+    existing = set(await db.list_collection_names()) if dataset == "messages" else set()
+    cursors = export_cursors(dataset, start, end, batch_size, channel, existing)
+    filename = export_filename(dataset, start, end, format, gzip)
+    return StreamingResponse(
+        encode_rows(chain_cursors(cursors), EXPORT_COLUMNS[dataset], format, gzip),
+        media_type=media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @api_router.get("/users", response_model=List[User])
 async def get_users(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    users = await db.users.find().to_list(100)
-    return [User(**user) for user in users]
+    users = await db.users.find({}, USER_PROJECTION).to_list(100)
+    return FastJSONResponse(trusted_docs(users, USER_DEFAULTS))
 
 @api_router.get("/locations/live")
 async def get_live_locations(current_user: User = Depends(get_current_user)):
@@ -686,36 +2429,81 @@ async def get_live_locations(current_user: User = Depends(get_current_user)):
     
     locations = await db.locations.aggregate(pipeline).to_list(100)
     
-    # Convert ObjectId to string for JSON serialization
-    result = []
-    for loc in locations:
-        location_data = loc["latest_location"]
-        if "_id" in location_data:
-            location_data["_id"] = str(location_data["_id"])
-        result.append(location_data)
-    
-    return result
+    # ObjectId is encoded as string by the fast JSON response
+    return FastJSONResponse([loc["latest_location"] for loc in locations])
 
 @api_router.post("/locations/update")
-async def update_location(location_data: LocationUpdate, current_user: User = Depends(get_current_user)):
+async def update_location(location_data: LocationUpdate, current_user: User = Depends(rate_limited("location"))):
     location_data.user_id = current_user.id
     await db.locations.insert_one(location_data.dict())
     
-    # Emit location update
-    await sio.emit('location_updated', location_data.dict())
+    # Coalesced broadcast (see location_flush_loop)
+    publish_location(location_data.dict())
     
     return {"status": "success"}
 
-# Admin routes
-@api_router.get("/admin/stats")
-async def get_admin_stats(current_user: User = Depends(get_current_user)):
-    if current_user.role != UserRole.ADMIN:
+# Patrol tracks
+# A user's route for a time window, rebuilt from raw location pings: GPS outliers are
+# dropped, the line is simplified (Douglas-Peucker) and sent as an encoded polyline or
+# delta arrays together with distance/speed statistics (see tracks.py).
+TRACK_DEFAULT_HOURS = 12
+TRACK_MAX_HOURS = int(os.getenv("TRACK_MAX_HOURS", "24"))
+TRACK_DEFAULT_TOLERANCE_M = float(os.getenv("TRACK_TOLERANCE_M", "10"))
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+@api_router.get("/locations/track/{user_id}")
+async def get_patrol_track(
+    user_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tolerance: float = TRACK_DEFAULT_TOLERANCE_M,
+    encoding: str = "polyline",
+    current_user: User = Depends(get_current_user)
+):
+    """Simplified route of one user (own track, or any track for admins); defaults to the last 12 hours"""
+    if user_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    
-    total_users = await db.users.count_documents({})
-    total_incidents = await db.incidents.count_documents({})
-    open_incidents = await db.incidents.count_documents({"status": "open"})
-    total_messages = await db.messages.count_documents({})
+    if encoding not in TRACK_ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding, use one of: {', '.join(TRACK_ENCODINGS)}")
+    end = naive_utc(end) or datetime.utcnow()
+    start = naive_utc(start) or end - timedelta(hours=TRACK_DEFAULT_HOURS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(hours=TRACK_MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"Time window is limited to {TRACK_MAX_HOURS} hours")
+    
+    lat: List[float] = []
+    lng: List[float] = []
+    ts: List[float] = []
+    cursor = db.locations.find(
+        {"user_id": user_id, "timestamp": {"$gte": start, "$lt": end}},
+        {"_id": 0, "location.lat": 1, "location.lng": 1, "timestamp": 1},
+        batch_size=5000
+    ).sort("timestamp", 1)
+    async for ping in cursor:
+        location = ping.get("location") or {}
+        try:
+            point = float(location["lat"]), float(location["lng"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        lat.append(point[0])
+        lng.append(point[1])
+        ts.append((ping["timestamp"] - UNIX_EPOCH).total_seconds())
+    
+    # NumPy work off the event loop; a full shift has tens of thousands of pings
+    track = await asyncio.to_thread(build_track, lat, lng, ts, max(tolerance, 0.0), encoding)
+    track.update({"user_id": user_id, "start": start, "end": end})
+    return FastJSONResponse(track)
+
+# Admin routes
+async def collect_admin_stats() -> Dict[str, int]:
+    total_users, total_incidents, open_incidents, total_messages = await asyncio.gather(
+        db.users.count_documents({}),
+        db.incidents.count_documents({}),
+        db.incidents.count_documents({"status": "open"}),
+        # Collection metadata instead of a full count on the growing messages collection
+        db.messages.estimated_document_count(),
+    )
     
     return {
         "total_users": total_users,
@@ -724,21 +2512,91 @@ async def get_admin_stats(current_user: User = Depends(get_current_user)):
         "total_messages": total_messages
     }
 
+@api_router.get("/admin/stats")
+async def get_admin_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await collect_admin_stats()
+
+# Startup snapshot
+# One request instead of /auth/me, /incidents, /reports, /users/by-status, /admin/stats
+# and /messages. Incidents are sent without images (image_count instead). The returned
+# cursor can be passed back as ?since= to receive only incidents, reports and messages
+# changed after the previous snapshot; deleted incidents are detected via incident_ids.
+BOOTSTRAP_CHANNEL = "general"
+BOOTSTRAP_INCIDENT_DEFAULTS = {k: v for k, v in INCIDENT_DEFAULTS.items() if k != "images"}
+BOOTSTRAP_INCIDENT_PROJECTION = {
+    **{field: 1 for field in INCIDENT_PROJECTION if field not in ("_id", "images")},
+    "_id": 0,
+    "image_count": {"$size": {"$ifNull": ["$images", []]}},
+}
+
+async def bootstrap_incidents(since: Optional[datetime]) -> List[Dict[str, Any]]:
+    match = {"updated_at": {"$gt": since}} if since else {}
+    incidents = await db.incidents.aggregate([
+        {"$match": match},
+        {"$sort": {"created_at": -1}},
+        {"$limit": 100},
+        {"$project": BOOTSTRAP_INCIDENT_PROJECTION},
+    ]).to_list(100)
+    return trusted_docs(incidents, BOOTSTRAP_INCIDENT_DEFAULTS)
+
+async def bootstrap_reports(user: User, since: Optional[datetime]) -> List[Dict[str, Any]]:
+    query = visible_reports_filter(user)
+    if since:
+        query["updated_at"] = {"$gt": since}
+    reports = await db.reports.find(query, REPORT_PROJECTION).sort("created_at", -1).to_list(100)
+    return trusted_docs(reports, REPORT_DEFAULTS)
+
+async def bootstrap_messages(since: Optional[datetime]) -> List[Dict[str, Any]]:
+    query = {"channel": BOOTSTRAP_CHANNEL}
+    if since:
+        query["timestamp"] = {"$gt": since}
+    messages = await db.messages.find(query, MESSAGE_PROJECTION).sort("timestamp", -1).limit(50).to_list(50)
+    return trusted_docs(messages, MESSAGE_DEFAULTS)
+
+async def current_incident_ids() -> List[str]:
+    incidents = await db.incidents.find({}, {"_id": 0, "id": 1}).to_list(None)
+    return [incident["id"] for incident in incidents]
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(since: Optional[datetime] = None, current_user: User = Depends(get_current_user)):
+    """Everything the app needs after login, gathered concurrently"""
+    # Taken before the queries so that nothing written meanwhile is missed next time
+    cursor = datetime.utcnow()
+    since = naive_utc(since)
+    
+    parts = {
+        "incidents": bootstrap_incidents(since),
+        "reports": bootstrap_reports(current_user, since),
+        "users_by_status": collect_users_by_status(),
+        "messages": bootstrap_messages(since),
+        "unread": collect_unread_counts(current_user.id),
+    }
+    if current_user.role == UserRole.ADMIN:
+        parts["stats"] = collect_admin_stats()
+    if since:
+        parts["incident_ids"] = current_incident_ids()
+    
+    results = await asyncio.gather(*parts.values())
+    snapshot = dict(zip(parts.keys(), results))
+    snapshot["user"] = current_user.dict()
+    snapshot["channel"] = BOOTSTRAP_CHANNEL
+    snapshot["full"] = since is None
+    snapshot["cursor"] = cursor.isoformat()
+    return FastJSONResponse(snapshot)
+
 # Online Status Management
 @api_router.post("/users/online-status")
 async def set_online_status(current_user: User = Depends(get_current_user)):
     """Mark user as online and update last seen"""
     user_id = current_user.id
     now = datetime.utcnow()
-    
-    online_users[user_id] = {
-        "last_seen": now,
-        "username": current_user.username,
-        "socket_id": None  # Will be updated when socket connects
-    }
+    presence.touch(user_id, current_user.username)
     
     # Notify all clients about user coming online
-    await sio.emit('user_online', {
+    await tenant_emit('user_online', {
         'user_id': user_id,
         'username': current_user.username,
         'timestamp': now.isoformat()
@@ -747,102 +2605,31 @@ async def set_online_status(current_user: User = Depends(get_current_user)):
     return {"status": "online", "user_id": user_id, "timestamp": now}
 
 @api_router.post("/users/heartbeat")
-async def user_heartbeat(current_user: User = Depends(get_current_user)):
+async def user_heartbeat(current_user: User = Depends(rate_limited("heartbeat"))):
     """Update user's last seen timestamp (heartbeat)"""
-    user_id = current_user.id
-    now = datetime.utcnow()
-    
-    if user_id in online_users:
-        online_users[user_id]["last_seen"] = now
-    else:
-        online_users[user_id] = {
-            "last_seen": now,
-            "username": current_user.username,
-            "socket_id": None
-        }
-    
-    return {"status": "heartbeat", "timestamp": now}
+    presence.touch(current_user.id, current_user.username)
+    return {"status": "heartbeat", "timestamp": datetime.utcnow()}
 
 @api_router.get("/users/online")
 async def get_online_users(current_user: User = Depends(get_current_user)):
     """Get list of currently online users"""
-    now = datetime.utcnow()
-    offline_threshold = timedelta(minutes=2)  # Consider offline after 2 minutes
-    
-    online_list = []
-    users_to_remove = []
-    
-    for user_id, data in online_users.items():
-        time_diff = now - data["last_seen"]
-        if time_diff <= offline_threshold:
-            online_list.append({
-                "user_id": user_id,
-                "username": data["username"],
-                "last_seen": data["last_seen"].isoformat(),
-                "minutes_ago": int(time_diff.total_seconds() / 60)
-            })
-        else:
-            users_to_remove.append(user_id)
+    # Clean up offline users (not seen for PRESENCE_OFFLINE_AFTER)
+    for user_id in presence.expire():
+        await tenant_emit('user_offline', {'user_id': user_id})
     
-    # Clean up offline users
-    for user_id in users_to_remove:
-        del online_users[user_id]
-        await sio.emit('user_offline', {'user_id': user_id})
-    
-    return online_list
+    return FastJSONResponse(presence.online())
 
 @api_router.post("/users/logout")
 async def logout_user(current_user: User = Depends(get_current_user)):
     """Mark user as offline when logging out"""
     user_id = current_user.id
     
-    if user_id in online_users:
-        del online_users[user_id]
-        
-    # Notify all clients about user going offline
-    await sio.emit('user_offline', {'user_id': user_id})
+    # Notify all clients about user going offline (connected sockets report it on disconnect)
+    if presence.remove(user_id):
+        await tenant_emit('user_offline', {'user_id': user_id})
     
     return {"status": "logged_out", "user_id": user_id}
 
-@api_router.get("/users/by-status")
-async def get_users_by_status(current_user: User = Depends(get_current_user)):
-    """Get users grouped by their work status with online information"""
-    users = await db.users.find().to_list(100)
-    now = datetime.utcnow()
-    offline_threshold = timedelta(minutes=2)
-    
-    # Group by status and add online info
-    grouped = {}
-    for user in users:
-        user_obj = User(**user)
-        status = user_obj.status or "Im Dienst"
-        
-        if status not in grouped:
-            grouped[status] = []
-        
-        # Add online status information
-        user_dict = user_obj.dict()
-        user_id = user_obj.id
-        
-        if user_id in online_users:
-            time_diff = now - online_users[user_id]["last_seen"]
-            if time_diff <= offline_threshold:
-                user_dict["is_online"] = True
-                user_dict["last_seen"] = online_users[user_id]["last_seen"].isoformat()
-                user_dict["online_status"] = "Online"
-            else:
-                user_dict["is_online"] = False
-                user_dict["last_seen"] = online_users[user_id]["last_seen"].isoformat()
-                user_dict["online_status"] = f"Vor {int(time_diff.total_seconds() / 60)} Min."
-        else:
-            user_dict["is_online"] = False
-            user_dict["last_seen"] = None
-            user_dict["online_status"] = "Offline"
-        
-        grouped[status].append(user_dict)
-    
-    return grouped
-
 # Admin route to create first user
 @api_router.post("/admin/create-first-user")
 async def create_first_user(user_data: UserCreate):
@@ -866,59 +2653,330 @@ async def create_first_user(user_data: UserCreate):
     user_dict.pop("password")
     return {"message": "First admin user created successfully", "user": user_dict}
 
-# Database reset endpoint (DANGER!)
+# Database reset, fixtures and snapshots (staging, admin only, DATABASE_RESET_ENABLED=true)
+# Collections are dropped instead of emptied document by document; indexes are
+# recreated by ensure_indexes. Snapshots use the mongodump --gzip directory layout.
+DATABASE_RESET_ENABLED = os.getenv("DATABASE_RESET_ENABLED", "false").lower() == "true"
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", str(ROOT_DIR / "snapshots")))
+TENANT_SNAPSHOT_DIR = Path(os.getenv("TENANT_SNAPSHOT_DIR", str(ROOT_DIR / "snapshots_tenants")))
+
+def snapshot_dir() -> Path:
+    """Snapshots of the current tenant (other tenants in a directory per tenant)"""
+    if tenants.current_id() == tenants.default:
+        return SNAPSHOT_DIR
+    return TENANT_SNAPSHOT_DIR / tenants.current_id()
+
+def require_reset_enabled(current_user: User):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if not DATABASE_RESET_ENABLED:
+        raise HTTPException(status_code=403, detail="Database reset is disabled (DATABASE_RESET_ENABLED)")
+
+def require_snapshot_name(name: str):
+    if not valid_snapshot_name(name):
+        raise HTTPException(status_code=400, detail="Snapshot names may contain letters, digits, '-' and '_'")
+
+async def reload_runtime_state():
+    """Rebuild in-memory state after the database content was replaced"""
+    presence.clear()
+    _archive_collections.clear()
+    read_ack_buffers.set(ReadAckBuffer())
+    await ensure_indexes()
+    await load_dispatch_state()
+    await load_incident_queue()
+    await rebuild_heatmap()
+
+async def fixture_documents(name: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Complete documents for a fixture set (users referenced by email)"""
+    fixture = FIXTURE_SETS[name]
+    users = {}
+    for data in fixture["users"]:
+        user = User(**{k: v for k, v in data.items() if k != "password"}).dict()
+        user["hashed_password"] = await asyncio.to_thread(get_password_hash, data["password"])
+        users[user["email"]] = user
+    
+    incidents = [
+        Incident(**{**data, "reported_by": users[data["reported_by"]]["id"]}).dict()
+        for data in fixture["incidents"]
+    ]
+    
+    messages, counters = [], {}
+    for data in fixture["messages"]:
+        sender = users[data["sender"]]
+        counters[data["channel"]] = counters.get(data["channel"], 0) + 1
+        messages.append(Message(
+            content=data["content"], channel=data["channel"], seq=counters[data["channel"]],
+            sender_id=sender["id"], sender_name=sender["username"]
+        ).dict())
+    
+    reports = []
+    for data in fixture["reports"]:
+        author = users[data["author"]]
+        reports.append(Report(
+            **{k: v for k, v in data.items() if k != "author"},
+            author_id=author["id"], author_name=author["username"]
+        ).dict())
+    
+    return {
+        "users": list(users.values()),
+        "incidents": incidents,
+        "messages": messages,
+        "channel_counters": [{"channel": channel, "seq": seq} for channel, seq in counters.items()],
+        "reports": reports,
+    }
+
+async def load_fixtures(name: str) -> Dict[str, int]:
+    documents = await fixture_documents(name)
+    loaded = {}
+    for collection_name, docs in documents.items():
+        if docs:
+            await db[collection_name].insert_many(docs, ordered=False)
+        loaded[collection_name] = len(docs)
+    return loaded
+
 @api_router.delete("/admin/reset-database")
-async def reset_database():
-    """⚠️ DANGER: Completely reset the database - removes ALL data!"""
+async def reset_database(fixtures: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """⚠️ DANGER: Completely reset the database - removes ALL data!
+    
+    Optionally loads a fixture set afterwards (?fixtures=demo).
+    """
+    require_reset_enabled(current_user)
+    if fixtures is not None and fixtures not in FIXTURE_SETS:
+        raise HTTPException(status_code=404, detail=f"Unknown fixture set, use one of: {', '.join(FIXTURE_SETS)}")
     try:
-        # List all collections
-        collections = await db.list_collection_names()
-        
-        deleted_count = 0
-        for collection_name in collections:
-            result = await db[collection_name].delete_many({})
-            deleted_count += result.deleted_count
-            print(f"🗑️ Deleted {result.deleted_count} documents from {collection_name}")
+        collections = await drop_collections(tenant_databases.current())
+        logger.info(f"🗑️ Dropped collections: {', '.join(collections)}")
         
-        # Clear online users tracking
-        global online_users, user_sockets
-        online_users.clear()
-        user_sockets.clear()
+        loaded = await load_fixtures(fixtures) if fixtures else {}
+        await reload_runtime_state()
         
         return {
             "message": "Database completely reset!",
             "collections_cleared": len(collections),
-            "total_documents_deleted": deleted_count,
-            "collections": collections
+            "collections": collections,
+            "fixtures": fixtures,
+            "documents_loaded": loaded
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database reset failed: {str(e)}")
 
+@api_router.post("/admin/fixtures/{name}")
+async def seed_fixtures(name: str, current_user: User = Depends(get_current_user)):
+    """Load a fixture set into the current database (bulk insert)"""
+    require_reset_enabled(current_user)
+    if name not in FIXTURE_SETS:
+        raise HTTPException(status_code=404, detail=f"Unknown fixture set, use one of: {', '.join(FIXTURE_SETS)}")
+    
+    loaded = await load_fixtures(name)
+    await load_dispatch_state()
+    await load_incident_queue()
+    await rebuild_heatmap()
+    return {"status": "success", "fixtures": name, "documents_loaded": loaded}
+
+@api_router.get("/admin/snapshots")
+async def get_snapshots(current_user: User = Depends(get_current_user)):
+    require_reset_enabled(current_user)
+    directory = snapshot_dir()
+    return FastJSONResponse(list_snapshots(directory) if directory.is_dir() else [])
+
+@api_router.post("/admin/snapshots/{name}")
+async def save_snapshot(name: str, current_user: User = Depends(get_current_user)):
+    """Dump all collections to SNAPSHOT_DIR/<name> (replaces an existing snapshot)"""
+    require_reset_enabled(current_user)
+    require_snapshot_name(name)
+    
+    counts = await create_snapshot(tenant_databases.current(), snapshot_dir(), name)
+    logger.info(f"💾 Snapshot {name} created: {counts}")
+    return {"status": "success", "snapshot": name, "documents": counts}
+
+@api_router.post("/admin/snapshots/{name}/restore")
+async def load_snapshot(name: str, current_user: User = Depends(get_current_user)):
+    """Replace the database content with a snapshot"""
+    require_reset_enabled(current_user)
+    require_snapshot_name(name)
+    if not (snapshot_dir() / name).is_dir():
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    
+    counts = await restore_snapshot(tenant_databases.current(), snapshot_dir(), name)
+    await reload_runtime_state()
+    logger.info(f"💾 Snapshot {name} restored: {counts}")
+    return {"status": "success", "snapshot": name, "documents": counts}
+
+@api_router.delete("/admin/snapshots/{name}")
+async def remove_snapshot(name: str, current_user: User = Depends(get_current_user)):
+    require_reset_enabled(current_user)
+    require_snapshot_name(name)
+    if not delete_snapshot(snapshot_dir(), name):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"status": "success", "snapshot": name}
+
 # Root route
 @api_router.get("/")
 async def root():
     return {"message": "Stadtwache API", "version": "1.0.0"}
 
-# Include router
-app.include_router(api_router)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Prometheus metrics (outside /api, scraped directly from the worker)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Health and readiness (outside /api, probed directly by load balancers and orchestrators)
+# Dependencies are checked in the background every HEALTH_CHECK_INTERVAL seconds;
+# /health/ready only reads the cached results. SQL is checked when DATABASE_TYPE is set.
+SQL_DATABASE_TYPE = os.getenv("DATABASE_TYPE")
+
+health_monitor = HealthMonitor(
+    interval=float(os.getenv("HEALTH_CHECK_INTERVAL", "2")),
+    timeout=float(os.getenv("HEALTH_CHECK_TIMEOUT", "1")),
+    max_latency_ms=float(os.getenv("HEALTH_MAX_DB_LATENCY_MS", "250")),
+    max_loop_lag=float(os.getenv("HEALTH_MAX_LOOP_LAG", "0.5")),
+    max_pool_saturation=float(os.getenv("HEALTH_MAX_POOL_SATURATION", "0.9")),
 )
-logger = logging.getLogger(__name__)
+sql_health_engine = None
+
+async def ping_mongo():
+    await client.admin.command("ping")
+
+async def ping_sql():
+    global sql_health_engine
+    from sqlalchemy import text
+    if sql_health_engine is None:
+        from database_config import create_database_engine
+        sql_health_engine = create_database_engine(SQL_DATABASE_TYPE)
+    async with sql_health_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+health_monitor.add_check("mongo", ping_mongo)
+if SQL_DATABASE_TYPE:
+    health_monitor.add_check("sql", ping_sql)
+
+async def health_live():
+    """The process serves requests; dependencies are not checked"""
+    return {"status": "alive"}
+
+async def health_ready():
+    ready, details = health_monitor.readiness(
+        event_loop_lag(), mongo_pool_metrics.saturation(),
+        {
+            "tenants": len(tenants),
+            "socketio_clients": len(socket_tenants),
+            "online_users": sum(len(table) for _, table in presence_tables.items()),
+        }
+    )
+    return FastJSONResponse(details, status_code=200 if ready else 503)
+
+
+background_tasks = []
+
+async def ensure_indexes():
+    await db.messages.create_index([("channel", 1), ("timestamp", -1)])
+    await db.messages.create_index("id", unique=True)
+    await db.messages.create_index([("conversation_id", 1), ("timestamp", -1)], sparse=True)
+    await db.conversations.create_index("id", unique=True)
+    await db.conversations.create_index([("participants", 1), ("updated_at", -1)])
+    await db.channel_counters.create_index("channel", unique=True)
+    await db.read_cursors.create_index([("user_id", 1), ("channel", 1)], unique=True)
+    await db.locations.create_index([("timestamp", -1)])
+    await db.locations.create_index([("user_id", 1), ("timestamp", -1)])
+    await db.incidents.create_index([("status", 1), ("assigned_to", 1)])
+    await db.incidents.create_index([("status", 1), ("created_at", 1)])
+    await db.shift_report_drafts.create_index([("author_id", 1), ("shift_key", 1)], unique=True)
+    await db.heatmap_tiles.create_index(HEATMAP_TILE_KEY, unique=True)
+    await db.image_sources.create_index("full")
+    await create_compressed_collection("incidents_archive")
+    for keys in ARCHIVE_INDEXES:
+        await db.incidents_archive.create_index(keys)
+    if RATE_LIMIT_STORE == "mongo":
+        # Buckets of all tenants live in the default tenant's database
+        await rate_limiter.store.collection.create_index("expires_at", expireAfterSeconds=0)
+
+async def load_tenant_state():
+    await ensure_indexes()
+    await load_dispatch_state()
+    await load_incident_queue()
+    if not await db.heatmap_tiles.estimated_document_count():
+        await rebuild_heatmap()
+
+async def start_background_tasks():
+    for tenant_id in tenants:
+        with use_tenant(tenant_id):
+            await load_tenant_state()
+    background_tasks.append(asyncio.create_task(message_archiver_loop()))
+    background_tasks.append(asyncio.create_task(dispatch_resync_loop()))
+    background_tasks.append(asyncio.create_task(sla_timer_loop()))
+    background_tasks.append(asyncio.create_task(monitor_event_loop_lag()))
+    background_tasks.append(asyncio.create_task(read_ack_flush_loop()))
+    background_tasks.append(asyncio.create_task(location_flush_loop()))
+    background_tasks.append(asyncio.create_task(shift_report_loop()))
+    background_tasks.append(asyncio.create_task(health_monitor.loop()))
+    background_tasks.append(asyncio.create_task(image_pipeline.warm_up()))
 
-@app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    await for_each_tenant(flush_read_acks, "Flushing read acknowledgements")
+    image_pipeline.shutdown()
+    if sql_health_engine is not None:
+        await sql_health_engine.dispose()
+    client.close()
+    shutdown_logging()
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    setup_logging()
+    if client is None:
+        connect_database()
+    # Readiness gate: do not accept traffic (or start loops) without a reachable database
+    if not await test_db_connection():
+        raise RuntimeError(f"MongoDB not reachable within {MONGO_STARTUP_TIMEOUT:g}s ({MONGO_URL[:20]}...)")
+    await health_monitor.run_checks()
+    await start_background_tasks()
+    health_monitor.accepting = True
+    try:
+        yield
+    finally:
+        # Report not ready first so that load balancers stop sending traffic
+        health_monitor.accepting = False
+        await shutdown_db_client()
+
+def create_app() -> FastAPI:
+    """The FastAPI app without Socket.IO (tests, tools); resources live in the lifespan"""
+    application = FastAPI(lifespan=lifespan)
+    application.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    application.add_api_route("/health/live", health_live, methods=["GET"], include_in_schema=False)
+    application.add_api_route("/health/ready", health_ready, methods=["GET"], include_in_schema=False)
+    application.include_router(api_router)
+    
+    # CORS middleware
+    application.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Tenant of unauthenticated requests (X-Tenant); authenticated ones use the token's tenant
+    application.add_middleware(TenantMiddleware, registry=tenants, token_only=tenant_from_token_only)
+    
+    # Per-route latency, DB usage and opt-in profiling (X-Profile: 1)
+    application.add_middleware(MetricsMiddleware)
+    
+    # Outermost middleware: request/trace ids for every log record of a request
+    application.add_middleware(RequestContextMiddleware)
+    return application
+
+def create_socket_app() -> socketio.ASGIApp:
+    """Application factory for uvicorn --factory server:create_socket_app (FastAPI wrapped with Socket.IO)"""
+    return socketio.ASGIApp(sio, create_app())
+
+def __getattr__(name: str):
+    # server:app and server:socket_app keep working, but are built on first access instead of at import
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    if name == "socket_app":
+        globals()["socket_app"] = socketio.ASGIApp(sio, globals().get("app") or __getattr__("app"))
+        return globals()["socket_app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,160 @@
+# 📋 Automatische Schichtberichte
+# Schichtfenster, Streckenberechnung aus Standort-Pings und die Textvorlage für den
+# vorausgefüllten Bericht. Die Datenbankabfragen (Aggregationen) liegen in server.py.
+
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from dispatch import haversine_km
+
+SHIFT_TIMEZONE = ZoneInfo(os.getenv("SHIFT_TIMEZONE", "Europe/Berlin"))
+
+# Schicht -> (Bezeichnung, Beginn, Ende) in Ortszeit; Ende <= Beginn heißt Folgetag
+SHIFTS = {
+    "frueh": ("Frühdienst", time(6), time(14)),
+    "spaet": ("Spätdienst", time(14), time(22)),
+    "nacht": ("Nachtdienst", time(22), time(6)),
+}
+
+# Sprünge schneller als das gelten als GPS-Fehler und zählen nicht zur Strecke
+MAX_PATROL_SPEED_KMH = 200.0
+
+PRIORITY_LABELS = {"high": "Hoch", "medium": "Mittel", "low": "Niedrig"}
+
+
+def _to_utc_naive(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def shift_window(shift_date: date, shift: str) -> Tuple[datetime, datetime]:
+    """Start and end of a shift as naive UTC (the format of stored timestamps)"""
+    _, begin, end = SHIFTS[shift]
+    start = datetime.combine(shift_date, begin, SHIFT_TIMEZONE)
+    finish = datetime.combine(shift_date + timedelta(days=1) if end <= begin else shift_date, end, SHIFT_TIMEZONE)
+    return _to_utc_naive(start), _to_utc_naive(finish)
+
+
+def shift_key(shift_date: date, shift: str) -> str:
+    return f"{shift_date.isoformat()}:{shift}"
+
+
+def shift_at(now_utc: datetime) -> Tuple[date, str]:
+    """The shift running at a point in time"""
+    local_day = now_utc.replace(tzinfo=timezone.utc).astimezone(SHIFT_TIMEZONE).date()
+    for day in (local_day, local_day - timedelta(days=1)):
+        for shift in SHIFTS:
+            start, end = shift_window(day, shift)
+            if start <= now_utc < end:
+                return day, shift
+    raise ValueError("SHIFTS do not cover the whole day")
+
+
+def last_finished_shift(now_utc: datetime) -> Tuple[date, str, datetime]:
+    """(shift_date, shift, end) of the most recently finished shift"""
+    local = now_utc.replace(tzinfo=timezone.utc).astimezone(SHIFT_TIMEZONE)
+    best = None
+    for days_back in (0, 1):
+        day = local.date() - timedelta(days=days_back)
+        for shift in SHIFTS:
+            _, end = shift_window(day, shift)
+            if end <= now_utc and (best is None or end > best[2]):
+                best = (day, shift, end)
+    return best
+
+
+class PatrolDistance:
+    """Accumulates the driven distance from time-ordered location pings"""
+
+    __slots__ = ("km", "points", "skipped", "last", "first_ts", "last_ts")
+
+    def __init__(self):
+        self.km = 0.0
+        self.points = 0
+        self.skipped = 0
+        self.last: Optional[Tuple[float, float, datetime]] = None
+        self.first_ts: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+
+    def add(self, location: Any, ts: datetime):
+        try:
+            lat, lng = float(location["lat"]), float(location["lng"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.points += 1
+        self.first_ts = self.first_ts or ts
+        self.last_ts = ts
+        if self.last is not None:
+            step = haversine_km(self.last[0], self.last[1], lat, lng)
+            hours = (ts - self.last[2]).total_seconds() / 3600
+            if hours > 0 and step / hours > MAX_PATROL_SPEED_KMH:
+                self.skipped += 1
+                return
+            self.km += step
+        self.last = (lat, lng, ts)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "distance_km": round(self.km, 2),
+            "points": self.points,
+            "discarded_jumps": self.skipped,
+            "first_ping": self.first_ts,
+            "last_ping": self.last_ts,
+        }
+
+
+def _local(ts: Optional[datetime]) -> str:
+    if not isinstance(ts, datetime):
+        return "--:--"
+    return ts.replace(tzinfo=timezone.utc).astimezone(SHIFT_TIMEZONE).strftime("%H:%M")
+
+
+def build_timeline(incidents: List[Dict[str, Any]], completed: List[Dict[str, Any]],
+                   start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    events = []
+    for incident in incidents:
+        for field, event in (("created_at", "gemeldet"), ("assigned_at", "übernommen")):
+            ts = incident.get(field)
+            if isinstance(ts, datetime) and start <= ts < end:
+                events.append({"time": ts, "event": event, "incident_id": incident["id"], "title": incident["title"]})
+    for archived in completed:
+        events.append({
+            "time": archived["created_at"], "event": "abgeschlossen",
+            "incident_id": archived.get("incident_id"), "title": archived["title"].removeprefix("Archiv: ")
+        })
+    events.sort(key=lambda e: e["time"])
+    return events
+
+
+def render_report(author_name: str, shift_date: date, shift: str, summary: Dict[str, Any]) -> Tuple[str, str]:
+    """Title and pre-filled text of the shift report"""
+    label = SHIFTS[shift][0]
+    title = f"Schichtbericht {label} {shift_date.strftime('%d.%m.%Y')}"
+
+    incidents = summary["incidents"]
+    lines = [
+        f"{label} am {shift_date.strftime('%d.%m.%Y')} – {author_name}",
+        "",
+        f"Einsätze: {incidents['total']} (davon abgeschlossen: {len(summary['completed'])})",
+    ]
+    for priority in ("high", "medium", "low"):
+        count = incidents["by_priority"].get(priority, 0)
+        if count:
+            lines.append(f"  - Priorität {PRIORITY_LABELS[priority]}: {count}")
+
+    if summary["timeline"]:
+        lines += ["", "Verlauf:"]
+        for event in summary["timeline"]:
+            lines.append(f"  {_local(event['time'])}  {event['title']} – {event['event']}")
+
+    patrol = summary["patrol"]
+    lines += ["", f"Streifenstrecke: {patrol['distance_km']:.1f} km ({patrol['points']} Standortmeldungen)"]
+
+    if summary["channels"]:
+        lines += ["", "Funkverkehr:"]
+        for channel in summary["channels"]:
+            lines.append(f"  - {channel['channel']}: {channel['total']} Nachrichten (eigene: {channel['own']})")
+
+    lines += ["", "Besondere Vorkommnisse: ", ""]
+    return title, "\n".join(lines)
@@ -0,0 +1,187 @@
+# 🏙️ Mandanten (mehrere Stadtwachen auf einer Installation)
+# Jeder Mandant hat eine eigene Datenbank (gecachte Zuordnung Mandant -> Datenbank auf
+# einem gemeinsamen Client), eigene Socket.IO-Räume, eigenen Zustand im Speicher und
+# eigene Kontingente. Der aktive Mandant steht in einer ContextVar: gesetzt aus dem
+# X-Tenant-Header bzw. dem tenant-Claim des Tokens, pro Socket-Ereignis und pro Hintergrundlauf.
+
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from starlette.responses import JSONResponse
+
+from rate_limit import RateLimit
+
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+TENANT_HEADER = b"x-tenant"
+
+# None: the default tenant
+current_tenant: ContextVar[Optional[str]] = ContextVar("tenant", default=None)
+# Tenant named by the X-Tenant header, also on routes that only trust the token
+requested_tenant: ContextVar[Optional[str]] = ContextVar("requested_tenant", default=None)
+
+
+@contextmanager
+def use_tenant(tenant_id: str):
+    token = current_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+
+class TenantQuota:
+    """Limits of one tenant; None means unlimited"""
+    __slots__ = ("users", "sockets", "requests")
+
+    def __init__(self, users: Optional[int] = None, sockets: Optional[int] = None,
+                 requests: Optional[RateLimit] = None):
+        self.users = users
+        self.sockets = sockets
+        self.requests = requests
+
+    @classmethod
+    def parse(cls, value: str) -> "TenantQuota":
+        """'users:500|sockets:400|requests:50/200' (requests per second / burst)"""
+        quota = cls()
+        for part in filter(None, (p.strip() for p in value.split("|"))):
+            name, _, limit = part.partition(":")
+            name = name.strip()
+            if name == "requests":
+                quota.requests = RateLimit.parse(limit.strip())
+            elif name in ("users", "sockets"):
+                setattr(quota, name, int(limit))
+            else:
+                raise ValueError(f"Unknown tenant quota: {name}")
+        return quota
+
+
+class Tenant:
+    __slots__ = ("id", "db_name", "quota")
+
+    def __init__(self, tenant_id: str, db_name: str, quota: Optional[TenantQuota] = None):
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+        self.id = tenant_id
+        self.db_name = db_name
+        self.quota = quota or TenantQuota()
+
+
+class TenantRegistry:
+    """Configured tenants; requests without a tenant belong to the default tenant"""
+
+    def __init__(self, default: Tenant):
+        self.default = default.id
+        self.tenants: Dict[str, Tenant] = {default.id: default}
+
+    def add(self, tenant: Tenant):
+        self.tenants[tenant.id] = tenant
+
+    def get(self, tenant_id: str) -> Optional[Tenant]:
+        return self.tenants.get(tenant_id)
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self.tenants
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.tenants))
+
+    def __len__(self) -> int:
+        return len(self.tenants)
+
+    def current_id(self) -> str:
+        return current_tenant.get() or self.default
+
+    def current(self) -> Tenant:
+        return self.tenants[self.current_id()]
+
+
+class TenantLocal:
+    """One instance per tenant, created by factory() on first use within the tenant's context"""
+
+    def __init__(self, registry: TenantRegistry, factory: Callable[[], Any]):
+        self.registry = registry
+        self.factory = factory
+        self.values: Dict[str, Any] = {}
+
+    def current(self) -> Any:
+        tenant_id = self.registry.current_id()
+        value = self.values.get(tenant_id)
+        if value is None:
+            value = self.values[tenant_id] = self.factory()
+        return value
+
+    def set(self, value: Any, tenant_id: Optional[str] = None):
+        self.values[tenant_id or self.registry.current_id()] = value
+
+    def items(self):
+        return list(self.values.items())
+
+    def clear(self):
+        self.values.clear()
+
+
+class TenantProxy:
+    """Stands in for the current tenant's instance (attributes, items, len and in)"""
+    __slots__ = ("_resolve",)
+
+    def __init__(self, resolve: Callable[[], Any]):
+        self._resolve = resolve
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve()[key]
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._resolve()
+
+    def __bool__(self) -> bool:
+        return True
+
+
+class TenantMiddleware:
+    """Selects the tenant of a request from the X-Tenant header (default tenant without it)
+
+    Authenticated requests are bound to the tenant of their token in get_current_user;
+    the header is needed for login, registration and the other unauthenticated routes.
+    On paths where token_only(path) is true the header never selects the tenant: they run
+    in the token's tenant and a header naming another tenant is rejected there.
+    """
+
+    def __init__(self, app, registry: TenantRegistry, token_only: Callable[[str], bool] = lambda path: False):
+        self.app = app
+        self.registry = registry
+        self.token_only = token_only
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tenant_id = None
+        for name, value in scope.get("headers") or []:
+            if name == TENANT_HEADER:
+                tenant_id = value.decode("latin-1").strip().lower()
+                break
+        if not tenant_id:
+            await self.app(scope, receive, send)
+            return
+        if tenant_id not in self.registry:
+            await JSONResponse({"detail": "Unknown tenant"}, status_code=404)(scope, receive, send)
+            return
+
+        token = requested_tenant.set(tenant_id)
+        try:
+            if self.token_only(scope.get("path", "")):
+                await self.app(scope, receive, send)
+            else:
+                with use_tenant(tenant_id):
+                    await self.app(scope, receive, send)
+        finally:
+            requested_tenant.reset(token)
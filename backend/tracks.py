@@ -0,0 +1,175 @@
+# 🗺️ Streifenverlauf
+# Rekonstruiert die Route eines Beamten aus Standort-Pings: GPS-Ausreißer entfernen,
+# mit Douglas-Peucker vereinfachen, als Polyline (Google-Format) bzw. Delta-Arrays
+# kodieren und Strecken-/Geschwindigkeitsstatistik vektorisiert mit NumPy berechnen.
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# Einzelne Pings, zu denen und von denen aus schneller gefahren würde, gelten als GPS-Fehler
+MAX_TRACK_SPEED_KMH = 200.0
+
+# Unterhalb dieser Geschwindigkeit zählt ein Abschnitt als Stillstand
+MOVING_SPEED_KMH = 3.0
+
+POLYLINE_PRECISION = 5
+TRACK_ENCODINGS = ("polyline", "delta")
+
+
+def _segment_lengths_m(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Haversine distance between consecutive points"""
+    phi = np.radians(lat)
+    dphi = np.diff(phi)
+    dlmb = np.radians(np.diff(lng))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _speeds_kmh(lengths_m: np.ndarray, dt_s: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speeds = lengths_m / dt_s * 3.6
+    # Pings in derselben Sekunde: Geschwindigkeit unbekannt, nicht als Ausreißer werten
+    return np.where(dt_s > 0, speeds, 0.0)
+
+
+def drop_outliers(lat: np.ndarray, lng: np.ndarray, ts: np.ndarray) -> np.ndarray:
+    """Mask of points to keep; a point is dropped if both its in- and outbound speed are impossible"""
+    keep = np.ones(len(lat), dtype=bool)
+    if len(lat) < 3:
+        return keep
+    speeds = _speeds_kmh(_segment_lengths_m(lat, lng), np.diff(ts))
+    too_fast = speeds > MAX_TRACK_SPEED_KMH
+    keep[1:-1] = ~(too_fast[:-1] & too_fast[1:])
+    return keep
+
+
+def _local_xy(lat: np.ndarray, lng: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Equirectangular projection in metres; accurate enough over a city-sized track
+    lat0 = np.radians(lat.mean())
+    x = np.radians(lng) * np.cos(lat0) * EARTH_RADIUS_M
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return x, y
+
+
+def douglas_peucker(lat: np.ndarray, lng: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Mask of points kept by Douglas-Peucker simplification (iterative, vectorized per segment)"""
+    n = len(lat)
+    if n < 3 or tolerance_m <= 0:
+        return np.ones(n, dtype=bool)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    x, y = _local_xy(lat, lng)
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        px, py = x[first + 1:last], y[first + 1:last]
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px - x[first], py - y[first])
+        else:
+            distances = np.abs(dy * (px - x[first]) - dx * (py - y[first])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance_m:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def _encode_signed(values: np.ndarray) -> str:
+    chunks: List[str] = []
+    for value in values.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def _deltas(values: np.ndarray) -> np.ndarray:
+    return np.diff(values, prepend=0)
+
+
+def encode_polyline(lat: np.ndarray, lng: np.ndarray, precision: int = POLYLINE_PRECISION) -> str:
+    """Google encoded polyline (readable by react-native-maps / Leaflet plugins)"""
+    factor = 10 ** precision
+    ilat = np.round(lat * factor).astype(np.int64)
+    ilng = np.round(lng * factor).astype(np.int64)
+    interleaved = np.column_stack((_deltas(ilat), _deltas(ilng))).ravel()
+    return _encode_signed(interleaved)
+
+
+def delta_arrays(lat: np.ndarray, lng: np.ndarray, ts: np.ndarray,
+                 precision: int = POLYLINE_PRECISION) -> Dict[str, Any]:
+    """First value absolute, then differences (coordinates as integers of 10^-precision degrees)"""
+    factor = 10 ** precision
+    return {
+        "precision": precision,
+        "lat": _deltas(np.round(lat * factor).astype(np.int64)).tolist(),
+        "lng": _deltas(np.round(lng * factor).astype(np.int64)).tolist(),
+        "t": _deltas(ts.astype(np.int64)).tolist(),
+    }
+
+
+def track_stats(lat: np.ndarray, lng: np.ndarray, ts: np.ndarray) -> Dict[str, Any]:
+    """Distance and speed figures of the (outlier-free, unsimplified) track"""
+    if len(lat) < 2:
+        return {"distance_km": 0.0, "duration_s": 0, "moving_s": 0, "avg_speed_kmh": 0.0, "max_speed_kmh": 0.0}
+    lengths = _segment_lengths_m(lat, lng)
+    dt = np.diff(ts)
+    speeds = _speeds_kmh(lengths, dt)
+    # Remaining single jumps (e.g. GPS fix after a tunnel) count neither as distance nor speed
+    plausible = speeds <= MAX_TRACK_SPEED_KMH
+    lengths, dt, speeds = lengths[plausible], dt[plausible], speeds[plausible]
+    moving = speeds >= MOVING_SPEED_KMH
+    moving_s = float(dt[moving].sum())
+    moving_m = float(lengths[moving].sum())
+    return {
+        "distance_km": round(float(lengths.sum()) / 1000, 2),
+        "duration_s": int(ts[-1] - ts[0]),
+        "moving_s": int(moving_s),
+        "avg_speed_kmh": round(moving_m / moving_s * 3.6, 1) if moving_s else 0.0,
+        "max_speed_kmh": round(float(speeds.max()), 1) if len(speeds) else 0.0,
+    }
+
+
+def build_track(lat: List[float], lng: List[float], ts: List[float],
+                tolerance_m: float, encoding: str = "polyline") -> Dict[str, Any]:
+    """Simplified, encoded track plus statistics from raw pings (ts = epoch seconds, sorted)"""
+    lat_a = np.asarray(lat, dtype=np.float64)
+    lng_a = np.asarray(lng, dtype=np.float64)
+    ts_a = np.asarray(ts, dtype=np.float64)
+
+    valid = drop_outliers(lat_a, lng_a, ts_a)
+    lat_a, lng_a, ts_a = lat_a[valid], lng_a[valid], ts_a[valid]
+    simplified = douglas_peucker(lat_a, lng_a, tolerance_m)
+
+    track: Dict[str, Any] = {
+        "points_raw": len(lat),
+        "points_discarded": int(len(lat) - len(lat_a)),
+        "points": int(simplified.sum()),
+        "tolerance_m": tolerance_m,
+        "stats": track_stats(lat_a, lng_a, ts_a),
+        "encoding": encoding,
+    }
+    s_lat, s_lng, s_ts = lat_a[simplified], lng_a[simplified], ts_a[simplified]
+    if encoding == "polyline":
+        track["polyline"] = encode_polyline(s_lat, s_lng)
+        track["t"] = _deltas(s_ts.astype(np.int64)).tolist()
+    else:
+        track.update(delta_arrays(s_lat, s_lng, s_ts))
+    if len(lat_a):
+        track["bounds"] = {
+            "south": float(lat_a.min()), "west": float(lng_a.min()),
+            "north": float(lat_a.max()), "east": float(lng_a.max()),
+        }
+    return track
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Load-Testing and Benchmark Suite for the Stadtwache Backend
+Starts socket_app in-process against an in-memory Mongo stand-in (mongomock-motor)
+and drives concurrent REST and Socket.IO workloads.
+
+Usage:
+    python backend_bench.py                      # run and compare with bench_baseline.json
+    python backend_bench.py --update-baseline    # run and store results as new baseline
+    python backend_bench.py --scale 0.2          # smaller workloads (CI)
+
+Requires mongomock-motor, httpx and aiohttp besides backend/requirements.txt:
+    pip install -r requirements-dev.txt
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+import httpx
+import socketio
+import uvicorn
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+BASELINE_FILE = ROOT_DIR / "bench_baseline.json"
+
+# Endpoints with fewer samples are too noisy to compare against the baseline
+MIN_SAMPLES_FOR_COMPARISON = 20
+
+
+class LatencyRecorder:
+    """Collects per-endpoint latencies and errors"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.started = {}
+        self.finished = {}
+
+    def add(self, name, seconds, ok=True):
+        self.samples.setdefault(name, []).append(seconds)
+        now = time.perf_counter()
+        self.started.setdefault(name, now - seconds)
+        self.finished[name] = now
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self):
+        result = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            duration = max(self.finished[name] - self.started[name], 1e-9)
+            result[name] = {
+                "count": len(ordered),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": round(len(ordered) / duration, 1),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            }
+        return result
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BenchServer:
+    """socket_app served by uvicorn in a background thread"""
+
+    def __init__(self):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        mongo = AsyncMongoMockClient()
+        database = mongo["stadtwache_bench"]
+        # mongomock rejects storage engine options (zstd archive collections)
+        create_collection = database.create_collection
+        database.create_collection = lambda name, storageEngine=None, **kwargs: create_collection(name, **kwargs)
+        server.set_database(mongo, database)
+        # Workloads deliberately exceed the per-user rate limits
+        server.rate_limiter.limits = {}
+        config = uvicorn.Config(server.socket_app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.uvicorn = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.uvicorn.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.uvicorn.started:
+            if time.time() > deadline:
+                raise RuntimeError("Benchmark server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.uvicorn.should_exit = True
+        self.thread.join(timeout=5)
+
+
+class StadtwacheBenchmark:
+    def __init__(self, base_url, scale):
+        self.base_url = base_url
+        self.scale = scale
+        self.recorder = LatencyRecorder()
+        self.users = []  # [{"email", "password", "token", "id"}]
+
+    def n(self, value):
+        return max(1, int(value * self.scale))
+
+    async def timed(self, http, name, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await http.request(method, path, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.add(name, time.perf_counter() - start, ok)
+        return response
+
+    async def setup_users(self, http, count):
+        for i in range(count):
+            user = {
+                "email": f"beamter{i}@stadtwache.de",
+                "username": f"Beamter {i}",
+                "password": "sicher123",
+                "role": "admin" if i == 0 else "police",
+                "department": "Streifendienst",
+            }
+            response = await http.post("/api/auth/register", json=user)
+            user["id"] = response.json()["id"]
+            self.users.append(user)
+
+    def headers(self, user):
+        return {"Authorization": f"Bearer {user['token']}"}
+
+    # Workloads
+    async def login_burst(self, http):
+        async def login(user):
+            response = await self.timed(http, "POST /api/auth/login", "POST", "/api/auth/login",
+                                        json={"email": user["email"], "password": user["password"]})
+            user["token"] = response.json()["access_token"]
+        await asyncio.gather(*(login(user) for user in self.users))
+
+    async def seed_content(self, http):
+        admin = self.users[0]
+        for i in range(self.n(100)):
+            await http.post("/api/incidents", headers=self.headers(admin), json={
+                "title": f"Ruhestörung {i}",
+                "description": "Laute Musik aus Wohnung im 3. Stock.",
+                "priority": ("high", "medium", "low")[i % 3],
+                "location": {"lat": 52.52 + i * 0.001, "lng": 13.405 + i * 0.001},
+                "address": f"Hauptstraße {i}, 10115 Berlin",
+            })
+            await http.post("/api/messages", headers=self.headers(admin),
+                            json={"content": f"Lagemeldung {i}", "channel": "general"})
+
+    async def polling_clients(self, http, clients, rounds):
+        endpoints = ["/api/incidents", "/api/messages", "/api/users/by-status", "/api/reports"]
+
+        async def poll(user):
+            for _ in range(rounds):
+                for path in endpoints:
+                    await self.timed(http, f"GET {path}", "GET", path, headers=self.headers(user))
+
+        await asyncio.gather(*(poll(self.users[i % len(self.users)]) for i in range(clients)))
+
+    async def location_flood(self, http, pings_per_user):
+        async def pings(user):
+            for i in range(pings_per_user):
+                await self.timed(http, "POST /api/locations/update", "POST", "/api/locations/update",
+                                 headers=self.headers(user),
+                                 json={"user_id": user["id"], "location": {"lat": 52.5 + i * 1e-4, "lng": 13.4}})
+
+        await asyncio.gather(*(pings(user) for user in self.users[1:]))
+
+    async def message_fanout(self, http, sockets, messages):
+        """Latency from POST /api/messages until every socket received the message"""
+        received = {}
+        all_received = asyncio.Event()
+        clients = []
+
+        for i in range(sockets):
+            user = self.users[i % len(self.users)]
+            sio = socketio.AsyncClient(reconnection=False)
+
+            @sio.on("new_message")
+            async def on_message(data):
+                marker = data.get("content")
+                if marker in received:
+                    received[marker]["count"] += 1
+                    if received[marker]["count"] == sockets:
+                        self.recorder.add("socket new_message fan-out",
+                                          time.perf_counter() - received[marker]["sent"])
+                        if all(entry["count"] == sockets for entry in received.values()):
+                            all_received.set()
+
+            await sio.connect(self.base_url, auth={"token": user["token"]}, transports=["websocket"])
+            await sio.emit("join_room", {"room": "bench"})
+            clients.append(sio)
+
+        await asyncio.sleep(0.2)
+        for _ in range(messages):
+            marker = f"fanout-{uuid.uuid4()}"
+            received[marker] = {"count": 0, "sent": time.perf_counter()}
+            await self.timed(http, "POST /api/messages", "POST", "/api/messages",
+                             headers=self.headers(self.users[0]), json={"content": marker, "channel": "bench"})
+        try:
+            await asyncio.wait_for(all_received.wait(), timeout=30)
+        except asyncio.TimeoutError:
+            missing = sum(1 for entry in received.values() if entry["count"] < sockets)
+            self.recorder.errors["socket new_message fan-out"] = missing
+
+        for sio in clients:
+            await sio.disconnect()
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60) as http:
+            await self.setup_users(http, self.n(20))
+            await self.login_burst(http)
+            await self.seed_content(http)
+            await self.polling_clients(http, clients=self.n(50), rounds=self.n(10))
+            await self.location_flood(http, pings_per_user=self.n(50))
+            await self.message_fanout(http, sockets=self.n(50), messages=self.n(20))
+        return self.recorder.summary()
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return a list of regressions (p95 latency up or throughput down beyond tolerance)"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or min(current["count"], previous["count"]) < MIN_SAMPLES_FOR_COMPARISON:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance) and current["p95_ms"] - previous["p95_ms"] > 1:
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'Endpoint':<34} {'count':>7} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in sorted(results.items()):
+        print(f"{name:<34} {r['count']:>7} {r['errors']:>5} {r['throughput_rps']:>9} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stadtwache backend benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply all workload sizes")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression ratio")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with BenchServer() as bench_server:
+        results = asyncio.run(StadtwacheBenchmark(bench_server.base_url, args.scale).run())
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("\nℹ️ No baseline found, run with --update-baseline to create one")
+        return 0
+
+    regressions = compare_with_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print("\n❌ Performance regressions:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -930,6 +930,33 @@ const MainApp = () => {
         headers: { Authorization: `Bearer ${token}` }
       } : {};
 
+      // One snapshot request instead of separate incidents/stats/reports/team calls
+      if (token) {
+        try {
+          const bootstrapResponse = await axios.get(`${API_URL}/api/bootstrap`, config);
+          const snapshot = bootstrapResponse.data;
+          setRecentIncidents(snapshot.incidents || []);
+          setReports(snapshot.reports || []);
+          setUsersByStatus(snapshot.users_by_status || {});
+          if (snapshot.stats) {
+            setStats({
+              incidents: snapshot.stats.total_incidents,
+              officers: snapshot.stats.total_users,
+              messages: snapshot.stats.total_messages
+            });
+          } else {
+            setStats(prev => ({
+              ...prev,
+              incidents: (snapshot.incidents || []).length
+            }));
+          }
+          console.log('✅ Bootstrap loaded:', (snapshot.incidents || []).length, 'incidents');
+          return;
+        } catch (bootstrapError) {
+          console.error('⚠️ Bootstrap failed, loading individually:', bootstrapError);
+        }
+      }
+
       // Load incidents - CRITICAL FIX: Make sure this works without auth too
       try {
         const incidentsResponse = await axios.get(`${API_URL}/api/incidents`, config);
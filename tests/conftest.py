@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules (uvicorn runs from backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+@pytest.fixture
+def anyio_backend():
+    # Motor and the server's background work run on asyncio
+    return "asyncio"
+
+
+@pytest.fixture
+def server_db(monkeypatch):
+    """The server module bound to a fresh in-memory database (default tenant, nothing emitted)"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import server
+
+    mongo_client = mongomock_motor.AsyncMongoMockClient()
+    database = mongo_client["stadtwache_test"]
+    monkeypatch.setattr(server, "client", mongo_client)
+    monkeypatch.setattr(server.tenant_databases, "values", {server.tenants.default: database})
+    for state in (server.dispatch_engines, server.incident_queues, server.presence_tables):
+        monkeypatch.setattr(state, "values", {})
+
+    async def emit(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(server.sio, "emit", emit)
+    return database
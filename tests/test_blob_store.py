@@ -0,0 +1,27 @@
+import base64
+import hashlib
+
+import pytest
+
+from blob_store import BlobStore, content_key, decode_base64_image
+
+
+def test_content_key_is_sha256():
+    assert content_key(b"foto") == hashlib.sha256(b"foto").hexdigest()
+
+
+def test_decode_base64_image():
+    encoded = base64.b64encode(b"\xff\xd8data").decode()
+    assert decode_base64_image(encoded) == (b"\xff\xd8data", "image/jpeg")
+    assert decode_base64_image(f"data:image/png;base64,{encoded}") == (b"\xff\xd8data", "image/png")
+    with pytest.raises(ValueError):
+        decode_base64_image("data:image/png;base64,abc")
+
+
+def test_incomplete_store_fails_on_creation():
+    class PutOnly(BlobStore):
+        async def put(self, data, content_type="application/octet-stream"):
+            return content_key(data)
+
+    with pytest.raises(TypeError):
+        PutOnly()
@@ -0,0 +1,42 @@
+import pytest
+
+import server
+from tenants import use_tenant
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    events = []
+
+    async def emit(event, data, to=None, **kwargs):
+        events.append((event, to))
+
+    monkeypatch.setattr(server.sio, "emit", emit)
+    return events
+
+
+@pytest.mark.anyio
+async def test_badge_update_reaches_users_outside_the_channel_room(emitted):
+    await server.publish_channel_message({"channel": "general", "seq": 7, "content": "hallo"})
+    assert emitted == [
+        ("new_message", ["default/general"]),
+        ("badge_update", ["default/all"]),
+    ]
+
+
+@pytest.mark.anyio
+async def test_badge_update_for_role_and_department_channels(emitted):
+    await server.publish_channel_message({"channel": "role:police", "seq": 1})
+    await server.publish_channel_message({"channel": "dept:Streifendienst", "seq": 1})
+    assert [to for event, to in emitted if event == "badge_update"] == [
+        ["default/role:police"],
+        ["default/dept:Streifendienst"],
+    ]
+
+
+@pytest.mark.anyio
+async def test_badge_update_stays_in_tenant(emitted, monkeypatch):
+    monkeypatch.setitem(server.tenants.tenants, "koeln", server.Tenant("koeln", "stadtwache_koeln"))
+    with use_tenant("koeln"):
+        await server.publish_channel_message({"channel": "general", "seq": 2})
+    assert emitted[-1] == ("badge_update", ["koeln/all"])
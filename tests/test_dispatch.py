@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from dispatch import CELL_SIZE_DEG, DispatchEngine, SpatialIndex, haversine_km
+
+LAT, LNG = 50.935, 6.955  # middle of a grid cell
+
+
+def test_haversine_km():
+    assert haversine_km(LAT, LNG, LAT, LNG) == 0
+    assert haversine_km(50.0, 7.0, 51.0, 7.0) == pytest.approx(111.19, abs=0.01)
+
+
+def test_nearby_grows_rings_until_enough():
+    index = SpatialIndex()
+    index.update("center", LAT, LNG, ts=0)
+    index.update("ring1", LAT + CELL_SIZE_DEG, LNG, ts=0)
+    index.update("ring3", LAT + 3 * CELL_SIZE_DEG, LNG, ts=0)
+    index.update("ring5", LAT + 5 * CELL_SIZE_DEG, LNG, ts=0)
+    assert sorted(index.nearby(LAT, LNG, min_results=1)) == ["center", "ring1"]
+    assert sorted(index.nearby(LAT, LNG, min_results=3)) == ["center", "ring1", "ring3"]
+    assert sorted(index.nearby(LAT, LNG, min_results=10)) == ["center", "ring1", "ring3", "ring5"]
+    assert index.nearby(LAT, LNG, min_results=10, max_rings=2) == ["center", "ring1"]
+
+
+def test_nearby_scans_one_ring_past_the_threshold():
+    index = SpatialIndex()
+    # Corner of ring 2 (about 2.8 cells away) and just across the border of ring 3 (2.6 cells)
+    index.update("corner", LAT + 2 * CELL_SIZE_DEG, LNG + 2 * CELL_SIZE_DEG, ts=0)
+    index.update("border", LAT + 2.6 * CELL_SIZE_DEG, LNG, ts=0)
+    index.update("far", LAT + 9 * CELL_SIZE_DEG, LNG, ts=0)
+    assert sorted(index.nearby(LAT, LNG, min_results=1)) == ["border", "corner"]
+
+
+def test_index_moves_and_removes_units():
+    index = SpatialIndex()
+    index.update("u1", LAT, LNG, ts=0)
+    index.update("u1", LAT + 10 * CELL_SIZE_DEG, LNG, ts=0)
+    assert index.nearby(LAT, LNG, min_results=1, max_rings=2) == []
+    index.remove("u1")
+    assert index.cells == {} and index.positions == {}
+
+
+def engine_with(*officers, now=1000.0):
+    engine = DispatchEngine()
+    for user_id, status, lat, lng, assignments in officers:
+        engine.set_officer(user_id, user_id, status, assignments)
+        engine.update_position(user_id, lat, lng, ts=now)
+    return engine
+
+
+def test_candidates_scoring(monkeypatch):
+    monkeypatch.setattr("dispatch.time.monotonic", lambda: 1000.0)
+    engine = engine_with(
+        ("patrol", "Streife", LAT + 0.01, LNG, 0),
+        ("on_duty", "Im Dienst", LAT + 0.01, LNG, 0),
+        ("busy", "Streife", LAT + 0.005, LNG, 2),
+        ("break", "Pause", LAT, LNG, 0),
+        ("off", "Nicht verfügbar", LAT, LNG, 0),
+    )
+    ranked = engine.candidates(LAT, LNG, "medium")
+    assert [c["user_id"] for c in ranked] == ["patrol", "on_duty", "busy"]
+    patrol, on_duty, busy = ranked
+    assert on_duty["score"] == pytest.approx(patrol["score"] * 1.2, abs=0.002)
+    assert busy["score"] == pytest.approx(busy["distance_km"] + 2 * 1.5, abs=0.002)
+    # Only high priority calls officers on a break
+    assert "break" in [c["user_id"] for c in engine.candidates(LAT, LNG, "high")]
+    assert engine.candidates(LAT, LNG, "medium", limit=1) == [patrol]
+
+
+def test_candidates_skip_stale_positions_and_unknown_users(monkeypatch):
+    monkeypatch.setattr("dispatch.time.monotonic", lambda: 1000.0 + 31 * 60)
+    engine = engine_with(("stale", "Streife", LAT, LNG, 0))
+    engine.update_position("not_an_officer", LAT, LNG, ts=1000.0 + 31 * 60)
+    assert engine.candidates(LAT, LNG, "high") == []
+    engine.update_position("stale", LAT, LNG, ts=1000.0 + 31 * 60)
+    assert [c["user_id"] for c in engine.candidates(LAT, LNG, "high")] == ["stale"]
+
+
+def test_assignment_counts_never_go_negative():
+    engine = engine_with(("u1", "Streife", LAT, LNG, 0))
+    engine.change_assignments("u1", -1)
+    engine.change_assignments(None, 1)
+    assert engine.officers["u1"].open_assignments == 0
+
+
+@pytest.mark.anyio
+async def test_assign_only_to_active_dispatch_roles(server_db):
+    import server
+
+    now = datetime.utcnow()
+    await server_db.users.insert_many([
+        {"id": "police", "username": "Streife 1", "role": "police", "is_active": True},
+        {"id": "inactive", "username": "Streife 2", "role": "police", "is_active": False},
+        {"id": "admin", "username": "Leitstelle", "role": "admin", "is_active": True},
+    ])
+    await server_db.incidents.insert_one({
+        "id": "i1", "title": "T", "description": "D", "priority": "high", "status": "open",
+        "location": {"lat": LAT, "lng": LNG}, "address": "A", "reported_by": "admin",
+        "created_at": now, "updated_at": now, "version": 1,
+    })
+    dispatcher = server.User(id="lead", email="leitstelle@stadtwache.de", username="Leitstelle", role="admin")
+
+    for officer_id in ("inactive", "admin", "missing"):
+        with pytest.raises(HTTPException) as error:
+            await server.assign_incident("i1", officer_id, dispatcher)
+        assert error.value.status_code == 404
+
+    incident = await server.assign_incident("i1", "police", dispatcher)
+    assert incident.assigned_to == "police"
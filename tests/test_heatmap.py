@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+
+from heatmap import (aggregate_tiles, cell_bounds, event_increments, geohash, geohash_cells, pick_precision,
+                     viewport_cell_count, viewport_cells)
+
+
+def test_geohash_reference_values():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash(42.6, -5.6, 5) == "ezs42"
+    assert geohash(-90.0, -180.0, 3) == "000"
+    assert geohash(90.0, 180.0, 3) == "zzz"
+
+
+def test_geohash_cells_matches_scalar():
+    lat = np.array([50.9375, 52.52, -33.87])
+    lng = np.array([6.9603, 13.405, 151.21])
+    assert geohash_cells(lat, lng, 6).tolist() == [geohash(a, b, 6) for a, b in zip(lat, lng)]
+
+
+def test_cell_bounds_contain_point():
+    south, west, north, east = cell_bounds(geohash(50.9375, 6.9603, 7))
+    assert south <= 50.9375 < north
+    assert west <= 6.9603 < east
+
+
+def test_viewport_cells_cover_viewport():
+    south, west, north, east = 50.85, 6.85, 51.0, 7.1
+    cells = viewport_cells(south, west, north, east, 5)
+    assert len(cells) == len(set(cells))
+    assert len(cells) <= viewport_cell_count(south, west, north, east, 5)
+    for lat in np.linspace(south, north, 15):
+        for lng in np.linspace(west, east, 15):
+            assert geohash(lat, lng, 5) in cells
+    for cell in cells:
+        cell_south, cell_west, cell_north, cell_east = cell_bounds(cell)
+        assert cell_south <= north and cell_north >= south and cell_west <= east and cell_east >= west
+
+
+def test_pick_precision_prefers_finest_within_limit():
+    city = (50.85, 6.85, 51.0, 7.1)
+    assert pick_precision(*city, (4, 5, 6, 7), max_cells=2500) == 6
+    assert pick_precision(*city, (4, 5, 6, 7), max_cells=100) == 5
+    assert pick_precision(-80, -170, 80, 170, (6, 7), max_cells=100) is None
+
+
+def test_event_increments():
+    ts = datetime(2026, 5, 1, 23, 59)
+    reported = event_increments({"lat": 50.9, "lng": 6.9}, ts, "reported", "high", (4, 6))
+    assert [key for key, _ in reported] == [
+        {"precision": 4, "cell": geohash(50.9, 6.9, 4), "day": "2026-05-01"},
+        {"precision": 6, "cell": geohash(50.9, 6.9, 6), "day": "2026-05-01"},
+    ]
+    assert reported[0][1] == {"reported": 1, "high": 1}
+    assert event_increments({"lat": 50.9, "lng": 6.9}, ts, "completed", "high", (4,))[0][1] == {"completed": 1}
+    assert event_increments({"lat": 50.9, "lng": 6.9}, ts, "reported", "low", (4,), -1)[0][1] == {"reported": -1, "low": -1}
+
+
+def test_aggregate_tiles_matches_increments():
+    lat = [50.9, 50.9001, 52.5]
+    lng = [6.9, 6.9001, 13.4]
+    ts = [datetime(2026, 5, 1, 8), datetime(2026, 5, 1, 9), datetime(2026, 5, 2, 8)]
+    tiles = aggregate_tiles(lat, lng, ts, ["reported", "completed", "reported"], ["high", None, "low"], (5,))
+    by_cell = {(tile["cell"], tile["day"]): tile for tile in tiles}
+    cologne = by_cell[(geohash(50.9, 6.9, 5), "2026-05-01")]
+    assert (cologne["reported"], cologne["completed"], cologne["high"]) == (1, 1, 1)
+    berlin = by_cell[(geohash(52.5, 13.4, 5), "2026-05-02")]
+    assert (berlin["reported"], berlin["low"], berlin["completed"]) == (1, 1, 0)
+    assert aggregate_tiles([], [], [], [], [], (5,)) == []
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from PIL import Image
+
+from images import ImagePipeline, is_image_key, process_image
+
+OPTIONS = dict(image_format="webp", full_max_px=1600, thumb_max_px=320, quality=80, thumb_quality=70,
+               max_pixels=40_000_000)
+
+
+def jpeg(size, orientation=None, color=(200, 30, 30)):
+    image = Image.new("RGB", size, color)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    exif[0x010F] = "Kamera"
+    out = io.BytesIO()
+    image.save(out, "JPEG", exif=exif, quality=90)
+    return out.getvalue()
+
+
+def test_is_image_key():
+    assert is_image_key("0" * 64)
+    assert not is_image_key("0" * 63)
+    assert not is_image_key("G" * 64)
+    assert not is_image_key("data:image/jpeg;base64,AAAA")
+
+
+def test_variants_are_rotated_resized_and_stripped():
+    result = process_image(jpeg((4000, 3000), orientation=6), **OPTIONS)
+    assert result["content_type"] == "image/webp"
+    # Orientation 6: portrait after rotation, long side limited to full_max_px
+    assert (result["width"], result["height"]) == (1200, 1600)
+    with Image.open(io.BytesIO(result["full"])) as full:
+        assert full.format == "WEBP"
+        assert full.size == (1200, 1600)
+        assert not dict(full.getexif())
+    with Image.open(io.BytesIO(result["thumb"])) as thumb:
+        assert thumb.size == (240, 320)
+
+
+def test_small_images_are_not_upscaled():
+    result = process_image(jpeg((200, 100)), **{**OPTIONS, "image_format": "jpeg"})
+    assert result["content_type"] == "image/jpeg"
+    assert (result["width"], result["height"]) == (200, 100)
+    with Image.open(io.BytesIO(result["thumb"])) as thumb:
+        assert thumb.size == (200, 100)
+
+
+def test_transparent_png_keeps_alpha():
+    image = Image.new("RGBA", (50, 50), (0, 0, 0, 0))
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    result = process_image(out.getvalue(), **OPTIONS)
+    with Image.open(io.BytesIO(result["full"])) as full:
+        assert full.mode == "RGBA"
+
+
+def test_invalid_images_raise_value_error():
+    with pytest.raises(ValueError, match="not a supported image format"):
+        process_image(b"not an image", **OPTIONS)
+    with pytest.raises(ValueError, match="unreadable image"):
+        process_image(jpeg((2000, 2000)), **{**OPTIONS, "max_pixels": 100_000})
+    with pytest.raises(ValueError, match="unreadable image"):
+        process_image(jpeg((400, 300))[:200], **OPTIONS)
+
+
+def test_pipeline_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        ImagePipeline(image_format="gif")
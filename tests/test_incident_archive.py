@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from incident_archive import (analytics_row, archive_query, decode_archived_incident, encode_archived_incident,
+                              month_bucket)
+
+CREATED = datetime(2026, 4, 30, 22, 0)
+ASSIGNED = datetime(2026, 4, 30, 22, 5)
+COMPLETED = datetime(2026, 5, 1, 0, 30)
+OFFICER = {"id": "u2", "username": "Müller"}
+
+
+def incident(**overrides):
+    doc = {
+        "id": "i1", "title": "Ruhestörung", "description": "Laute Musik", "address": "Domplatz 1",
+        "priority": "high", "reported_by": "u1", "assigned_to": "u2", "assigned_to_name": "Müller",
+        "created_at": CREATED, "assigned_at": ASSIGNED, "version": 3,
+        "location": {"lat": 50.9413, "lng": 6.9583}, "status": "in_progress",
+    }
+    doc.update(overrides)
+    return doc
+
+
+def test_encode_compact_document():
+    doc = encode_archived_incident(incident(), OFFICER, COMPLETED, ["k1", "k2"], "r1")
+    assert doc["_id"] == "i1"
+    assert doc["p"] == 0
+    assert doc["loc"] == [6.9583, 50.9413]
+    assert doc["m"] == 202605
+    assert doc["dur"] == 2 * 3600 + 30 * 60
+    assert doc["rsp"] == 5 * 60
+    assert doc["img"] == ["k1", "k2"]
+    assert (doc["cb"], doc["cn"], doc["rid"]) == ("u2", "Müller", "r1")
+    assert "status" not in doc and "location" not in doc
+
+
+def test_encode_leaves_out_missing_values():
+    doc = encode_archived_incident(incident(assigned_to=None, assigned_at=None, location=None, priority="urgent"),
+                                   OFFICER, COMPLETED, [])
+    assert doc["p"] == 1
+    for key in ("at", "sa", "rsp", "loc", "img", "rid"):
+        assert key not in doc
+
+
+def test_round_trip():
+    decoded = decode_archived_incident(encode_archived_incident(incident(), OFFICER, COMPLETED, ["k1"], "r1"))
+    original = incident()
+    for field in ("id", "title", "description", "address", "priority", "reported_by", "assigned_to",
+                  "assigned_to_name", "created_at", "assigned_at", "version", "location"):
+        assert decoded[field] == original[field], field
+    assert decoded["status"] == "closed"
+    assert decoded["completed_at"] == COMPLETED
+    assert decoded["completed_by_name"] == "Müller"
+    assert decoded["image_count"] == 1
+    assert decoded["archive_report_id"] == "r1"
+
+
+def test_archive_query_month_range():
+    query = archive_query(datetime(2026, 1, 15), datetime(2026, 3, 1), priority="low", assigned_to="u2")
+    assert query["m"] == {"$gte": 202601, "$lte": 202603}
+    assert query["xa"] == {"$gte": datetime(2026, 1, 15), "$lt": datetime(2026, 3, 1)}
+    assert (query["p"], query["at"]) == (2, "u2")
+    assert month_bucket(datetime(2026, 12, 31)) == 202612
+
+
+def test_analytics_row_labels():
+    row = analytics_row({"_id": 202605, "count": 2, "avg_resolution_seconds": 10.6, "avg_response_seconds": None},
+                        "month")
+    assert row == {"month": "2026-05", "count": 2, "avg_resolution_seconds": 11, "avg_response_seconds": None}
+    assert analytics_row({"_id": 0, "count": 1}, "priority")["priority"] == "high"
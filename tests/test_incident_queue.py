@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from incident_queue import SLA_SECONDS, SLA_WARNING_RATIO, IncidentQueue, TimerWheel
+
+NOW = datetime(2026, 5, 1, 12, 0, 0)
+
+
+def incident(incident_id, priority="medium", minutes_ago=0):
+    return {"id": incident_id, "priority": priority, "created_at": NOW - timedelta(minutes=minutes_ago),
+            "title": incident_id}
+
+
+def run_ticks(queue, ticks):
+    fired = []
+    for tick in range(1, ticks + 1):
+        fired.extend((tick, entry.id, level) for entry, level in queue.tick())
+    return fired
+
+
+def test_wheel_fires_after_delay():
+    wheel = TimerWheel(slots=10)
+    wheel.schedule(3, "a")
+    wheel.schedule(0.2, "b")
+    assert wheel.advance() == ["b"]
+    assert wheel.advance() == []
+    assert wheel.advance() == ["a"]
+    assert wheel.advance() == []
+
+
+def test_wheel_delays_longer_than_one_revolution():
+    wheel = TimerWheel(slots=4)
+    wheel.schedule(10, "late")
+    due = [tick for tick in range(1, 13) if wheel.advance()]
+    assert due == [10]
+
+
+def test_queue_orders_by_priority_then_age():
+    queue = IncidentQueue()
+    queue.upsert(incident("low-old", "low", 50), now=NOW)
+    queue.upsert(incident("high-new", "high", 1), now=NOW)
+    queue.upsert(incident("high-old", "high", 5), now=NOW)
+    queue.upsert(incident("medium", "medium", 2), now=NOW)
+    assert [item["id"] for item in queue.top(10, now=NOW)] == ["high-old", "high-new", "medium", "low-old"]
+    assert [item["id"] for item in queue.top(2, now=NOW)] == ["high-old", "high-new"]
+
+    queue.remove("high-old")
+    queue.remove("missing")
+    assert [item["id"] for item in queue.top(10, now=NOW)] == ["high-new", "medium", "low-old"]
+    assert len(queue) == 3
+
+
+def test_sla_warning_and_breach_timers():
+    queue = IncidentQueue(tick_seconds=60)
+    queue.upsert(incident("a", "high"), now=NOW)
+    limit_minutes = SLA_SECONDS["high"] // 60
+    fired = run_ticks(queue, limit_minutes + 1)
+    assert fired == [(int(limit_minutes * SLA_WARNING_RATIO + 0.999), "a", "warning"), (limit_minutes, "a", "breach")]
+
+
+def test_overdue_incident_schedules_no_timers():
+    queue = IncidentQueue(tick_seconds=60)
+    queue.upsert(incident("old", "high", 60), now=NOW)
+    assert run_ticks(queue, 20) == []
+    assert queue.top(1, now=NOW)[0]["overdue"] is True
+
+
+def test_removed_or_updated_entries_ignore_stale_timers():
+    queue = IncidentQueue(tick_seconds=60)
+    queue.upsert(incident("gone", "high"), now=NOW)
+    queue.upsert(incident("changed", "high"), now=NOW)
+    queue.remove("gone")
+    # Lower priority: the high-priority timers of the first version must not fire
+    queue.upsert(incident("changed", "low"), now=NOW)
+    assert run_ticks(queue, SLA_SECONDS["high"] // 60 + 1) == []
@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from heatmap import geohash
+
+OFFICER = "officer"
+
+
+@pytest.fixture
+async def incident(server_db):
+    import server
+
+    now = datetime.utcnow()
+    doc = {
+        "id": "i1", "title": "Ruhestörung", "description": "Laute Musik", "priority": "low",
+        "status": "in_progress", "location": {"lat": 50.94, "lng": 6.96}, "address": "Domplatz 1",
+        "reported_by": "u1", "assigned_to": OFFICER, "assigned_to_name": "Streife 1", "assigned_at": now,
+        "created_at": now, "updated_at": now, "version": 1,
+    }
+    await server_db.incidents.insert_one(dict(doc))
+    await server.record_heatmap_event(doc, "reported", now)
+    server.dispatch_engine.set_officer(OFFICER, "Streife 1", "Streife", 1)
+    return doc
+
+
+def editor():
+    import server
+
+    return server.User(id="u1", email="leitstelle@stadtwache.de", username="Leitstelle", role="admin")
+
+
+async def reported_tiles(database, precision=5):
+    tiles = await database.heatmap_tiles.find({"precision": precision}, {"_id": 0}).to_list(None)
+    return {tile["cell"]: tuple(tile.get(name, 0) for name in ("reported", "low", "high")) for tile in tiles}
+
+
+@pytest.mark.anyio
+async def test_update_moves_heatmap_tiles(server_db, incident):
+    import server
+
+    await server.update_incident("i1", server.IncidentUpdate(priority="high", location={"lat": 52.52, "lng": 13.40}),
+                                 editor())
+    assert await reported_tiles(server_db) == {
+        geohash(50.94, 6.96, 5): (0, 0, 0),
+        geohash(52.52, 13.40, 5): (1, 0, 1),
+    }
+
+
+@pytest.mark.anyio
+async def test_reopen_releases_assignment_and_requeues(server_db, incident):
+    import server
+
+    updated = await server.update_incident("i1", server.IncidentUpdate(status="open"), editor())
+    assert updated.status == "open" and updated.assigned_to is None
+    assert server.dispatch_engine.officers[OFFICER].open_assignments == 0
+    assert [entry["id"] for entry in server.incident_queue.top(10)] == ["i1"]
+
+
+@pytest.mark.anyio
+async def test_status_changes_go_through_assign_and_complete(server_db, incident):
+    import server
+
+    for status in ("closed", "completed"):
+        with pytest.raises(HTTPException) as error:
+            await server.update_incident("i1", server.IncidentUpdate(status=status), editor())
+        assert error.value.status_code == 400
+    # Sending the current status back is not a change
+    updated = await server.update_incident("i1", server.IncidentUpdate(status="in_progress", title="Neu"), editor())
+    assert (updated.status, updated.title, updated.version) == ("in_progress", "Neu", 2)
+    assert server.dispatch_engine.officers[OFFICER].open_assignments == 1
+
+
+@pytest.mark.anyio
+async def test_server_fields_are_not_updatable(server_db, incident):
+    import server
+
+    payload = server.IncidentUpdate(**{"title": "Neu", "assigned_to": "someone", "version": 99, "reported_by": "x"})
+    updated = await server.update_incident("i1", payload, editor())
+    assert (updated.assigned_to, updated.version, updated.reported_by) == (OFFICER, 2, "u1")
+    with pytest.raises(HTTPException):
+        await server.update_incident("i1", server.IncidentUpdate(priority="urgent"), editor())
+
+
+class MemoryBlobStore:
+    def __init__(self):
+        self.blobs = {}
+
+    async def put(self, data, content_type="application/octet-stream"):
+        from blob_store import content_key
+
+        key = content_key(data)
+        self.blobs[key] = (data, content_type)
+        return key
+
+
+@pytest.mark.anyio
+async def test_create_returns_before_uploads_are_transcoded(server_db, monkeypatch):
+    import base64
+
+    import server
+
+    async def process(data):
+        return {"full": b"full:" + data, "thumb": b"thumb:" + data, "content_type": "image/webp", "width": 4, "height": 3}
+
+    monkeypatch.setattr(server.image_pipeline, "process", process)
+    monkeypatch.setattr(server.blob_stores, "values", {server.tenants.default: MemoryBlobStore()})
+    photo = base64.b64encode(b"\xff\xd8foto").decode()
+    created = await server.create_incident(server.IncidentCreate(
+        title="Einbruch", description="Fenster eingeschlagen", priority="high",
+        location={"lat": 50.94, "lng": 6.96}, address="Domplatz 1", images=[photo],
+    ), editor())
+    assert created.images == [] and created.images_pending == 1
+
+    await server.incident_image_tasks[created.id]
+    incident = await server_db.incidents.find_one({"id": created.id})
+    source = await server_db.image_sources.find_one({})
+    assert incident["images"] == [source["full"]] and incident["thumbnails"] == [source["thumb"]]
+    assert incident["images_pending"] == 0 and incident["version"] == 2
@@ -0,0 +1,73 @@
+import presence
+from presence import PresenceTable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def table(monkeypatch, offline_after=120):
+    clock = Clock()
+    monkeypatch.setattr(presence.time, "monotonic", clock)
+    return PresenceTable(offline_after), clock
+
+
+def test_touch_reports_new_users(monkeypatch):
+    users, _ = table(monkeypatch)
+    assert users.touch("u1", "Anna") is True
+    assert users.touch("u1", "Anna") is False
+    assert "u1" in users and len(users) == 1
+
+
+def test_sockets_keep_user_online_until_last_disconnect(monkeypatch):
+    users, _ = table(monkeypatch)
+    assert users.connect("s1", "u1", "Anna") is True
+    assert users.connect("s2", "u1", "Anna") is False
+    assert users.disconnect("s1") == ("u1", False)
+    assert users.disconnect("s2") == ("u1", True)
+    assert users.disconnect("s2") == (None, False)
+    assert "u1" not in users
+
+
+def test_expire_drops_only_stale_heartbeat_users(monkeypatch):
+    users, clock = table(monkeypatch)
+    users.touch("heartbeat", "Anna")
+    users.connect("s1", "socket", "Ben")
+    clock.now += 121
+    users.touch("fresh", "Carla")
+    assert users.expire() == ["heartbeat"]
+    assert sorted(users.entries) == ["fresh", "socket"]
+    assert {u["user_id"] for u in users.online()} == {"fresh", "socket"}
+
+
+def test_remove_keeps_socket_counts_consistent(monkeypatch):
+    users, _ = table(monkeypatch)
+    users.touch("u1", "Anna")
+    assert users.remove("u1") is True
+    assert users.remove("u1") is False
+
+    users.connect("s1", "u2", "Ben")
+    # Logout while the socket is still connected: the socket decides when u2 goes offline
+    assert users.remove("u2") is False
+    assert users.connect("s2", "u2", "Ben") is False
+    assert users.disconnect("s1") == ("u2", False)
+    assert users.disconnect("s2") == ("u2", True)
+
+
+def test_views_are_cached_per_tick_and_version(monkeypatch):
+    users, clock = table(monkeypatch)
+    users.touch("u1", "Anna")
+    online = users.online()
+    assert online == [{"user_id": "u1", "username": "Anna", "last_seen": online[0]["last_seen"], "minutes_ago": 0}]
+    assert users.online() is online
+    users.touch("u2", "Ben")
+    assert len(users.online()) == 2
+    clock.now += 90
+    assert users.fields()["u1"]["online_status"] == "Online"
+    clock.now += 60
+    assert users.fields()["u1"] == {"is_online": False, "last_seen": users.fields()["u1"]["last_seen"],
+                                    "online_status": "Vor 2 Min."}
@@ -0,0 +1,122 @@
+import pytest
+
+import rate_limit
+from rate_limit import InMemoryBucketStore, LocationFanout, RateLimit, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_rate_limit_parse():
+    limit = RateLimit.parse("2/10")
+    assert (limit.rate, limit.burst) == (2.0, 10.0)
+    limit = RateLimit.parse("0.5")
+    assert (limit.rate, limit.burst) == (0.5, 0.5)
+    with pytest.raises(ValueError):
+        RateLimit.parse("viel/10")
+
+
+@pytest.mark.anyio
+async def test_bucket_allows_burst_then_refills(clock):
+    store = InMemoryBucketStore()
+    limit = RateLimit(2, 3)
+    assert [await store.take("u1", limit) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert await store.take("u1", limit) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert await store.take("u1", limit) == 0.0
+    # Refill is capped at the burst
+    clock.now += 100
+    assert [await store.take("u1", limit) for _ in range(4)][-1] == pytest.approx(0.5)
+    # Buckets are independent per key
+    assert await store.take("u2", limit) == 0.0
+
+
+@pytest.mark.anyio
+async def test_bucket_cost(clock):
+    store = InMemoryBucketStore()
+    limit = RateLimit(1, 5)
+    assert await store.take("u1", limit, cost=4) == 0.0
+    assert await store.take("u1", limit, cost=4) == pytest.approx(3.0)
+
+
+@pytest.mark.anyio
+async def test_prune_drops_only_full_buckets(clock):
+    store = InMemoryBucketStore()
+    limit = RateLimit(1, 10)
+    await store.take("idle", limit)
+    clock.now += 5
+    await store.take("busy", limit, cost=10)
+    clock.now += 5
+    store.prune()
+    assert list(store.buckets) == ["busy"]
+
+
+@pytest.mark.anyio
+async def test_prune_runs_periodically(clock, monkeypatch):
+    monkeypatch.setattr(InMemoryBucketStore, "PRUNE_EVERY", 3)
+    store = InMemoryBucketStore()
+    limit = RateLimit(1, 1)
+    await store.take("a", limit)
+    clock.now += 2
+    await store.take("b", limit)
+    assert set(store.buckets) == {"a", "b"}
+    await store.take("c", limit)
+    assert set(store.buckets) == {"b", "c"}
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_rejects_per_user_and_route(clock):
+    limiter = RateLimiter({"message": RateLimit(1, 2)}, InMemoryBucketStore())
+    assert await limiter.hit("message", "u1") == 0.0
+    assert await limiter.hit("message", "u1") == 0.0
+    assert await limiter.hit("message", "u1") == pytest.approx(1.0)
+    assert await limiter.hit("message", "u2") == 0.0
+    # Routes without a configured limit are never limited
+    assert all([await limiter.hit("heartbeat", "u1") == 0.0 for _ in range(10)])
+
+
+def test_fanout_sends_only_the_latest_position():
+    fanout = LocationFanout()
+    fanout.add_client("s1")
+    fanout.publish("u1", {"user_id": "u1", "n": 1})
+    fanout.publish("u2", {"user_id": "u2", "n": 1})
+    fanout.publish("u1", {"user_id": "u1", "n": 2})
+    assert fanout.batches(["s1"]) == [([{"user_id": "u2", "n": 1}, {"user_id": "u1", "n": 2}], ["s1"])]
+    assert fanout.batches(["s1"]) == []
+
+
+def test_fanout_skipped_clients_catch_up_with_latest_positions():
+    fanout = LocationFanout()
+    fanout.add_client("fast")
+    fanout.add_client("slow")
+    fanout.publish("u1", {"n": 1})
+    assert fanout.batches(["fast"]) == [([{"n": 1}], ["fast"])]
+    fanout.publish("u1", {"n": 2})
+    fanout.publish("u2", {"n": 3})
+    batches = sorted(fanout.batches(["fast", "slow"]), key=lambda batch: batch[1])
+    assert batches == [([{"n": 2}, {"n": 3}], ["fast"]), ([{"n": 2}, {"n": 3}], ["slow"])]
+
+
+def test_fanout_new_clients_and_removed_users():
+    fanout = LocationFanout()
+    fanout.publish("u1", {"n": 1})
+    fanout.add_client("late")
+    assert fanout.batches(["late"]) == []
+    fanout.publish("u2", {"n": 2})
+    fanout.remove_user("u2")
+    fanout.publish("u3", {"n": 3})
+    assert fanout.batches(["late"]) == [([{"n": 3}], ["late"])]
+    fanout.remove_client("late")
+    assert "late" not in fanout.delivered
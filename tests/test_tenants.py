@@ -0,0 +1,76 @@
+import pytest
+
+from tenants import (Tenant, TenantLocal, TenantMiddleware, TenantQuota, TenantRegistry, current_tenant,
+                     requested_tenant, use_tenant)
+
+
+def test_quota_parse():
+    quota = TenantQuota.parse("users:500|sockets:400|requests:50/200")
+    assert quota.users == 500
+    assert quota.sockets == 400
+    assert quota.requests is not None
+
+
+def test_quota_parse_partial_and_empty():
+    quota = TenantQuota.parse(" users:100 | ")
+    assert quota.users == 100
+    assert quota.sockets is None and quota.requests is None
+    assert TenantQuota.parse("").users is None
+
+
+def test_quota_parse_rejects_unknown_and_invalid():
+    with pytest.raises(ValueError):
+        TenantQuota.parse("users:5|disk:10")
+    with pytest.raises(ValueError):
+        TenantQuota.parse("users:many")
+
+
+def test_tenant_id_validation():
+    assert Tenant("koeln", "db").id == "koeln"
+    for bad in ("", "Koeln", "-koeln", "a" * 33, "koeln/bonn"):
+        with pytest.raises(ValueError):
+            Tenant(bad, "db")
+
+
+def test_tenant_local_follows_context():
+    registry = TenantRegistry(Tenant("default", "db"))
+    registry.add(Tenant("koeln", "db_koeln"))
+    local = TenantLocal(registry, lambda: registry.current().db_name)
+    assert local.current() == "db"
+    with use_tenant("koeln"):
+        assert local.current() == "db_koeln"
+    assert current_tenant.get() is None
+    assert dict(local.items()) == {"default": "db", "koeln": "db_koeln"}
+
+
+async def _call(middleware, path, tenant):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["current"] = current_tenant.get()
+        seen["requested"] = requested_tenant.get()
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"x-tenant", tenant.encode())] if tenant else []
+    await middleware(app)({"type": "http", "path": path, "headers": headers}, None, send)
+    return seen, sent
+
+
+@pytest.mark.anyio
+async def test_middleware_token_only_paths_ignore_header():
+    registry = TenantRegistry(Tenant("default", "db"))
+    registry.add(Tenant("koeln", "db_koeln"))
+
+    def middleware(app):
+        return TenantMiddleware(app, registry, token_only=lambda path: path.startswith("/api/admin/"))
+
+    seen, _ = await _call(middleware, "/api/incidents", "koeln")
+    assert seen == {"current": "koeln", "requested": "koeln"}
+    seen, _ = await _call(middleware, "/api/admin/stats", "koeln")
+    assert seen == {"current": None, "requested": "koeln"}
+    seen, sent = await _call(middleware, "/api/incidents", "nope")
+    assert seen == {} and sent[0]["status"] == 404
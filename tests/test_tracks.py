@@ -0,0 +1,51 @@
+import numpy as np
+
+from tracks import build_track, delta_arrays, douglas_peucker, drop_outliers, encode_polyline
+
+
+def test_encode_polyline_reference_example():
+    # Example from Google's encoded polyline algorithm documentation
+    lat = np.array([38.5, 40.7, 43.252])
+    lng = np.array([-120.2, -120.95, -126.453])
+    assert encode_polyline(lat, lng) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_encode_polyline_empty_and_single_point():
+    assert encode_polyline(np.array([]), np.array([])) == ""
+    assert encode_polyline(np.array([0.0]), np.array([0.0])) == "??"
+
+
+def test_delta_arrays_round_trip():
+    lat = np.array([50.93746, 50.93801, 50.93650])
+    lng = np.array([6.95821, 6.95900, 6.95755])
+    ts = np.array([1000.0, 1010.0, 1030.0])
+    encoded = delta_arrays(lat, lng, ts)
+    assert encoded["t"] == [1000, 10, 20]
+    assert np.allclose(np.cumsum(encoded["lat"]) / 10 ** encoded["precision"], lat)
+    assert np.allclose(np.cumsum(encoded["lng"]) / 10 ** encoded["precision"], lng)
+
+
+def test_drop_outliers_removes_single_jump():
+    lat = np.array([50.0, 50.0001, 51.0, 50.0002, 50.0003])
+    lng = np.array([7.0, 7.0, 7.0, 7.0, 7.0])
+    ts = np.array([0.0, 10.0, 20.0, 30.0, 40.0])
+    assert drop_outliers(lat, lng, ts).tolist() == [True, True, False, True, True]
+
+
+def test_douglas_peucker_keeps_corners_only():
+    # Straight line east, then straight line north
+    lat = np.array([50.0] * 5 + [50.001, 50.002, 50.003])
+    lng = np.array([7.0, 7.001, 7.002, 7.003, 7.004, 7.004, 7.004, 7.004])
+    keep = douglas_peucker(lat, lng, tolerance_m=5)
+    assert np.flatnonzero(keep).tolist() == [0, 4, 7]
+
+
+def test_build_track_reports_discarded_points():
+    lat = [50.0, 50.0001, 51.0, 50.0002, 50.0003]
+    lng = [7.0] * 5
+    track = build_track(lat, lng, [0, 10, 20, 30, 40], tolerance_m=5)
+    assert track["points_raw"] == 5
+    assert track["points_discarded"] == 1
+    assert track["points"] == 2
+    assert track["bounds"]["north"] == 50.0003
+    assert track["stats"]["duration_s"] == 40